@@ -0,0 +1,92 @@
+"""
+Compares band lookups of single points: a hand-written binary search, `bisect` as in `SlabIndex._search_band`,
+and the uniform and adaptive buckets of `BandBuckets`, on uniform and clustered ys of the lines.
+Query ys are drawn from the same distribution and include the lines themselves, answers are checked
+against the hand-written search
+"""
+import argparse
+import random
+import time
+from array import array
+from typing import Callable, List
+
+from slab import SlabIndex
+from slab.buckets import BandBuckets
+from slab.rbtree import FrozenRBTree
+
+
+def generate_lines(distribution: str, count: int, seed: int = 0) -> List[int]:
+    """
+    `uniform` ys over [0, 100 * count), or `clustered` ys: most of them in a few narrow clusters
+    """
+    rnd = random.Random(seed)
+    span = 100 * count
+    if distribution == 'uniform':
+        ys = rnd.sample(range(span), count)
+    else:
+        centers = [rnd.randrange(span) for _ in range(8)]
+        ys = {rnd.randrange(span) for _ in range(count // 10)}
+        while len(ys) < count:
+            ys.add(int(rnd.choice(centers) + rnd.gauss(0, count / 40)))
+        ys = list(ys)
+    return sorted(ys)
+
+
+def search_band_loop(lines: List[int], y: int) -> int:
+    """
+    Band search of the earlier versions, interpreted step by step
+    """
+    lines_count = len(lines)
+    if lines_count == 0 or y < lines[0] or y > lines[-1]:
+        return -1
+    l, r = -1, lines_count
+    while r - l > 1:
+        m = (l + r) // 2
+        if lines[m] < y:
+            l = m
+        else:
+            r = m
+    if y == lines[r]:
+        return r if r < lines_count - 1 else lines_count - 2
+    return r - 1 if r > 0 else 0
+
+
+def measure(search: Callable[[int], int], ys: List[int]) -> float:
+    start = time.perf_counter()
+    for y in ys:
+        search(y)
+    return (time.perf_counter() - start) / len(ys) * 1e9
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare band lookups of single points')
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 100000, 1000000], help='numbers of lines')
+    parser.add_argument('--queries', type=int, default=200000, help='number of looked up ys')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'distribution':<13} {'lines':>8} {'loop_ns':>8} {'bisect_ns':>10} {'uniform_ns':>11} "
+          f"{'adaptive_ns':>12} {'buckets_kb':>11} {'mismatches':>11}")
+    for distribution in ('uniform', 'clustered'):
+        for lines_count in args.lines:
+            lines = generate_lines(distribution, lines_count, args.seed)
+            rnd = random.Random(args.seed)
+            ys = [rnd.choice(lines) + rnd.randint(-1, 1) for _ in range(args.queries // 2)] + \
+                 [rnd.randint(lines[0] - 10, lines[-1] + 10) for _ in range(args.queries - args.queries // 2)] + \
+                 [lines[0], lines[-1]]
+            rnd.shuffle(ys)
+            index = SlabIndex(array('q'), array('q'), array('i'), array('i'), array('i'), array('i'),
+                              array('q', lines), FrozenRBTree(*(array('i') for _ in range(4))))
+            expected = [search_band_loop(lines, y) for y in ys]
+            loop_ns = measure(lambda y: search_band_loop(lines, y), ys)
+            results = [measure(index._search_band, ys)]
+            mismatches = sum(index._search_band(y) != band for y, band in zip(ys, expected))
+            for mode in BandBuckets.modes:
+                index.set_band_buckets(mode)
+                results.append(measure(index._search_band, ys))
+                mismatches += sum(index._search_band(y) != band for y, band in zip(ys, expected))
+            print(f'{distribution:<13} {lines_count:>8} {loop_ns:>8.0f} {results[0]:>10.0f} {results[1]:>11.0f} '
+                  f'{results[2]:>12.0f} {index.band_buckets.nbytes / 1024:>11.0f} {mismatches:>11}')
@@ -0,0 +1,87 @@
+"""
+Compares the total wall-clock time of locating several query sets against many PSLGs by one main.py invocation
+per query set and by one `--manifest` run with different numbers of workers. Faces of all runs are checked to match
+"""
+import argparse
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.generator import generate_points, generate_pslg
+
+MAIN = Path(__file__).resolve().parent.parent / 'main.py'
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare separate main.py invocations with one manifest run')
+    parser.add_argument('--shape', default='triangulation', help='generated PSLG shape')
+    parser.add_argument('--maps', type=int, default=24, help='number of PSLGs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 30, 60],
+                        help='numbers of cells along a side, taken by the maps in turn')
+    parser.add_argument('--query-sets', type=int, default=2, help='number of query sets per PSLG')
+    parser.add_argument('--points', type=int, default=10000, help='number of points per query set')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='numbers of workers of the manifest')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def write_jobs(directory: str, args) -> list:
+    """
+    Writes every PSLG on its own and every query set twice: in a points file for the manifest and together
+    with its PSLG in an input file for a separate invocation
+
+    :return: jobs of the manifest, each with the input file of its separate invocation
+    """
+    jobs = []
+    for map_index in range(args.maps):
+        pslg = generate_pslg(args.shape, args.sizes[map_index % len(args.sizes)], args.seed + map_index)
+        with open(os.path.join(directory, f'map{map_index}.json'), 'w') as output_file:
+            json.dump({'pslg': pslg, 'points': []}, output_file)
+        for set_index in range(args.query_sets):
+            name = f'{map_index}_{set_index}'
+            points = generate_points(pslg, args.points, args.seed + map_index * args.query_sets + set_index)
+            with open(os.path.join(directory, f'points{name}.json'), 'w') as output_file:
+                json.dump({'points': points}, output_file)
+            with open(os.path.join(directory, f'input{name}.json'), 'w') as output_file:
+                json.dump({'pslg': pslg, 'points': points}, output_file)
+            jobs.append({'pslg': f'map{map_index}.json', 'points': f'points{name}.json', 'output': f'out{name}.json',
+                         'input': f'input{name}.json', 'separate_output': f'separate{name}.json'})
+    return jobs
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    with tempfile.TemporaryDirectory() as directory:
+        jobs = write_jobs(directory, args)
+        manifest_path = os.path.join(directory, 'manifest.json')
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump({'jobs': [{name: job[name] for name in ('pslg', 'points', 'output')} for job in jobs]},
+                      manifest_file)
+        print(f'{args.maps} maps, {len(jobs)} jobs of {args.points} points')
+        print(f"{'run':<20} {'wall_s':>7} {'speedup':>8}")
+
+        start = time.perf_counter()
+        for job in jobs:
+            subprocess.run([sys.executable, str(MAIN), '-i', os.path.join(directory, job['input']),
+                            '-o', os.path.join(directory, job['separate_output'])], check=True)
+        separate_s = time.perf_counter() - start
+        print(f"{'separate':<20} {separate_s:>7.2f} {1:>7.1f}x")
+
+        for workers in args.workers:
+            report_path = os.path.join(directory, 'report.json')
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(MAIN), '--manifest', manifest_path, '-o', report_path,
+                            '-w', str(workers)], check=True)
+            manifest_s = time.perf_counter() - start
+            with open(report_path) as report_file:
+                assert not any('error' in report for report in json.load(report_file)['jobs'])
+            for job in jobs:
+                assert filecmp.cmp(os.path.join(directory, job['output']),
+                                   os.path.join(directory, job['separate_output']), shallow=False)
+                os.remove(os.path.join(directory, job['output']))
+            print(f"{f'manifest -w {workers}':<20} {manifest_s:>7.2f} {separate_s / manifest_s:>7.1f}x")
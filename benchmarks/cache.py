@@ -0,0 +1,83 @@
+"""
+Compares queries with and without the query cache on Zipf-distributed streams, where a few hot locations repeat
+most of the time: the throughput of single queries and of batches and the share of the answers taken from the map
+of points and from the grid. Answers are checked against the index without a cache
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.generator import generate_pslg, generate_points
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+CONFIGURATIONS = [('none', None, 0), ('lru', 'lru', 0), ('clock', 'clock', 0), ('lru+grid', 'lru', None),
+                  ('clock+grid', 'clock', None)]
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare queries with and without the query cache on Zipf streams')
+    parser.add_argument('--shapes', nargs='+', default=['triangulation', 'horizontal'], help='generated PSLG shapes')
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--pool', type=int, default=100000, help='number of distinct query locations')
+    parser.add_argument('--queries', type=int, default=200000, help='number of queries of the stream')
+    parser.add_argument('--exponents', type=float, nargs='+', default=[1.1, 1.5], help='exponents of the Zipf law')
+    parser.add_argument('--cache', type=float, default=8, help='memory cap of the cache in megabytes')
+    parser.add_argument('--grid', type=int, default=1024, help='cells along a side of the grid')
+    parser.add_argument('--batch', type=int, default=1000, help='number of points per batch')
+    parser.add_argument('--single', type=int, default=50000, help='number of single queries timed')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def get_zipf_stream(pslg: dict, pool: int, count: int, exponent: float, seed: int):
+    """
+    Query points drawn from a pool of locations, the k-th most frequent one with probability proportional to k^-exponent
+    """
+    points = generate_points(pslg, pool, seed)
+    xs = np.array([point['x'] for point in points], dtype=np.int64)
+    ys = np.array([point['y'] for point in points], dtype=np.int64)
+    weights = np.arange(1, pool + 1, dtype=np.float64) ** -exponent
+    ranks = np.random.default_rng(seed).choice(pool, size=count, p=weights / weights.sum())
+    return xs[ranks], ys[ranks]
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'shape':<14} {'zipf':>5} {'cache':<11} {'single_qps':>11} {'batch_qps':>10} {'map_hits':>9} "
+          f"{'grid_hits':>10} {'setup_s':>8}")
+    for shape in args.shapes:
+        index = SearchSystem(DCEL(**generate_pslg(shape, args.size, args.seed))).index
+        for exponent in args.exponents:
+            xs, ys = get_zipf_stream(generate_pslg(shape, args.size, args.seed), args.pool, args.queries, exponent,
+                                     args.seed)
+            points = [Point(x, y) for x, y in zip(xs[:args.single].tolist(), ys[:args.single].tolist())]
+            expected = None
+            for name, policy, grid_size in CONFIGURATIONS:
+                start = time.perf_counter()
+                index.set_query_cache(None if policy is None else int(args.cache * 2 ** 20), policy or 'lru',
+                                      args.grid if grid_size is None else grid_size)
+                setup_s = time.perf_counter() - start
+
+                start = time.perf_counter()
+                single_faces = [index.locate_point(point) for point in points]
+                single_s = time.perf_counter() - start
+
+                if index.query_cache is not None:
+                    index.query_cache.clear()
+                    index.query_cache.hits = index.query_cache.cell_hits = index.query_cache.misses = 0
+                start = time.perf_counter()
+                faces = np.concatenate([index.locate_points(xs[i:i + args.batch], ys[i:i + args.batch])
+                                        for i in range(0, len(xs), args.batch)])
+                batch_s = time.perf_counter() - start
+
+                if expected is None:
+                    expected = faces
+                assert np.array_equal(faces, expected) and single_faces == expected[:args.single].tolist()
+                cache = index.query_cache
+                map_hits = cache.hits / len(xs) if cache is not None else 0
+                grid_hits = cache.cell_hits / len(xs) if cache is not None else 0
+                print(f'{shape:<14} {exponent:>5.1f} {name:<11} {len(points) / single_s:>11.0f} '
+                      f'{len(xs) / batch_s:>10.0f} {map_hits:>9.1%} {grid_hits:>10.1%} {setup_s:>8.2f}')
+            index.set_query_cache(None)
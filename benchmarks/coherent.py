@@ -0,0 +1,65 @@
+"""
+Compares batch throughput of independent and coherent point location on random, sorted and trajectory-like points
+"""
+import argparse
+import random
+from typing import Dict, List, Tuple
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from benchmarks.run import best_time
+from dcel import DCEL
+from slab import SearchSystem
+
+MODES = {'independent': False, 'coherent': True}
+
+
+def generate_trajectory(pslg: Dict[str, List[dict]], count: int, seed: int = 0) -> Tuple[List[int], List[int]]:
+    """
+    Random walk over the bounding box, every step is at most a thousandth of its side
+    """
+    rnd = random.Random(seed)
+    vertexes = pslg['vertexes']
+    min_x, max_x = min(v['x'] for v in vertexes), max(v['x'] for v in vertexes)
+    min_y, max_y = min(v['y'] for v in vertexes), max(v['y'] for v in vertexes)
+    step_x, step_y = (max_x - min_x) // 1000 + 1, (max_y - min_y) // 1000 + 1
+    x, y = rnd.randint(min_x, max_x), rnd.randint(min_y, max_y)
+    xs, ys = [], []
+    for _ in range(count):
+        x = min(max(x + rnd.randint(-step_x, step_x), min_x), max_x)
+        y = min(max(y + rnd.randint(-step_y, step_y), min_y), max_y)
+        xs.append(x)
+        ys.append(y)
+    return xs, ys
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare independent and coherent batch point location')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=['triangulation', 'grid'])
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--queries', type=int, default=200000, help='number of points located in a batch')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best time is reported')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'shape':<14} {'points':<11} " + ' '.join(f'{mode:>12}' for mode in MODES) + '   (pts/s)')
+    for shape in args.shapes:
+        pslg = generate_pslg(shape, args.size)
+        search_system = SearchSystem(DCEL(**pslg))
+        points = generate_points(pslg, args.queries)
+        xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+        sorted_points = sorted(zip(xs, ys), key=lambda point: point[::-1])
+        inputs = {
+            'random': (xs, ys),
+            'sorted': ([x for x, _ in sorted_points], [y for _, y in sorted_points]),
+            'trajectory': generate_trajectory(pslg, args.queries),
+        }
+        search_system.locate_points(xs[:1], ys[:1])
+        for name, (input_xs, input_ys) in inputs.items():
+            assert (search_system.locate_points(input_xs, input_ys, True) ==
+                    search_system.locate_points(input_xs, input_ys)).all()
+            throughputs = [len(input_xs) / best_time(lambda: search_system.locate_points(input_xs, input_ys, coherent),
+                                                     args.repeat)
+                           for coherent in MODES.values()]
+            print(f'{shape:<14} {name:<11} ' + ' '.join(f'{throughput:>12.0f}' for throughput in throughputs))
@@ -0,0 +1,59 @@
+"""
+Compares the build time and the query throughput of one PSLG given by integer, float and fraction coordinates.
+The float PSLG maps the integer one onto lon/lat-like degrees, so its coordinates are rounded and many orientation
+tests of points on edges and vertexes need the exact fallback. Answers of the first single queries are checked
+against the exact arithmetic of fraction queries
+"""
+import argparse
+import time
+from fractions import Fraction
+
+import numpy as np
+
+from benchmarks.generator import generate_pslg, generate_points
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare integer, float and fraction coordinates')
+    parser.add_argument('--shape', default='triangulation', help='generated PSLG shape')
+    parser.add_argument('--size', type=int, default=60, help='number of cells along a side')
+    parser.add_argument('--points', type=int, default=200000, help='number of query points')
+    parser.add_argument('--single', type=int, default=20000, help='number of single queries')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    pslg = generate_pslg(args.shape, args.size, args.seed)
+    points = generate_points(pslg, args.points, args.seed)
+    span = max(max(abs(vertex['x']), abs(vertex['y'])) for vertex in pslg['vertexes']) + 1
+    conversions = {
+        'int': lambda value: value,
+        'float': lambda value: 12.5 + value * (10.0 / span),
+        'fraction': lambda value: Fraction(value, 3),
+    }
+    print(f"{'coordinates':<12} {'build_s':>8} {'batch_pts_s':>12} {'single_us':>10} {'mismatches':>11}")
+    for name, convert in conversions.items():
+        vertexes = [{'x': convert(vertex['x']), 'y': convert(vertex['y'])} for vertex in pslg['vertexes']]
+        xs = [convert(point['x']) for point in points]
+        ys = [convert(point['y']) for point in points]
+        start = time.perf_counter()
+        search_system = SearchSystem(DCEL(vertexes, pslg['edges']))
+        build_s = time.perf_counter() - start
+        search_system.locate_points(xs[:1], ys[:1])
+
+        start = time.perf_counter()
+        faces = search_system.locate_points(xs, ys)
+        batch_s = time.perf_counter() - start
+        single = [Point(x, y) for x, y in zip(xs[:args.single], ys[:args.single])]
+        start = time.perf_counter()
+        for point in single:
+            search_system.locate_point(point)
+        single_us = (time.perf_counter() - start) / len(single) * 1e6
+        expected = search_system.locate_points([Fraction(point.x) for point in single],
+                                               [Fraction(point.y) for point in single])
+        print(f'{name:<12} {build_s:>8.2f} {len(xs) / batch_s:>12.0f} {single_us:>10.1f} '
+              f'{int(np.count_nonzero(faces[:len(single)] != expected)):>11}')
@@ -0,0 +1,61 @@
+"""
+Times the construction of the DCEL of large generated graphs by phase, and the time until a graph with one bad pointer
+is rejected: the pointer of the last edge points on the edge itself. Results saved with `--json` on one commit can be
+compared on another one
+"""
+import argparse
+import copy
+import json
+import time
+
+from benchmarks.generator import generate_pslg
+from dcel import DCEL
+from slab import SearchSystem, Stats
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Time DCEL construction and validation')
+    parser.add_argument('--shape', default='triangulation', help='generated PSLG shape')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[300, 600], help='numbers of cells along a side')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='save the results to file')
+    parser.add_argument('--compare', help='print the results saved by --json next to the current ones')
+    return parser.parse_args()
+
+
+def reject_time(pslg: dict) -> float:
+    """
+    Time until a graph whose last edge points on itself is rejected, by the DCEL or by the build of the slabs
+    """
+    bad_pslg = copy.deepcopy(pslg)
+    bad_pslg['edges'][-1]['p1'] = len(bad_pslg['edges']) - 1
+    start = time.perf_counter()
+    try:
+        SearchSystem(DCEL(**bad_pslg))
+    except Exception:
+        return time.perf_counter() - start
+    raise AssertionError('The bad graph is accepted')
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    before = {}
+    if args.compare:
+        with open(args.compare) as input_file:
+            before = json.load(input_file)
+    results = {}
+    print(f"{'size':>5} {'edges':>8} {'build_s':>8} {'before_s':>9} {'reject_s':>9} {'before_s':>9}  phases")
+    for size in args.sizes:
+        pslg = generate_pslg(args.shape, size, args.seed)
+        stats = Stats()
+        start = time.perf_counter()
+        dcel = DCEL(**pslg, stats=stats)
+        build_s = time.perf_counter() - start
+        result = results[str(size)] = {'build_s': build_s, 'reject_s': reject_time(pslg), 'phases_s': stats.phases}
+        previous = before.get(str(size), {})
+        phases = ' '.join(f'{name}={seconds:.2f}' for name, seconds in stats.phases.items())
+        print(f"{size:>5} {len(dcel.edges):>8} {build_s:>8.2f} {previous.get('build_s', float('nan')):>9.2f} "
+              f"{result['reject_s']:>9.2f} {previous.get('reject_s', float('nan')):>9.2f}  {phases}")
+    if args.json:
+        with open(args.json, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
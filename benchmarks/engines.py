@@ -0,0 +1,50 @@
+"""
+Compares the slab and trapezoid engines on the same inputs: memory, build time and query time
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from benchmarks.run import best_time
+from dcel import DCEL, Point
+from slab import SearchSystem, TrapezoidMap
+
+ENGINES = {
+    'slab': SearchSystem,
+    'trapezoid': TrapezoidMap,
+}
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare point location engines')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=list(SHAPES))
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--queries', type=int, default=100000, help='number of points located in a batch')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best time is reported')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'shape':<14} {'engine':<10} {'build_s':>8} {'build_MB':>9} {'query_MB':>9} "
+          f"{'batch_pts/s':>12} {'single_us':>10}")
+    for shape in args.shapes:
+        pslg = generate_pslg(shape, args.size)
+        dcel = DCEL(**pslg)
+        points = generate_points(pslg, args.queries)
+        xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+        for name, engine in ENGINES.items():
+            build_time = best_time(lambda: engine(dcel), args.repeat)
+            tracemalloc.start()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            locator = engine(dcel)
+            build_memory = tracemalloc.get_traced_memory()[0] - start_memory
+            tracemalloc.stop()
+            query_memory = locator.frozen.nbytes if name == 'slab' else locator.nbytes
+            locator.locate_points(xs[:1], ys[:1])
+            batch_time = best_time(lambda: locator.locate_points(xs, ys), args.repeat)
+            single_points = [Point(**point) for point in points[:10000]]
+            single_time = best_time(lambda: [locator.locate_point(point) for point in single_points], 1)
+            print(f'{shape:<14} {name:<10} {build_time:>8.3f} {build_memory / 2 ** 20:>9.1f} '
+                  f'{query_memory / 2 ** 20:>9.2f} {len(points) / batch_time:>12.0f} '
+                  f'{single_time / len(single_points) * 1e6:>10.1f}')
@@ -0,0 +1,191 @@
+"""
+Synthetic PSLG generator producing the JSON input format of main.py
+"""
+import argparse
+import functools
+import json
+import random
+from typing import Callable, Dict, List, Tuple
+
+Coordinates = Tuple[int, int]
+
+
+def _half(dx: int, dy: int) -> int:
+    return 0 if dy > 0 or (dy == 0 and dx > 0) else 1
+
+
+def _compare_directions(a: Coordinates, b: Coordinates) -> int:
+    """
+    Exact counterclockwise comparison of two directions by angle in [0, 2pi)
+    """
+    half_a, half_b = _half(*a), _half(*b)
+    if half_a != half_b:
+        return half_a - half_b
+    cross = a[0] * b[1] - a[1] * b[0]
+    return -1 if cross > 0 else 1 if cross < 0 else 0
+
+
+def build_pslg(vertexes: List[Coordinates], faces: List[List[int]]) -> Dict[str, List[dict]]:
+    """
+    Builds a DCEL from faces given as counterclockwise cycles of vertex indices, the outer face is -1
+
+    :return: keyword arguments of `DCEL.__init__`
+    """
+    edges = []
+    edge_indices = {}
+    for face_index, cycle in enumerate(faces):
+        for i, v1 in enumerate(cycle):
+            v2 = cycle[(i + 1) % len(cycle)]
+            key = (min(v1, v2), max(v1, v2))
+            if key not in edge_indices:
+                edge_indices[key] = len(edges)
+                edges.append({'v1': v1, 'v2': v2, 'f1': face_index, 'f2': -1, 'p1': -1, 'p2': -1})
+            elif edges[edge_indices[key]]['v1'] == v1:
+                edges[edge_indices[key]]['f1'] = face_index
+            else:
+                edges[edge_indices[key]]['f2'] = face_index
+
+    incident_edges = [[] for _ in vertexes]
+    for edge_index, edge in enumerate(edges):
+        incident_edges[edge['v1']].append(edge_index)
+        incident_edges[edge['v2']].append(edge_index)
+    for vertex_index, edge_indices in enumerate(incident_edges):
+        x, y = vertexes[vertex_index]
+
+        def direction(edge_index: int) -> Coordinates:
+            edge = edges[edge_index]
+            other_x, other_y = vertexes[edge['v2'] if edge['v1'] == vertex_index else edge['v1']]
+            return other_x - x, other_y - y
+
+        edge_indices.sort(key=functools.cmp_to_key(lambda a, b: _compare_directions(direction(a), direction(b))))
+        for i, edge_index in enumerate(edge_indices):
+            next_edge_index = edge_indices[(i + 1) % len(edge_indices)]
+            edges[edge_index]['p1' if edges[edge_index]['v1'] == vertex_index else 'p2'] = next_edge_index
+    return {'vertexes': [{'x': x, 'y': y} for x, y in vertexes], 'edges': edges}
+
+
+def _grid_vertexes(columns: int, rows: int, step_x: int, step_y: int, jitter_x: int, jitter_y: int,
+                   rnd: random.Random) -> List[Coordinates]:
+    vertexes = []
+    for j in range(rows + 1):
+        for i in range(columns + 1):
+            dx = rnd.randint(-jitter_x, jitter_x) if 0 < i < columns else 0
+            dy = rnd.randint(-jitter_y, jitter_y) if 0 < j < rows else 0
+            vertexes.append((i * step_x + dx, j * step_y + dy))
+    return vertexes
+
+
+def _triangulate_grid(columns: int, rows: int, rnd: random.Random) -> List[List[int]]:
+    faces = []
+    for j in range(rows):
+        for i in range(columns):
+            a, b = j * (columns + 1) + i, j * (columns + 1) + i + 1
+            c, d = b + columns + 1, a + columns + 1
+            faces += [[a, b, c], [a, c, d]] if rnd.random() < 0.5 else [[a, b, d], [b, c, d]]
+    return faces
+
+
+def triangulation(size: int, rnd: random.Random) -> Dict[str, List[dict]]:
+    """
+    Jittered grid with a random diagonal in every cell, jitter below a quarter of the step keeps cells convex
+    """
+    return build_pslg(_grid_vertexes(size, size, 100, 100, 24, 24, rnd), _triangulate_grid(size, size, rnd))
+
+
+def grid(size: int, rnd: random.Random) -> Dict[str, List[dict]]:
+    """
+    Axis-aligned quadrilaterals: whole rows of vertices share y and half of the edges are horizontal
+    """
+    faces = [[j * (size + 1) + i, j * (size + 1) + i + 1, (j + 1) * (size + 1) + i + 1, (j + 1) * (size + 1) + i]
+             for j in range(size) for i in range(size)]
+    return build_pslg(_grid_vertexes(size, size, 100, 100, 0, 0, rnd), faces)
+
+
+def slivers(size: int, rnd: random.Random) -> Dict[str, List[dict]]:
+    """
+    Few rows of long thin triangles, cells are 1000 times taller than wide
+    """
+    rows = max(1, size // 100)
+    columns = size * size // rows
+    return build_pslg(_grid_vertexes(columns, rows, 10, 100000, 0, 24000, rnd), _triangulate_grid(columns, rows, rnd))
+
+
+def same_y(size: int, rnd: random.Random) -> Dict[str, List[dict]]:
+    """
+    Triangulation jittered only along x, so every row of vertices shares one y
+    """
+    return build_pslg(_grid_vertexes(size, size, 100, 100, 24, 0, rnd), _triangulate_grid(size, size, rnd))
+
+
+def horizontal(size: int, rnd: random.Random) -> Dict[str, List[dict]]:
+    """
+    Grid of wide cells whose bottom and top sides are chains of collinear horizontal edges
+    """
+    segments = 4
+    columns = max(1, size // segments)
+    width = columns * segments
+    vertexes = [(i * 25, j * 100) for j in range(size + 1) for i in range(width + 1)]
+    faces = []
+    for j in range(size):
+        for i in range(columns):
+            bottom = [j * (width + 1) + i * segments + k for k in range(segments + 1)]
+            top = [(j + 1) * (width + 1) + i * segments + k for k in range(segments + 1)]
+            faces.append(bottom + top[::-1])
+    return build_pslg(vertexes, faces)
+
+
+SHAPES: Dict[str, Callable[[int, random.Random], Dict[str, List[dict]]]] = {
+    'triangulation': triangulation,
+    'grid': grid,
+    'slivers': slivers,
+    'same_y': same_y,
+    'horizontal': horizontal,
+}
+
+
+def generate_pslg(shape: str, size: int, seed: int = 0) -> Dict[str, List[dict]]:
+    """
+    :param shape: one of `SHAPES`
+    :param size: number of cells along a side, the PSLG has about size^2 faces
+    """
+    return SHAPES[shape](size, random.Random(seed))
+
+
+def generate_points(pslg: Dict[str, List[dict]], count: int, seed: int = 0) -> List[dict]:
+    """
+    Random points in the bounding box with a margin, a tenth of them placed on vertexes and edge midpoints
+    """
+    rnd = random.Random(seed)
+    vertexes, edges = pslg['vertexes'], pslg['edges']
+    min_x, max_x = min(v['x'] for v in vertexes), max(v['x'] for v in vertexes)
+    min_y, max_y = min(v['y'] for v in vertexes), max(v['y'] for v in vertexes)
+    margin_x, margin_y = (max_x - min_x) // 20 + 1, (max_y - min_y) // 20 + 1
+    points = []
+    for i in range(count):
+        if i % 20 == 0:
+            points.append(dict(rnd.choice(vertexes)))
+        elif i % 20 == 1:
+            edge = rnd.choice(edges)
+            v1, v2 = vertexes[edge['v1']], vertexes[edge['v2']]
+            points.append({'x': (v1['x'] + v2['x']) // 2, 'y': (v1['y'] + v2['y']) // 2})
+        else:
+            points.append({'x': rnd.randint(min_x - margin_x, max_x + margin_x),
+                           'y': rnd.randint(min_y - margin_y, max_y + margin_y)})
+    return points
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Generate an input file with a synthetic PSLG')
+    parser.add_argument('shape', choices=SHAPES)
+    parser.add_argument('size', type=int, help='number of cells along a side')
+    parser.add_argument('-p', '--points', type=int, default=1000, help='number of query points')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='specify output file', required=True)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    pslg = generate_pslg(args.shape, args.size, args.seed)
+    with open(args.output, 'w') as output_file:
+        json.dump({'pslg': pslg, 'points': generate_points(pslg, args.points, args.seed)}, output_file)
@@ -0,0 +1,63 @@
+"""
+Compares the load time of the JSON input and of the binary columnar input written by `write_input`:
+reading the file, building the DCEL and getting the query points, which is everything main.py does before the build
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.generator import generate_pslg, generate_points
+from dcel import DCEL
+from slab.columnar import ColumnarInput, write_input
+
+
+def load_json(path: str):
+    with open(path) as input_file:
+        input_data = json.load(input_file)
+    dcel = DCEL(**input_data['pslg'])
+    xs = [point_dict['x'] for point_dict in input_data['points']]
+    ys = [point_dict['y'] for point_dict in input_data['points']]
+    return dcel, xs, ys
+
+
+def load_binary(path: str):
+    input_data = ColumnarInput(path)
+    return (input_data.get_dcel(), *input_data.get_points())
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare load times of the JSON and binary input formats')
+    parser.add_argument('--shape', default='triangulation', help='generated PSLG shape')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 300, 600], help='numbers of cells along a side')
+    parser.add_argument('--points', type=int, default=1000000, help='number of query points')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'size':>5} {'edges':>8} {'json_mb':>8} {'binary_mb':>10} {'json_s':>7} {'binary_s':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        json_path, binary_path = os.path.join(directory, 'in.json'), os.path.join(directory, 'in.bin')
+        for size in args.sizes:
+            pslg = generate_pslg(args.shape, size, args.seed)
+            points = generate_points(pslg, args.points, args.seed)
+            with open(json_path, 'w') as output_file:
+                json.dump({'pslg': pslg, 'points': points}, output_file)
+            write_input(binary_path, pslg, points)
+            del pslg, points
+
+            start = time.perf_counter()
+            json_dcel, json_xs, json_ys = load_json(json_path)
+            json_s = time.perf_counter() - start
+            start = time.perf_counter()
+            binary_dcel, binary_xs, binary_ys = load_binary(binary_path)
+            binary_s = time.perf_counter() - start
+            assert [tuple(vertex) for vertex in json_dcel.vertexes] == [tuple(vertex) for vertex in binary_dcel.vertexes]
+            assert list(binary_xs) == json_xs and list(binary_ys) == json_ys
+            print(f'{size:>5} {len(json_dcel.edges):>8} {os.path.getsize(json_path) / 2 ** 20:>8.1f} '
+                  f'{os.path.getsize(binary_path) / 2 ** 20:>10.1f} {json_s:>7.2f} {binary_s:>9.2f} '
+                  f'{json_s / binary_s:>7.1f}x')
+            del json_dcel, binary_dcel
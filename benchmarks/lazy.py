@@ -0,0 +1,64 @@
+"""
+Compares the eager build with lazy slabs when queries land in a window of the map: the startup time,
+the time of the first batch, which builds the queried chunks, and the tree nodes and index memory afterwards.
+Answers are checked against the eager build
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.generator import generate_pslg, generate_points
+from dcel import DCEL
+from slab import SearchSystem
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare the eager build with lazy slabs on windowed queries')
+    parser.add_argument('--shape', default='triangulation', help='generated PSLG shape')
+    parser.add_argument('--size', type=int, default=300, help='number of cells along a side')
+    parser.add_argument('--points', type=int, default=100000, help='number of query points')
+    parser.add_argument('--windows', type=float, nargs='+', default=[0.01, 0.1, 1.0],
+                        help='side of the query window as a fraction of the side of the map')
+    parser.add_argument('--chunks', type=int, nargs='+', default=[16, 64], help='lines per lazy chunk')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def get_window_points(pslg: dict, count: int, window: float, seed: int):
+    """
+    Query points of the window in the middle of the map, scaled from points of the whole map
+    """
+    points = generate_points(pslg, count, seed)
+    xs = np.array([point['x'] for point in points], dtype=np.int64)
+    ys = np.array([point['y'] for point in points], dtype=np.int64)
+    scaled = []
+    for values in (xs, ys):
+        low, high = int(values.min()), int(values.max())
+        middle = (low + high) // 2
+        scaled.append(middle + ((values - middle) * window).astype(np.int64))
+    return scaled
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    pslg = generate_pslg(args.shape, args.size, args.seed)
+    dcel = DCEL(**pslg)
+    print(f'{len(dcel.edges)} edges')
+    print(f"{'window':>7} {'build':<9} {'startup_s':>10} {'first_batch_s':>14} {'nodes':>9} {'index_mb':>9}")
+    for window in args.windows:
+        xs, ys = get_window_points(pslg, args.points, window, args.seed)
+        expected = None
+        for chunk in [None] + args.chunks:
+            start = time.perf_counter()
+            search_system = SearchSystem(dcel, lazy_chunk=chunk)
+            startup_s = time.perf_counter() - start
+            start = time.perf_counter()
+            faces = search_system.locate_points(xs, ys)
+            batch_s = time.perf_counter() - start
+            if expected is None:
+                expected = faces
+            assert np.array_equal(faces, expected)
+            name = 'eager' if chunk is None else f'lazy/{chunk}'
+            print(f'{window:>7.2f} {name:<9} {startup_s:>10.2f} {batch_s:>14.2f} {len(search_system.index.tree):>9} '
+                  f'{search_system.index.nbytes / 2 ** 20:>9.1f}')
@@ -0,0 +1,42 @@
+"""
+Measures the parallel build of the slabs: build time and tree nodes per number of workers,
+answers are checked against the sequential build
+"""
+import argparse
+import os
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from benchmarks.run import best_time
+from dcel import DCEL
+from slab import SearchSystem
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare sequential and parallel builds of the slabs')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=['triangulation', 'grid'])
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--persistence', choices=list(SearchSystem.persistence_modes), default='path_copying')
+    parser.add_argument('--queries', type=int, default=20000, help='number of points to check answers with')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best time is reported')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f'cores: {os.cpu_count()}')
+    print(f"{'shape':<14} {'workers':>7} {'build_s':>8} {'speedup':>8} {'nodes':>9} {'mismatches':>11}")
+    for shape in args.shapes:
+        pslg = generate_pslg(shape, args.size)
+        dcel = DCEL(**pslg)
+        points = generate_points(pslg, args.queries)
+        xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+        expected = SearchSystem(dcel, args.persistence).locate_points(xs, ys)
+        sequential_time = None
+        for workers in args.workers:
+            build_time = best_time(lambda: SearchSystem(dcel, args.persistence, workers), args.repeat)
+            sequential_time = sequential_time or build_time
+            search_system = SearchSystem(dcel, args.persistence, workers)
+            mismatches = int((search_system.locate_points(xs, ys) != expected).sum())
+            print(f'{shape:<14} {workers:>7} {build_time:>8.3f} {sequential_time / build_time:>7.2f}x '
+                  f'{len(search_system.frozen):>9} {mismatches:>11}')
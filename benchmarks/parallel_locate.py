@@ -0,0 +1,44 @@
+"""
+Measures batch point location over a process pool: locate time and speedup per number of workers,
+answers are checked against the serial batch search. The speedup is bounded by the number of cores
+"""
+import argparse
+import os
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from benchmarks.run import best_time
+from dcel import DCEL
+from slab import SearchSystem
+from slab.parallel import ParallelLocator
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare serial and parallel batch point location')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=['triangulation', 'grid'])
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--queries', type=int, default=1000000, help='number of points located in a batch')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best time is reported')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f'cores: {os.cpu_count()}')
+    print(f"{'shape':<14} {'workers':>7} {'locate_s':>9} {'speedup':>8} {'points_s':>10} {'mismatches':>11}")
+    for shape in args.shapes:
+        pslg = generate_pslg(shape, args.size)
+        index = SearchSystem(DCEL(**pslg)).index
+        points = generate_points(pslg, args.queries)
+        xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+        expected = index.locate_points(xs, ys)
+        serial_time = None
+        for workers in args.workers:
+            with ParallelLocator(index, workers) as locator:
+                # the pool is started by the first batch, so it is not timed
+                faces = locator.locate_points(xs, ys)
+                locate_time = best_time(lambda: locator.locate_points(xs, ys), args.repeat)
+            serial_time = serial_time or locate_time
+            mismatches = int((faces != expected).sum())
+            print(f'{shape:<14} {workers:>7} {locate_time:>9.3f} {serial_time / locate_time:>7.2f}x '
+                  f'{len(xs) / locate_time:>10.0f} {mismatches:>11}')
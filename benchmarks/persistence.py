@@ -0,0 +1,39 @@
+"""
+Compares path copying and node copying persistence: tree nodes, build time, peak memory of the build,
+while all nodes are alive, and memory of the frozen tree
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.generator import SHAPES, generate_pslg
+from benchmarks.run import TimedSearchSystem
+from dcel import DCEL
+from slab import SearchSystem
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare persistence modes of the tree')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=list(SHAPES))
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best time is reported')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'shape':<14} {'persistence':<13} {'nodes':>9} {'sweep_s':>9} {'freeze_s':>9} "
+          f"{'build_MB':>9} {'frozen_MB':>10}")
+    for shape in args.shapes:
+        pslg = generate_pslg(shape, args.size)
+        dcel = DCEL(**pslg)
+        for persistence in SearchSystem.persistence_modes:
+            search_systems = [TimedSearchSystem(dcel, persistence) for _ in range(args.repeat)]
+            tracemalloc.start()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            search_system = SearchSystem(dcel, persistence)
+            build_memory = tracemalloc.get_traced_memory()[1] - start_memory
+            tracemalloc.stop()
+            print(f'{shape:<14} {persistence:<13} {len(search_system.frozen):>9} '
+                  f'{min(s.sweep_time for s in search_systems):>9.3f} '
+                  f'{min(s.freeze_time for s in search_systems):>9.3f} '
+                  f'{build_memory / 2 ** 20:>9.1f} {search_system.frozen.nbytes / 2 ** 20:>10.2f}')
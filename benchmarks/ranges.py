@@ -0,0 +1,59 @@
+"""
+Compares `SearchSystem.get_segment_faces` with locating points sampled along the segment by `locate_points`,
+the way faces crossed by a segment were found before. Reports the time per segment, the number of faces found
+and how many faces the sampling misses
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks.generator import generate_pslg
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare segment queries with sampling along the segment')
+    parser.add_argument('--shapes', nargs='+', default=['triangulation', 'grid'], help='generated PSLG shapes')
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--segments', type=int, default=200, help='number of segments per length')
+    parser.add_argument('--samples', type=int, nargs='+', default=[100, 1000], help='points sampled per segment')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'shape':<14} {'length':>7} {'faces':>7} {'segment_us':>11} "
+          + ' '.join(f"{f'sampled_{samples}_us':>18} {f'missed_{samples}':>11}" for samples in args.samples))
+    for shape in args.shapes:
+        pslg = generate_pslg(shape, args.size, args.seed)
+        search_system = SearchSystem(DCEL(**pslg))
+        min_x, max_x = min(v['x'] for v in pslg['vertexes']), max(v['x'] for v in pslg['vertexes'])
+        min_y, max_y = min(v['y'] for v in pslg['vertexes']), max(v['y'] for v in pslg['vertexes'])
+        rnd = random.Random(args.seed)
+        for fraction in (0.01, 0.1, 1.0):
+            segments = []
+            for _ in range(args.segments):
+                start = Point(rnd.randint(min_x, max_x), rnd.randint(min_y, max_y))
+                dx = int((rnd.random() * 2 - 1) * (max_x - min_x) * fraction)
+                dy = int((rnd.random() * 2 - 1) * (max_y - min_y) * fraction)
+                segments.append((start, Point(start.x + dx, start.y + dy)))
+
+            start_time = time.perf_counter()
+            found = [search_system.get_segment_faces(start, end) for start, end in segments]
+            segment_us = (time.perf_counter() - start_time) / len(segments) * 1e6
+            line = f'{shape:<14} {fraction:>7} {sum(map(len, found)) / len(found):>7.1f} {segment_us:>11.0f}'
+
+            for samples in args.samples:
+                t = np.linspace(0, 1, samples)
+                start_time = time.perf_counter()
+                sampled = [set(search_system.locate_points(np.rint(start.x + (end.x - start.x) * t).astype(np.int64),
+                                                           np.rint(start.y + (end.y - start.y) * t).astype(np.int64))
+                               .tolist()) for start, end in segments]
+                sampled_us = (time.perf_counter() - start_time) / len(segments) * 1e6
+                missed = sum(len(set(faces) - faces_sampled) for faces, faces_sampled in zip(found, sampled))
+                line += f' {sampled_us:>18.0f} {missed:>11}'
+            print(line)
@@ -0,0 +1,121 @@
+"""
+Benchmark suite: times DCEL construction, the slab sweep and point location on synthetic PSLGs.
+Results can be saved as JSON and compared with the results of another commit.
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+# metrics where a larger value is better, all others are times
+HIGHER_IS_BETTER = {'batch_points_per_s'}
+
+
+class TimedSearchSystem(SearchSystem):
+    sweep_time: float
+    freeze_time: float
+
+    def _init_slabs(self):
+        start = time.perf_counter()
+        super()._init_slabs()
+        self.sweep_time = time.perf_counter() - start
+
+    def _freeze(self):
+        start = time.perf_counter()
+        frozen = super()._freeze()
+        self.freeze_time = time.perf_counter() - start
+        return frozen
+
+
+def best_time(function: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def benchmark_shape(shape: str, size: int, queries: int, latency_queries: int, repeat: int) -> Dict[str, float]:
+    pslg = generate_pslg(shape, size)
+    points = generate_points(pslg, queries)
+    xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+
+    dcel_time = best_time(lambda: DCEL(**pslg), repeat)
+    search_systems = [TimedSearchSystem(DCEL(**pslg)) for _ in range(repeat)]
+    search_system = search_systems[0]
+    search_system.locate_points(xs[:1], ys[:1])
+    batch_time = best_time(lambda: search_system.locate_points(xs, ys), repeat)
+
+    latencies = []
+    for point in map(lambda point_dict: Point(**point_dict), points[:latency_queries]):
+        start = time.perf_counter()
+        search_system.locate_point(point)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    return {
+        'vertexes': len(pslg['vertexes']),
+        'edges': len(pslg['edges']),
+        'nodes': len(search_system.frozen),
+        'dcel_s': dcel_time,
+        'sweep_s': min(s.sweep_time for s in search_systems),
+        'freeze_s': min(s.freeze_time for s in search_systems),
+        'batch_points_per_s': len(points) / batch_time,
+        'latency_p50_us': percentile(latencies, 0.5) * 1e6,
+        'latency_p90_us': percentile(latencies, 0.9) * 1e6,
+        'latency_p99_us': percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def print_report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float):
+    regressions = []
+    for shape, metrics in results.items():
+        print(f'{shape}')
+        for name, value in metrics.items():
+            line = f'  {name:<20} {value:>14.6g}'
+            if baseline and name in baseline.get(shape, {}) and baseline[shape][name]:
+                change = value / baseline[shape][name] - 1
+                line += f'  {change:+8.1%}'
+                worse = -change if name in HIGHER_IS_BETTER else change
+                if name.endswith(('_s', '_us', '_per_s')) and worse > threshold:
+                    line += '  REGRESSION'
+                    regressions.append(f'{shape}.{name}')
+            print(line)
+    if baseline:
+        print(f"regressions: {', '.join(regressions) if regressions else 'none'}")
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=list(SHAPES))
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--queries', type=int, default=100000, help='number of points located in a batch')
+    parser.add_argument('--latency-queries', type=int, default=10000, help='number of points timed one by one')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs, the best time is reported')
+    parser.add_argument('--json', help='save results to file')
+    parser.add_argument('--compare', help='compare with results saved by --json')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown reported as a regression')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    results = {shape: benchmark_shape(shape, args.size, args.queries, args.latency_queries, args.repeat)
+               for shape in args.shapes}
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(results, baseline, args.threshold)
+    if args.json:
+        with open(args.json, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
@@ -0,0 +1,102 @@
+"""
+Load generator for the locate service: starts `server.py` on a Unix socket, keeps a number of clients
+sending small locate requests in a closed loop and reports latency percentiles and throughput,
+with and without coalescing of concurrent requests
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+
+SERVER = Path(__file__).resolve().parent.parent / 'server.py'
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: dict) -> dict:
+    writer.write(json.dumps(request).encode() + b'\n')
+    response = json.loads(await reader.readline())
+    if 'error' in response:
+        raise Exception(response['error'])
+    return response
+
+
+async def _client(path: str, key: str, points: List[dict], size: int, deadline: float, latencies: List[float]):
+    reader, writer = await asyncio.open_unix_connection(path, limit=2 ** 28)
+    position = 0
+    while time.perf_counter() < deadline:
+        batch = points[position:position + size]
+        position = (position + size) % (len(points) - size)
+        start = time.perf_counter()
+        await _request(reader, writer, {'op': 'locate', 'key': key, 'points': batch})
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def _run(path: str, pslg: dict, points: List[dict], args) -> dict:
+    reader, writer = await asyncio.open_unix_connection(path, limit=2 ** 28)
+    key = (await _request(reader, writer, {'op': 'load', 'pslg': pslg}))['key']
+    await _request(reader, writer, {'op': 'locate', 'key': key, 'points': points[:args.request_points]})
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(path, key, points, args.request_points, start + args.duration, latencies)
+                           for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    stats = await _request(reader, writer, {'op': 'stats'})
+    writer.close()
+    return {
+        'p50_ms': np.percentile(latencies, 50) * 1000,
+        'p99_ms': np.percentile(latencies, 99) * 1000,
+        'requests_s': len(latencies) / elapsed,
+        'points_s': len(latencies) * args.request_points / elapsed,
+        'batch_points': stats['points'] / stats['batches'],
+    }
+
+
+def run_server(pslg: dict, points: List[dict], coalesce_points: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'slab.sock')
+        server = subprocess.Popen([sys.executable, str(SERVER), '--unix', path,
+                                   '--coalesce-points', str(coalesce_points),
+                                   '--coalesce-delay', str(args.coalesce_delay)])
+        try:
+            while not os.path.exists(path):
+                if server.poll() is not None:
+                    raise Exception('server exited')
+                time.sleep(0.01)
+            return asyncio.run(_run(path, pslg, points, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Measure latency and throughput of the locate service')
+    parser.add_argument('--shape', choices=SHAPES, default='triangulation')
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 64], help='numbers of concurrent clients')
+    parser.add_argument('--request-points', type=int, default=16, help='number of points per request')
+    parser.add_argument('--coalesce-delay', type=float, default=1, help='milliseconds, as in server.py')
+    parser.add_argument('--duration', type=float, default=5, help='seconds of load per run')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    pslg = generate_pslg(args.shape, args.size)
+    points = generate_points(pslg, 100000)
+    clients = args.clients
+    print(f"{'clients':>7} {'coalesce':>9} {'p50_ms':>8} {'p99_ms':>8} {'req/s':>9} {'pts/s':>10} {'batch_pts':>10}")
+    for args.clients in clients:
+        for coalesce_points in (0, 1024):
+            result = run_server(pslg, points, coalesce_points, args)
+            print(f"{args.clients:>7} {coalesce_points:>9} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                  f"{result['requests_s']:>9.0f} {result['points_s']:>10.0f} {result['batch_points']:>10.1f}")
@@ -0,0 +1,113 @@
+"""
+Measures incremental updates of the index against a full rebuild: every update removes an inner edge
+merging its two faces and the next one puts it back, answers are checked against a rebuilt index
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.generator import SHAPES, generate_pslg, generate_points
+from dcel import DCEL, Edge
+from slab import SearchSystem
+
+
+def edge_dict(edge: Edge) -> dict:
+    return {'v1': edge.v1, 'v2': edge.v2, 'f1': edge.f1, 'f2': edge.f2, 'p1': edge.p1, 'p2': edge.p2}
+
+
+def _previous_edge_index(dcel: DCEL, vertex_index: int, edge_index: int) -> int:
+    """
+    Edge whose pointer around the vertex points on the given edge
+    """
+    previous_edge_index = edge_index
+    while True:
+        edge = dcel.edges[previous_edge_index]
+        next_edge_index = edge.p1 if edge.v1 == vertex_index else edge.p2
+        if next_edge_index == edge_index:
+            return previous_edge_index
+        previous_edge_index = next_edge_index
+
+
+def delete_edge_diff(dcel: DCEL, edge_index: int) -> Dict[int, Optional[dict]]:
+    """
+    Diff that deletes an edge between two faces, the face on the right is merged into the face on the left
+    """
+    edge = dcel.edges[edge_index]
+    diff = {edge_index: None}
+    for vertex_index, next_edge_index in ((edge.v1, edge.p1), (edge.v2, edge.p2)):
+        previous_edge_index = _previous_edge_index(dcel, vertex_index, edge_index)
+        previous_edge = diff.setdefault(previous_edge_index, edge_dict(dcel.edges[previous_edge_index]))
+        previous_edge['p1' if previous_edge['v1'] == vertex_index else 'p2'] = next_edge_index
+    for other_index, other in enumerate(dcel.edges):
+        if other is not None and other_index != edge_index and edge.f2 in (other.f1, other.f2):
+            other = diff.setdefault(other_index, edge_dict(other))
+            other['f1' if other['f1'] == edge.f2 else 'f2'] = edge.f1
+    return diff
+
+
+def compact(dcel: DCEL) -> Dict[str, List[dict]]:
+    """
+    Arguments of `DCEL.__init__` for the same graph without the slots of deleted edges
+    """
+    edge_indices = {}
+    for edge_index, edge in enumerate(dcel.edges):
+        if edge is not None:
+            edge_indices[edge_index] = len(edge_indices)
+    edges = []
+    for edge_index in edge_indices:
+        edge = edge_dict(dcel.edges[edge_index])
+        edge['p1'], edge['p2'] = edge_indices[edge['p1']], edge_indices[edge['p2']]
+        edges.append(edge)
+    return {'vertexes': [{'x': vertex.x, 'y': vertex.y} for vertex in dcel.vertexes], 'edges': edges}
+
+
+def _degree(dcel: DCEL, vertex_index: int) -> int:
+    return sum(1 for _ in dcel.get_incident_edges_for_vertex(vertex_index))
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Compare incremental updates with a full rebuild')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=['triangulation', 'grid'])
+    parser.add_argument('--size', type=int, default=100, help='number of cells along a side')
+    parser.add_argument('--updates', type=int, default=20, help='number of removed edges, each is put back')
+    parser.add_argument('--queries', type=int, default=20000, help='number of points to check answers with')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    print(f"{'shape':<14} {'bands':>7} {'rebuild_ms':>11} {'update_ms':>10} {'speedup':>8} "
+          f"{'bands_replayed':>15} {'mismatches':>11}")
+    for shape in args.shapes:
+        pslg = generate_pslg(shape, args.size)
+        points = generate_points(pslg, args.queries, args.seed)
+        xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+        search_system = SearchSystem(DCEL(**pslg), updatable=True)
+        dcel = search_system.dcel
+        candidates = [edge_index for edge_index, edge in enumerate(dcel.edges)
+                      if -1 not in (edge.f1, edge.f2) and edge.f1 != edge.f2
+                      and _degree(dcel, edge.v1) > 2 and _degree(dcel, edge.v2) > 2]
+        rnd = random.Random(args.seed)
+        update_times, rebuild_times, replayed, mismatches = [], [], [], 0
+        for edge_index in rnd.sample(candidates, min(args.updates, len(candidates))):
+            diff = delete_edge_diff(dcel, edge_index)
+            restore = {index: edge_dict(dcel.edges[index]) for index in diff}
+            for step in (diff, restore):
+                versions_count = len(search_system.tree.roots)
+                start = time.perf_counter()
+                search_system.update(edges=step)
+                update_times.append(time.perf_counter() - start)
+                replayed.append(len(search_system.tree.roots) - versions_count - 1)
+
+                rebuild_input = compact(dcel)
+                start = time.perf_counter()
+                rebuilt = SearchSystem(DCEL(**rebuild_input))
+                rebuild_times.append(time.perf_counter() - start)
+                mismatches += int((search_system.locate_points(xs, ys) != rebuilt.locate_points(xs, ys)).sum())
+        rebuild_ms = statistics.median(rebuild_times) * 1000
+        update_ms = statistics.median(update_times) * 1000
+        print(f'{shape:<14} {len(search_system.lines):>7} {rebuild_ms:>11.1f} {update_ms:>10.2f} '
+              f'{rebuild_ms / update_ms:>7.0f}x {statistics.median(replayed):>15.0f} {mismatches:>11}')
@@ -0,0 +1,18 @@
+import argparse
+import json
+
+from slab.columnar import write_input
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Convert a JSON input file into the binary columnar format')
+    parser.add_argument('-i', '--input', help='specify JSON input file', required=True)
+    parser.add_argument('-o', '--output', help='specify binary output file', required=True)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    with open(args.input) as input_file:
+        input_data = json.load(input_file)
+    write_input(args.output, input_data['pslg'], input_data['points'])
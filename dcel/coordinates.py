@@ -0,0 +1,75 @@
+import math
+from fractions import Fraction
+from numbers import Rational
+from typing import Iterable, Sequence, Type, Union
+
+import numpy as np
+
+Coordinate = Union[int, float, Fraction]
+
+# integers up to this magnitude are exact doubles
+FLOAT_EXACT_LIMIT = 2 ** 53
+
+
+def is_float_exact(value: Coordinate) -> bool:
+    """
+    Whether the value is a double or can be turned into one without rounding
+    """
+    if isinstance(value, float):
+        return True
+    if isinstance(value, int):
+        return abs(value) <= FLOAT_EXACT_LIMIT
+    return Fraction(float(value)) == value
+
+
+def get_coordinate_type(values: Iterable[Coordinate]) -> Type[Coordinate]:
+    """
+    Common type of coordinates that keeps all of them exact: `int` if they are integers, `float` if all of them
+    are doubles or convert to doubles without rounding, `Fraction` otherwise
+    """
+    values = list(values)
+    if all(type(value) is int for value in values):
+        return int
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (Rational, float)):
+            raise Exception('Incorrect graph: coordinates must be integers, floats or fractions')
+        if isinstance(value, float) and not math.isfinite(value):
+            raise Exception('Incorrect graph: coordinates must be finite')
+    if all(isinstance(value, int) for value in values):
+        return int
+    if all(is_float_exact(value) for value in values):
+        return float
+    return Fraction
+
+
+def convert_coordinate(value: Coordinate, coordinate_type: Type[Coordinate]) -> Coordinate:
+    """
+    Converts a coordinate to the type given by `get_coordinate_type`, the value must stay exact
+    """
+    if type(value) is coordinate_type:
+        return value
+    converted = Fraction(value) if coordinate_type is Fraction else coordinate_type(value)
+    if converted != value:
+        raise Exception(f'Incorrect graph: coordinate {value} is not exact as {coordinate_type.__name__}')
+    return converted
+
+
+def get_coordinate_array(values: Sequence[Coordinate]) -> np.ndarray:
+    """
+    Coordinates as an int64 or float64 array if they are exact in it,
+    otherwise as an object array of integers and fractions
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in 'iu' and array.dtype != np.uint64:
+        return array.astype(np.int64, copy=False)
+    if array.dtype.kind == 'f':
+        if array.dtype == np.float64 and (isinstance(values, np.ndarray) or
+                                          all(not isinstance(value, int) or abs(value) <= FLOAT_EXACT_LIMIT
+                                              for value in values)):
+            return array
+        if array.dtype.itemsize < 8 and isinstance(values, np.ndarray):
+            return array.astype(np.float64)
+    values = array.tolist() if isinstance(values, np.ndarray) else values
+    if all(is_float_exact(value) for value in values):
+        return np.array([float(value) for value in values], dtype=np.float64)
+    return np.array([value if isinstance(value, int) else Fraction(value) for value in values], dtype=object)
@@ -1,52 +1,230 @@
-from typing import Iterable, List
+import gc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
 
+import numpy as np
+
+from .coordinates import Coordinate, convert_coordinate, get_coordinate_array, get_coordinate_type
 from .edge import Edge
 from .point import Point
+from .validation import validate_edges
+
+EDGE_FIELDS = ('v1', 'v2', 'f1', 'f2', 'p1', 'p2')
+
+
+@contextmanager
+def _paused_gc() -> Iterator[None]:
+    """
+    Pauses the cyclic garbage collector while many objects without cycles are created,
+    otherwise the collections triggered by the allocations scan the growing graph again and again
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
 
 class DCEL:
     vertexes: List[Point]
-    edges: List[Edge]
+    edges: List[Optional[Edge]]
     incident_edge_indices: List[int]
+    coordinate_type: Type[Coordinate]
+
+    def __init__(self, vertexes: List[dict], edges: List[dict], stats=None):
+        """
+        Coordinates may be integers, floats or fractions, they are all converted to the one type that keeps
+        them exact, see `get_coordinate_type`
+
+        :param stats: object with a `phase(name)` context manager that times the build phases, e.g. `slab.Stats`
+        """
+        with stats.phase('dcel_parsing') if stats is not None else nullcontext():
+            xs = [vertex_dict['x'] for vertex_dict in vertexes]
+            ys = [vertex_dict['y'] for vertex_dict in vertexes]
+            columns = [[edge_dict[field] for edge_dict in edges] for field in EDGE_FIELDS]
+        self._init_columns(xs, ys, *columns, stats=stats)
+
+    @classmethod
+    def from_columns(cls, xs: Sequence[Coordinate], ys: Sequence[Coordinate], v1: Sequence[int], v2: Sequence[int],
+                     f1: Sequence[int], f2: Sequence[int], p1: Sequence[int], p2: Sequence[int],
+                     stats=None) -> 'DCEL':
+        """
+        Builds the same graph as `__init__` from one sequence per field, e.g. typed arrays of a binary file,
+        without a dict per vertex and edge
+        """
+        dcel = cls.__new__(cls)
+        dcel._init_columns(xs, ys, v1, v2, f1, f2, p1, p2, stats=stats)
+        return dcel
+
+    def _init_columns(self, xs: Sequence[Coordinate], ys: Sequence[Coordinate], *edge_columns: Sequence[int],
+                      stats=None):
+        """
+        Validates the edge table by `validate_edges` before any edge is created, then orients the edges,
+        computes their lines and picks the incident edges of the vertexes in vectorized passes over the columns
+        """
+        with stats.phase('dcel_parsing') if stats is not None else nullcontext(), _paused_gc():
+            xs, ys = (column.tolist() if hasattr(column, 'tolist') else list(column) for column in (xs, ys))
+            self.coordinate_type = get_coordinate_type(xs + ys)
+            self.vertexes = list(map(Point, xs, ys))
+            if self.coordinate_type is not int:
+                self._convert_coordinates(self.vertexes)
+            v1, v2, f1, f2, p1, p2 = (self._get_index_column(field, column)
+                                      for field, column in zip(EDGE_FIELDS, edge_columns))
+        with stats.phase('validation') if stats is not None else nullcontext():
+            validate_edges(len(self.vertexes), v1, v2, f1, f2, p1, p2)
+        with stats.phase('dcel_parsing') if stats is not None else nullcontext(), _paused_gc():
+            self.edges = self._create_edges(v1, v2, f1, f2, p1, p2)
+        with stats.phase('incident_edges') if stats is not None else nullcontext():
+            self._init_incident_edge_indices(v1, v2)
+
+    @staticmethod
+    def _get_index_column(field: str, column: Sequence[int]) -> np.ndarray:
+        column = np.asarray(column)
+        if len(column) and column.dtype.kind not in 'iu':
+            raise Exception(f'Incorrect graph: {field} of edges must be integers')
+        return column.astype(np.int64)
+
+    def _get_coordinate_columns(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Coordinates as NumPy arrays in which the products of two coordinates are exact
+        """
+        xs, ys = (get_coordinate_array([getattr(vertex, name) for vertex in self.vertexes]) for name in ('x', 'y'))
+        if xs.dtype == np.int64 and len(xs) and max(-xs.min(), xs.max(), -ys.min(), ys.max()) >= 2 ** 31:
+            xs, ys = xs.astype(object), ys.astype(object)
+        return xs, ys
 
-    def __init__(self, vertexes: List[dict], edges: List[dict]):
-        self.vertexes = [Point(**vertex_dict) for vertex_dict in vertexes]
-        self.incident_edge_indices = [-1 for _ in range(len(self.vertexes))]
-        self.edges = [self._init_edge(edge_dict) for edge_dict in edges]
-        self._init_incident_edge_indices()
+    def _create_edges(self, v1: np.ndarray, v2: np.ndarray, f1: np.ndarray, f2: np.ndarray, p1: np.ndarray,
+                      p2: np.ndarray) -> List[Edge]:
+        """
+        Same edges as `_init_edge` gives: every edge goes up, and its line coefficients are set
+        """
+        xs, ys = self._get_coordinate_columns()
+        rotate = ys[v1] > ys[v2]
+        v1, v2 = np.where(rotate, v2, v1), np.where(rotate, v1, v2)
+        f1, f2 = np.where(rotate, f2, f1), np.where(rotate, f1, f2)
+        p1, p2 = np.where(rotate, p2, p1), np.where(rotate, p1, p2)
+        x1, y1, x2, y2 = xs[v1], ys[v1], xs[v2], ys[v2]
+        columns = (v1, v2, f1, f2, p1, p2, y1 - y2, x2 - x1, x1 * y2 - y1 * x2)
+        return list(map(Edge, *(column.tolist() for column in columns)))
+
+    def _convert_coordinates(self, vertexes: List[Point]):
+        for vertex in vertexes:
+            vertex.x = convert_coordinate(vertex.x, self.coordinate_type)
+            vertex.y = convert_coordinate(vertex.y, self.coordinate_type)
 
     def _init_edge(self, edge_dict: dict) -> Edge:
-        edge = Edge(**edge_dict)
+        return self._orient_edge(Edge(**edge_dict))
+
+    def _orient_edge(self, edge: Edge) -> Edge:
         if self.vertexes[edge.v1].y > self.vertexes[edge.v2].y:
             edge.rotate180()
+        edge.set_line(self.vertexes[edge.v1], self.vertexes[edge.v2])
         return edge
 
-    def _init_incident_edge_indices(self):
-        for edge_index, edge in enumerate(self.edges):
-            for v in ['v1', 'v2']:
-                vertex_index = getattr(edge, v)
-                if self.incident_edge_indices[vertex_index] == -1:
-                    self.incident_edge_indices[vertex_index] = edge_index
-                else:
-                    incident_edge = self.edges[self.incident_edge_indices[vertex_index]]
-                    adjacent_vertex_index = incident_edge.v2 if incident_edge.v1 == vertex_index else incident_edge.v1
-                    new_adjacent_vertex_index = edge.v2 if v == 'v1' else edge.v1
-                    if self.vertexes[new_adjacent_vertex_index].x < self.vertexes[adjacent_vertex_index].x:
-                        self.incident_edge_indices[vertex_index] = edge_index
-        if -1 in self.incident_edge_indices:
+    def _init_incident_edge_indices(self, v1: np.ndarray, v2: np.ndarray):
+        """
+        The incident edge of a vertex is the one to the adjacent vertex with the least x,
+        the first such edge on ties. Ends of all edges are sorted by vertex, by the x rank and by edge at once
+        """
+        xs = get_coordinate_array([vertex.x for vertex in self.vertexes])
+        order = np.argsort(xs, kind='stable')
+        is_new = np.ones(len(xs), dtype=bool)
+        is_new[1:] = xs[order[1:]] != xs[order[:-1]]
+        x_ranks = np.empty(len(xs), dtype=np.int64)
+        x_ranks[order] = np.cumsum(is_new) - 1
+
+        vertexes, adjacent_vertexes = np.concatenate((v1, v2)), np.concatenate((v2, v1))
+        edge_indices = np.concatenate((np.arange(len(v1)), np.arange(len(v1))))
+        ends = np.lexsort((edge_indices, x_ranks[adjacent_vertexes], vertexes))
+        is_first = np.ones(len(ends), dtype=bool)
+        is_first[1:] = vertexes[ends[1:]] != vertexes[ends[:-1]]
+        first_ends = ends[is_first]
+        incident_edge_indices = np.full(len(xs), -1, dtype=np.int64)
+        incident_edge_indices[vertexes[first_ends]] = edge_indices[first_ends]
+        self.incident_edge_indices = incident_edge_indices.tolist()
+
+    def _update_incident_edge_index(self, vertex_index: int, edge_indices: Iterable[int]):
+        """
+        Picks the incident edge of a vertex by the same rule as `_init_incident_edge_indices`,
+        the rotation around the vertex is walked from any of the given edges that is still incident to it
+        """
+        for edge_index in edge_indices:
+            edge = self.edges[edge_index]
+            if edge is not None and vertex_index in (edge.v1, edge.v2):
+                break
+        else:
+            raise Exception('Incorrect graph: vertex without incident edges')
+        first_edge_index = best_edge_index = edge_index
+        best_x = None
+        for _ in range(len(self.edges) + 1):
+            edge = self.edges[edge_index]
+            adjacent_vertex_index = edge.v2 if edge.v1 == vertex_index else edge.v1
+            if best_x is None or self.vertexes[adjacent_vertex_index].x < best_x:
+                best_x, best_edge_index = self.vertexes[adjacent_vertex_index].x, edge_index
+            next_edge_index = edge.p1 if edge.v1 == vertex_index else edge.p2
+            if next_edge_index == first_edge_index:
+                break
+            next_edge = self.edges[next_edge_index]
+            if next_edge is None or vertex_index not in (next_edge.v1, next_edge.v2):
+                raise Exception(f'Incorrect graph: pointer of edge {edge_index} leaves vertex {vertex_index}')
+            edge_index = next_edge_index
+        else:
+            raise Exception(f'Incorrect graph: edges around vertex {vertex_index} do not form a closed cycle')
+        self.incident_edge_indices[vertex_index] = best_edge_index
+
+    def update(self, vertexes: List[dict],
+               edges: Dict[int, Optional[dict]]) -> List[Tuple[Optional[Edge], Optional[Edge]]]:
+        """
+        Applies a diff to the graph: appends vertexes and replaces, appends or deletes edges by index.
+        A deleted edge leaves None in `edges`, so the pointers of all other edges stay valid.
+        An edge that keeps its endpoints is changed in place and keeps its identity
+
+        :param vertexes: new vertexes, they get indices from `len(self.vertexes)` on,
+                         their coordinates must be exact in the coordinate type of the graph
+        :param edges: new edge per index, None deletes the edge, indices past the end append edges
+        :return: pairs of removed and added edge for every edge whose endpoints changed, None for no edge
+        """
+        new_vertexes = [Point(**vertex_dict) for vertex_dict in vertexes]
+        get_coordinate_type(coordinate for vertex in new_vertexes for coordinate in vertex)
+        self._convert_coordinates(new_vertexes)
+        self.vertexes += new_vertexes
+        self.incident_edge_indices += [-1] * len(vertexes)
+        if edges:
+            self.edges += [None] * (max(edges) + 1 - len(self.edges))
+        moved = []
+        touched_vertexes = {}
+        for edge_index, edge_dict in edges.items():
+            old_edge = self.edges[edge_index]
+            new_edge = self._init_edge(edge_dict) if edge_dict is not None else None
+            if old_edge is not None and new_edge is not None and \
+                    (old_edge.v1, old_edge.v2) == (new_edge.v1, new_edge.v2):
+                old_edge.f1, old_edge.f2, old_edge.p1, old_edge.p2 = new_edge.f1, new_edge.f2, new_edge.p1, new_edge.p2
+            elif old_edge is not None or new_edge is not None:
+                self.edges[edge_index] = new_edge
+                moved.append((old_edge, new_edge))
+            for edge in (old_edge, new_edge):
+                if edge is not None:
+                    touched_vertexes.setdefault(edge.v1, []).append(edge_index)
+                    touched_vertexes.setdefault(edge.v2, []).append(edge_index)
+        for vertex_index, edge_indices in touched_vertexes.items():
+            if self.incident_edge_indices[vertex_index] != -1:
+                edge_indices.append(self.incident_edge_indices[vertex_index])
+            self._update_incident_edge_index(vertex_index, edge_indices)
+        if -1 in self.incident_edge_indices[len(self.vertexes) - len(vertexes):]:
             raise Exception('Incorrect graph: vertex without incident edges')
+        return moved
 
     def get_incident_edges_for_vertex(self, vertex_index: int) -> Iterable[Edge]:
+        """
+        Edges around the vertex in the order of the pointers, which are checked when the graph is built or updated
+        """
+        edges = self.edges
         edge_index = first_edge_index = self.incident_edge_indices[vertex_index]
         while True:
-            yield self.edges[edge_index]
-            if self.edges[edge_index].v1 == vertex_index:
-                if edge_index == self.edges[edge_index].p1:
-                    raise Exception('Incorrect graph: pointer points on the same edge')
-                edge_index = self.edges[edge_index].p1
-            else:
-                if edge_index == self.edges[edge_index].p2:
-                    raise Exception('Incorrect graph: pointer points on the same edge')
-                edge_index = self.edges[edge_index].p2
+            edge = edges[edge_index]
+            yield edge
+            edge_index = edge.p1 if edge.v1 == vertex_index else edge.p2
             if edge_index == first_edge_index:
                 break
@@ -1,16 +1,35 @@
+from .point import Point
+
+
 class Edge:
-    def __init__(self, v1: int, v2: int, f1: int, f2: int, p1: int, p2: int):
+    """
+    Besides the DCEL fields, an edge keeps the coefficients of its line, given or set by `set_line`:
+    `a * x + b * y + c` is twice the signed area of the triangle (v1, v2, (x, y)), positive to the left of the edge.
+    The coefficients are exact for integer and fraction coordinates, and rounded for float ones
+    """
+    __slots__ = ('v1', 'v2', 'f1', 'f2', 'p1', 'p2', 'a', 'b', 'c')
+
+    def __init__(self, v1: int, v2: int, f1: int, f2: int, p1: int, p2: int, a=0, b=0, c=0):
         self.v1 = v1
         self.v2 = v2
         self.f1 = f1
         self.f2 = f2
         self.p1 = p1
         self.p2 = p2
+        self.a = a
+        self.b = b
+        self.c = c
 
     def __repr__(self):
         return f'<Edge v=({self.v1}, {self.v2}) f=({self.f1}, {self.f2}) p=({self.p1}, {self.p2})>'
 
+    def set_line(self, vertex1: Point, vertex2: Point):
+        self.a = vertex1.y - vertex2.y
+        self.b = vertex2.x - vertex1.x
+        self.c = vertex1.x * vertex2.y - vertex1.y * vertex2.x
+
     def rotate180(self):
         self.v1, self.v2 = self.v2, self.v1
         self.f1, self.f2 = self.f2, self.f1
         self.p1, self.p2 = self.p2, self.p1
+        self.a, self.b, self.c = -self.a, -self.b, -self.c
@@ -0,0 +1,81 @@
+"""
+Checks of the edge table in one linear vectorized pass. Every end of an edge is a slot: slot `2 * e` is the end
+of edge `e` at `v1` and slot `2 * e + 1` the end at `v2`. The pointer of a slot (`p1` or `p2`) names the next edge
+around the vertex, counterclockwise or clockwise but the same way at every vertex, so the pointers map every slot
+to the next slot around the same vertex
+"""
+import numpy as np
+
+
+def _fail(message: str):
+    raise Exception(f'Incorrect graph: {message}')
+
+
+def _interleave(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Slot column from the column of the `v1` ends and the column of the `v2` ends
+    """
+    return np.stack((first, second), axis=1).ravel()
+
+
+def validate_edges(vertexes_count: int, v1: np.ndarray, v2: np.ndarray, f1: np.ndarray, f2: np.ndarray,
+                   p1: np.ndarray, p2: np.ndarray):
+    """
+    Checks that all indices are in range, that the pointers around every vertex form one closed cycle
+    and that the face between an edge and the next one is a face of both:
+    `f1` lies to the left of the edge from `v1` to `v2` and `f2` to the right.
+    The pointers may turn either way, an error is reported for the way that fits more slots
+
+    :raise Exception: for the first bad record
+    """
+    edges_count = len(v1)
+    for name, column, low, high in (('v1', v1, 0, vertexes_count), ('v2', v2, 0, vertexes_count),
+                                    ('p1', p1, 0, edges_count), ('p2', p2, 0, edges_count),
+                                    ('f1', f1, -1, None), ('f2', f2, -1, None)):
+        bad = np.flatnonzero((column < low) | (column >= high) if high is not None else column < low)
+        if len(bad):
+            _fail(f'{name} of edge {bad[0]} is out of range: {column[bad[0]]}')
+    bad = np.flatnonzero(v1 == v2)
+    if len(bad):
+        _fail(f'edge {bad[0]} starts and ends at vertex {v1[bad[0]]}')
+    edge_indices = np.arange(edges_count)
+    for name, column in (('p1', p1), ('p2', p2)):
+        bad = np.flatnonzero(column == edge_indices)
+        if len(bad):
+            _fail(f'pointer {name} of edge {bad[0]} points on the same edge')
+
+    vertexes = _interleave(v1, v2)
+    pointers = _interleave(p1, p2)
+    next_slots = 2 * pointers + (v1[pointers] != vertexes)
+    bad = np.flatnonzero((v1[pointers] != vertexes) & (v2[pointers] != vertexes))
+    if len(bad):
+        _fail(f'pointer p{bad[0] % 2 + 1} of edge {bad[0] // 2} points on edge {pointers[bad[0]]}, '
+              f'which does not meet vertex {vertexes[bad[0]]}')
+    counts = np.bincount(next_slots, minlength=2 * edges_count)
+    bad = np.flatnonzero(counts > 1)
+    if len(bad):
+        _fail(f'several pointers around vertex {vertexes[bad[0]]} point on edge {bad[0] // 2}')
+
+    # cycle labels: the smallest slot of the cycle, found by doubling the pointer jumps
+    labels = np.arange(2 * edges_count)
+    jumps = next_slots
+    while True:
+        new_labels = np.minimum(labels, labels[jumps])
+        if np.array_equal(new_labels, labels):
+            break
+        labels, jumps = new_labels, jumps[jumps]
+    cycles = np.bincount(vertexes[labels == np.arange(2 * edges_count)], minlength=vertexes_count)
+    bad = np.flatnonzero(cycles > 1)
+    if len(bad):
+        _fail(f'edges around vertex {bad[0]} form {cycles[bad[0]]} cycles instead of one')
+    bad = np.flatnonzero(cycles == 0)
+    if len(bad):
+        _fail(f'vertex {bad[0]} without incident edges')
+
+    left_faces = _interleave(f1, f2)
+    right_faces = _interleave(f2, f1)
+    bad = min((np.flatnonzero(left_faces != right_faces[next_slots]),
+               np.flatnonzero(right_faces != left_faces[next_slots])), key=len)
+    if len(bad):
+        _fail(f'faces of edge {bad[0] // 2} and of the next edge {pointers[bad[0]]} around vertex '
+              f'{vertexes[bad[0]]} do not match')
@@ -1,35 +1,353 @@
 import argparse
 import json
+import multiprocessing
+import os
+import sys
+import time
+from contextlib import nullcontext
+from functools import partial
+from typing import IO, ContextManager, Dict, List, Sequence, Tuple, Union
 
-from dcel import DCEL, Point
-from slab import SearchSystem
+from dcel import DCEL
+from slab import SearchSystem, SlabIndex, Stats, TrapezoidMap
+from slab.cache import QueryCache
+from slab.columnar import ColumnarInput
+from slab.parallel import ParallelLocator
+from slab.stream import read_points_binary, read_points_ndjson, write_faces_binary, write_faces_ndjson
 
 
 def register_launch_arguments():
     parser = argparse.ArgumentParser(description='Serve the app')
-    parser.add_argument('-i', '--input', help='specify input file', required=True)
-    parser.add_argument('-o', '--output', help='specify output file', required=True)
-    return parser.parse_args()
+    parser.add_argument('-i', '--input', help='specify input file')
+    parser.add_argument('-o', '--output', help='specify output file, - for stdout in streaming mode, '
+                                               'the report of the jobs with --manifest', required=True)
+    parser.add_argument('--manifest', help='run the jobs of a JSON manifest, each locates points against a PSLG')
+    parser.add_argument('--max-indexes', type=int,
+                        help='number of indexes built at a time with --manifest, by default the number of workers')
+    parser.add_argument('--input-format', choices=['json', 'binary'], default='json',
+                        help='format of the input file: JSON or binary columns written by convert.py')
+    parser.add_argument('--output-format', choices=['json', 'binary'], default='json',
+                        help='format of the output file: JSON or a raw int32 array of faces')
+    parser.add_argument('--engine', choices=['slab', 'trapezoid'], default='slab',
+                        help='point location engine: slab method or randomized trapezoidal map')
+    parser.add_argument('--save-index', help='save the built index to file')
+    parser.add_argument('--load-index', help='load the index from file instead of building it from the input PSLG')
+    parser.add_argument('--persistence', choices=list(SearchSystem.persistence_modes), default='path_copying',
+                        help='how the tree keeps its versions: path copying or linear-space node copying')
+    parser.add_argument('--points', help='stream query points from file, - for stdin, instead of the input points')
+    parser.add_argument('--points-format', choices=['ndjson', 'binary'], default='ndjson',
+                        help='format of the streamed points and faces')
+    parser.add_argument('--chunk-size', type=int, default=65536, help='number of points located at once in streaming mode')
+    parser.add_argument('--coherent', action='store_true',
+                        help='reuse the search of the previous points for points given in a coherent order, '
+                             'e.g. a trajectory')
+    parser.add_argument('--lazy', type=int, metavar='LINES',
+                        help='build the slabs on demand, in chunks of this many lines, for queries of a small area')
+    parser.add_argument('--cache', type=float, metavar='MB',
+                        help='remember the faces of repeated query points, in at most this many megabytes')
+    parser.add_argument('--cache-policy', choices=list(QueryCache.policies), default='lru',
+                        help='eviction of the remembered points')
+    parser.add_argument('--cache-grid', type=int, default=256, metavar='CELLS',
+                        help='cells along a side of the grid that answers points far from edges, 0 for no grid, '
+                             'none for a lazy index')
+    parser.add_argument('--stats', help='write build and query statistics as JSON to file, - for stderr')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='number of processes that build the slabs and locate points')
+    args = parser.parse_args()
+    if args.manifest and (args.input or args.points or args.save_index or args.load_index or args.stats):
+        parser.error('argument --manifest: not allowed with -i/--input, --points, --save-index, --load-index '
+                     'or --stats')
+    if args.max_indexes is not None and not args.manifest:
+        parser.error('argument --max-indexes: only supported with --manifest')
+    if args.max_indexes is not None and args.max_indexes < 1:
+        parser.error('argument --max-indexes: must be positive')
+    if args.input is None and not args.manifest and not (args.load_index and args.points):
+        parser.error('the following arguments are required: -i/--input')
+    if args.engine != 'slab' and (args.save_index or args.load_index):
+        parser.error('arguments --save-index and --load-index: only supported by the slab engine')
+    if args.engine != 'slab' and args.coherent:
+        parser.error('argument --coherent: only supported by the slab engine')
+    if args.lazy is not None and (args.engine != 'slab' or args.load_index or args.persistence != 'path_copying'):
+        parser.error('argument --lazy: only supported by the slab engine building an index with path copying')
+    if args.lazy is not None and args.lazy < 1:
+        parser.error('argument --lazy: must be positive')
+    if args.cache is not None and args.engine != 'slab':
+        parser.error('argument --cache: only supported by the slab engine')
+    if args.cache is not None and args.workers > 1 and not args.manifest:
+        parser.error('argument --cache: the cache is kept by one process, not supported with several workers')
+    if args.cache is not None and args.cache <= 0:
+        parser.error('argument --cache: must be positive')
+    if args.cache_grid < 0:
+        parser.error('argument --cache-grid: must not be negative')
+    if args.points and args.output_format != 'json':
+        parser.error('argument --output-format: the streamed faces have the format of --points-format')
+    if args.chunk_size < 1:
+        parser.error('argument --chunk-size: must be positive')
+    if args.workers < 1:
+        parser.error('argument -w/--workers: must be positive')
+    return args
 
 
-if __name__ == '__main__':
-    args = register_launch_arguments()
+def read_input(path: str, input_format: str = 'json') -> Union[dict, ColumnarInput]:
+    if input_format == 'binary':
+        return ColumnarInput(path)
+    with open(path) as input_file:
+        return json.load(input_file)
+
+
+def get_dcel(input_data: Union[dict, ColumnarInput], stats: Stats = None) -> DCEL:
+    if isinstance(input_data, ColumnarInput):
+        return input_data.get_dcel(stats)
+    return DCEL(**input_data['pslg'], stats=stats)
+
+
+def get_points(input_data: Union[dict, ColumnarInput]) -> Tuple[Sequence, Sequence]:
+    if isinstance(input_data, ColumnarInput):
+        return input_data.get_points()
+    return [point_dict['x'] for point_dict in input_data['points']], \
+        [point_dict['y'] for point_dict in input_data['points']]
+
+
+def load_index(args, input_data: dict = None, stats: Stats = None) -> Union[SlabIndex, TrapezoidMap]:
+    if args.load_index:
+        with stats.phase('load_index') if stats is not None else nullcontext():
+            index = SlabIndex.load(args.load_index)
+        if stats is not None:
+            index.stats = stats
+            stats.memory['index'] = index.nbytes
+    elif args.engine == 'trapezoid':
+        dcel = get_dcel(input_data, stats)
+        with stats.phase('trapezoid_map') if stats is not None else nullcontext():
+            index = TrapezoidMap(dcel)
+        if stats is not None:
+            stats.memory['index'] = index.nbytes
+    else:
+        workers = args.workers if args.lazy is None else 1
+        index = SearchSystem(get_dcel(input_data, stats), args.persistence, workers, stats, args.lazy).index
+    if args.save_index:
+        index.save(args.save_index)
+    if args.cache is not None:
+        with stats.phase('cache_grid') if stats is not None else nullcontext():
+            index.set_query_cache(int(args.cache * 2 ** 20), args.cache_policy, args.cache_grid)
+    return index
+
+
+def describe_error(e: Exception) -> str:
+    if isinstance(e, FileNotFoundError):
+        return f"No such file '{e.filename}'"
+    if isinstance(e, (json.decoder.JSONDecodeError, KeyError)):
+        return 'Incorrect file format'
+    if isinstance(e, IndexError):
+        return 'Incorrect indexing'
+    return str(e)
 
+
+def locate_input_points(args, stats: Stats = None) -> dict:
     try:
-        with open(args.input) as input_file:
-            input_data = json.load(input_file)
-        dcel = DCEL(**input_data['pslg'])
-        points = [Point(**point_dict) for point_dict in input_data['points']]
-        search_system = SearchSystem(dcel)
-        output_data = {'faces': [search_system.locate_point(point) for point in points]}
-    except FileNotFoundError as e:
-        output_data = {'error': f"No such file '{e.filename}'"}
-    except (json.decoder.JSONDecodeError, KeyError):
-        output_data = {'error': 'Incorrect file format'}
-    except IndexError:
-        output_data = {'error': 'Incorrect indexing'}
+        with stats.phase('read_input') if stats is not None else nullcontext():
+            input_data = read_input(args.input, args.input_format)
+        index = load_index(args, input_data, stats)
+        xs, ys = get_points(input_data)
+        with ParallelLocator(index, args.workers, args.coherent) as locator, \
+                stats.phase('locate') if stats is not None else nullcontext():
+            faces = locator.locate_points(xs, ys)
+        if stats is not None:
+            stats.memory['index'] = index.nbytes
+            if getattr(index, 'query_cache', None) is not None:
+                stats.cache = index.query_cache.to_dict()
+        return {'faces': faces}
     except Exception as e:
-        output_data = {'error': str(e)}
+        return {'error': describe_error(e)}
+
+
+def open_stream(path: str, mode: str) -> ContextManager[IO]:
+    """
+    Opens a file for streaming, - for stdin or stdout, which stay open on exit
+    """
+    if path == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return nullcontext(stream.buffer if 'b' in mode else stream)
+    return open(path, mode)
+
+
+def locate_streamed_points(args, stats: Stats = None):
+    """
+    Locates points chunk by chunk and writes the faces of each chunk as soon as it is located.
+    NDJSON faces are written one per line, binary faces as a raw int32 array,
+    an error is reported as a last NDJSON line or on stderr for the binary format.
+    """
+    binary = args.points_format == 'binary'
+    read_points, write_faces = (read_points_binary, write_faces_binary) if binary \
+        else (read_points_ndjson, write_faces_ndjson)
+    suffix = 'b' if binary else ''
+    with open_stream(args.output, 'w' + suffix) as output_file:
+        try:
+            index = load_index(args, None if args.load_index else read_input(args.input, args.input_format), stats)
+            with open_stream(args.points, 'r' + suffix) as points_file, \
+                    ParallelLocator(index, args.workers, args.coherent) as locator, \
+                    stats.phase('locate') if stats is not None else nullcontext():
+                for xs, ys in read_points(points_file, args.chunk_size):
+                    write_faces(output_file, locator.locate_points(xs, ys))
+            if stats is not None:
+                stats.memory['index'] = index.nbytes
+                if getattr(index, 'query_cache', None) is not None:
+                    stats.cache = index.query_cache.to_dict()
+        except Exception as e:
+            message = describe_error(e)
+            if binary:
+                print(json.dumps({'error': message}), file=sys.stderr)
+                sys.exit(1)
+            output_file.write(json.dumps({'error': message}) + '\n')
+
+
+def write_stats(path: str, stats: Stats):
+    if path == '-':
+        json.dump(stats.to_dict(), sys.stderr, indent=2)
+        print(file=sys.stderr)
+    else:
+        with open(path, 'w') as stats_file:
+            json.dump(stats.to_dict(), stats_file, indent=2)
+
+
+def write_output(path: str, output_format: str, output_data: dict):
+    """
+    Writes the faces as JSON or as a raw int32 array, an error only as JSON
+    """
+    if output_format == 'binary':
+        with open(path, 'wb') as output_file:
+            write_faces_binary(output_file, output_data['faces'])
+    else:
+        if 'faces' in output_data:
+            output_data = {'faces': output_data['faces'].tolist()}
+        with open(path, 'w') as output_file:
+            json.dump(output_data, output_file, indent=2)
+
+
+def read_manifest(path: str, input_format: str, output_format: str) -> List[dict]:
+    """
+    Jobs of a manifest `{"jobs": [{"pslg": ..., "points": ..., "output": ...}, ...]}`. `points` is optional,
+    the points of the `pslg` file are used without it. A job may set its own `input_format` and `output_format`.
+    Relative paths are taken from the directory of the manifest
+    """
+    with open(path) as manifest_file:
+        manifest = json.load(manifest_file)
+    directory = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for job_dict in manifest['jobs']:
+        if 'pslg' not in job_dict or 'output' not in job_dict:
+            raise Exception('Incorrect manifest: every job needs pslg and output')
+        job = {'input_format': input_format, 'output_format': output_format, **job_dict}
+        for name in ('pslg', 'points', 'output'):
+            if name in job:
+                job[name] = os.path.join(directory, job[name])
+        job.setdefault('points', job['pslg'])
+        jobs.append(job)
+    return jobs
+
+
+def locate_job_group(args, group: List[Tuple[int, dict]]) -> List[Tuple[int, dict]]:
+    """
+    Builds the index of one PSLG and locates the points of all its jobs. The input file of the PSLG is read once,
+    it also gives the points of the jobs that name it as their points file. The index is dropped on return
+
+    :param group: jobs with the same PSLG by their positions in the manifest
+    :return: reports of the jobs by their positions
+    """
+    pslg_path, input_format = group[0][1]['pslg'], group[0][1]['input_format']
+    start = time.perf_counter()
+    try:
+        input_data = read_input(pslg_path, input_format)
+        index, build_error = load_index(args, input_data), None
+    except Exception as e:
+        input_data = index = None
+        build_error = describe_error(e)
+    build_s = time.perf_counter() - start
+
+    reports = []
+    for position, job in group:
+        start = time.perf_counter()
+        try:
+            if build_error is not None:
+                raise Exception(build_error)
+            points_data = input_data if job['points'] == pslg_path else read_input(job['points'], job['input_format'])
+            with ParallelLocator(index, 1, args.coherent) as locator:
+                output_data = {'faces': locator.locate_points(*get_points(points_data))}
+        except Exception as e:
+            output_data = {'error': describe_error(e)}
+        report = {'output': job['output'], 'build_s': build_s, 'locate_s': time.perf_counter() - start}
+        if 'error' in output_data:
+            report['error'] = output_data['error']
+        else:
+            report['points'] = len(output_data['faces'])
+        try:
+            if 'faces' in output_data or job['output_format'] == 'json':
+                write_output(job['output'], job['output_format'], output_data)
+        except Exception as e:
+            report['error'] = describe_error(e)
+        reports.append((position, report))
+    return reports
+
+
+def _get_file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def run_manifest(args) -> dict:
+    """
+    Runs the jobs of a manifest with one index per distinct PSLG file. Groups of jobs with the same PSLG
+    run over a process pool, biggest files first; every process keeps one index at a time,
+    so at most `--max-indexes` indexes are alive. A failed job is reported and does not stop the others
+
+    :return: report with the number of maps and a report per job in the order of the manifest
+    """
+    start = time.perf_counter()
+    jobs = read_manifest(args.manifest, args.input_format, args.output_format)
+    groups: Dict[Tuple[str, str], List[Tuple[int, dict]]] = {}
+    for position, job in enumerate(jobs):
+        groups.setdefault((os.path.realpath(job['pslg']), job['input_format']), []).append((position, job))
+    ordered_groups = sorted(groups.values(), key=lambda group: -_get_file_size(group[0][1]['pslg']))
+    processes = min(args.workers, args.max_indexes or args.workers, len(ordered_groups))
+    locate_group = partial(locate_job_group, argparse.Namespace(**{**vars(args), 'workers': 1}))
+
+    reports = [None] * len(jobs)
+    if processes <= 1:
+        group_reports = map(locate_group, ordered_groups)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes)
+        group_reports = pool.imap_unordered(locate_group, ordered_groups)
+    try:
+        for group_report in group_reports:
+            for position, report in group_report:
+                reports[position] = report
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return {'maps': len(groups), 'jobs': reports, 'wall_s': time.perf_counter() - start}
+
+
+if __name__ == '__main__':
+    args = register_launch_arguments()
+    stats = Stats() if args.stats else None
 
-    with open(args.output, 'w') as output_file:
-        json.dump(output_data, output_file, indent=2)
+    if args.manifest:
+        try:
+            output_data = run_manifest(args)
+        except Exception as e:
+            output_data = {'error': describe_error(e)}
+        with open(args.output, 'w') as output_file:
+            json.dump(output_data, output_file, indent=2)
+    elif args.points:
+        locate_streamed_points(args, stats)
+    else:
+        output_data = locate_input_points(args, stats)
+        if args.output_format == 'binary' and 'error' in output_data:
+            print(json.dumps(output_data), file=sys.stderr)
+            sys.exit(1)
+        write_output(args.output, args.output_format, output_data)
+    if stats is not None:
+        write_stats(args.stats, stats)
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+
+from slab import SearchSystem
+from slab.service import IndexRegistry, LocateService
+
+
+def register_launch_arguments():
+    parser = argparse.ArgumentParser(description='Serve point location over newline-delimited JSON')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP host to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on')
+    parser.add_argument('--unix', help='listen on a Unix socket at this path instead of TCP')
+    parser.add_argument('--persistence', choices=list(SearchSystem.persistence_modes), default='path_copying',
+                        help='how the tree keeps its versions: path copying or linear-space node copying')
+    parser.add_argument('--memory-budget', type=int, default=1024,
+                        help='megabytes of built indexes to keep, the least recently used ones are evicted')
+    parser.add_argument('--coalesce-points', type=int, default=1024,
+                        help='requests with fewer points are located together with concurrent ones, 0 to disable')
+    parser.add_argument('--coalesce-delay', type=float, default=1,
+                        help='milliseconds a small request waits for others to be coalesced with')
+    parser.add_argument('--max-request', type=int, default=256, help='maximum size of a request line in megabytes')
+    args = parser.parse_args()
+    if args.memory_budget < 0 or args.coalesce_points < 0 or args.coalesce_delay < 0:
+        parser.error('arguments --memory-budget, --coalesce-points and --coalesce-delay must not be negative')
+    return args
+
+
+async def serve(args):
+    registry = IndexRegistry(args.memory_budget * 2 ** 20, args.persistence)
+    service = LocateService(registry, args.coalesce_points, args.coalesce_delay / 1000)
+    limit = args.max_request * 2 ** 20
+    if args.unix:
+        server = await asyncio.start_unix_server(service.handle_connection, args.unix, limit=limit)
+    else:
+        server = await asyncio.start_server(service.handle_connection, args.host, args.port, limit=limit)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(serve(register_launch_arguments()))
+    except KeyboardInterrupt:
+        pass
@@ -1 +1,4 @@
+from .index import SlabIndex
 from .search_system import SearchSystem
+from .stats import Stats
+from .trapezoid import TrapezoidMap
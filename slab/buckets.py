@@ -0,0 +1,104 @@
+import bisect
+from array import array
+from typing import Sequence, Tuple
+
+
+class BandBuckets:
+    """
+    Acceleration index over the sorted lines: the y-range of the lines is cut into buckets of equal width,
+    and every bucket keeps the range of lines it contains, so a band is found by a division and a search
+    among the few lines of one bucket instead of a binary search over all of them.
+
+    In the `adaptive` mode a bucket holding more than `leaf_size` lines, e.g. in a cluster of close ys,
+    gets its own buckets of equal width, one per line, and the lookup takes one more division
+    """
+    modes = ('uniform', 'adaptive')
+    leaf_size = 8
+
+    lines: Sequence[int]
+    mode: str
+    low: int
+    width: int
+    starts: Sequence[int]
+    sub_offsets: Sequence[int]
+    sub_widths: Sequence[int]
+    sub_starts: Sequence[int]
+
+    def __init__(self, lines: Sequence[int], mode: str = 'uniform', buckets_count: int = None):
+        """
+        :param lines: distinct ys in increasing order, not empty
+        :param buckets_count: number of buckets of the first level, by default the number of lines
+        """
+        if mode not in self.modes:
+            raise ValueError(f"Unknown bucket mode '{mode}'")
+        self.lines = lines
+        self.mode = mode
+        lines_count = len(lines)
+        buckets_count = buckets_count or lines_count
+        self.low = lines[0]
+        self.width = -(-(lines[-1] - lines[0] + 1) // buckets_count)
+        buckets_count = -(-(lines[-1] - lines[0] + 1) // self.width)
+        self.starts = self._get_starts(self.low, self.width, buckets_count, 0, lines_count)
+        self.sub_offsets = array('q', [-1] * buckets_count)
+        self.sub_widths = array('q', [0] * buckets_count)
+        self.sub_starts = array('q')
+        if mode == 'adaptive':
+            self._split_buckets()
+
+    def _get_starts(self, low: int, width: int, count: int, first: int, end: int) -> Sequence[int]:
+        """
+        Index of the first line at or above the lower bound of every bucket, and `end` after the last bucket
+        """
+        starts = array('q', [end]) * (count + 1)
+        line_index = first
+        for bucket_index in range(count):
+            line_index = bisect.bisect_left(self.lines, low + bucket_index * width, line_index, end)
+            starts[bucket_index] = line_index
+        return starts
+
+    def _split_buckets(self):
+        for bucket_index in range(len(self.sub_offsets)):
+            first, end = self.starts[bucket_index], self.starts[bucket_index + 1]
+            if end - first <= self.leaf_size:
+                continue
+            sub_width = -(-self.width // (end - first))
+            sub_count = -(-self.width // sub_width)
+            self.sub_offsets[bucket_index] = len(self.sub_starts)
+            self.sub_widths[bucket_index] = sub_width
+            self.sub_starts.extend(self._get_starts(self.low + bucket_index * self.width, sub_width, sub_count,
+                                                    first, end))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(memoryview(column).nbytes
+                   for column in (self.starts, self.sub_offsets, self.sub_widths, self.sub_starts))
+
+    def get_range(self, y: int) -> Tuple[int, int]:
+        """
+        Range of line indices that contains `bisect_left(lines, y)`, for `lines[0] <= y <= lines[-1]`
+        """
+        bucket_index = (y - self.low) // self.width
+        sub_width = self.sub_widths[bucket_index]
+        if sub_width:
+            position = self.sub_offsets[bucket_index] + (y - self.low - bucket_index * self.width) // sub_width
+            return self.sub_starts[position], self.sub_starts[position + 1]
+        return self.starts[bucket_index], self.starts[bucket_index + 1]
+
+    def search_band(self, y: int) -> int:
+        """
+        Same band as `SlabIndex._search_band`, with the lookup of `get_range` inlined
+        """
+        lines = self.lines
+        low = self.low
+        if y < low or y > lines[-1]:
+            return -1
+        bucket_index = (y - low) // self.width
+        sub_width = self.sub_widths[bucket_index]
+        if sub_width:
+            position = self.sub_offsets[bucket_index] + (y - low - bucket_index * self.width) // sub_width
+            r = bisect.bisect_left(lines, y, self.sub_starts[position], self.sub_starts[position + 1])
+        else:
+            r = bisect.bisect_left(lines, y, self.starts[bucket_index], self.starts[bucket_index + 1])
+        if lines[r] == y:
+            return r if r < len(lines) - 1 else len(lines) - 2
+        return r - 1
@@ -0,0 +1,300 @@
+"""
+Memoization of answers for repeated query locations, see `QueryCache`
+"""
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from dcel.coordinates import Coordinate, FLOAT_EXACT_LIMIT
+
+Key = Hashable
+
+
+class LRUCache:
+    """
+    Bounded map that evicts the least recently used entry
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Key) -> Optional[int]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Key, value: int):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ClockCache:
+    """
+    Bounded map with CLOCK eviction: a hit only sets the reference bit of the slot, and the hand evicts
+    the first slot without the bit, clearing the bits it passes. Cheaper per hit than LRU and close to it in hit rate
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._slots = {}
+        self._keys = []
+        self._values = []
+        self._referenced = bytearray(capacity)
+        self._hand = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get(self, key: Key) -> Optional[int]:
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        self._referenced[slot] = 1
+        return self._values[slot]
+
+    def put(self, key: Key, value: int):
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._values[slot] = value
+            return
+        if len(self._keys) < self.capacity:
+            self._slots[key] = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+            return
+        referenced, hand = self._referenced, self._hand
+        while referenced[hand]:
+            referenced[hand] = 0
+            hand = (hand + 1) % self.capacity
+        del self._slots[self._keys[hand]]
+        self._slots[key] = hand
+        self._keys[hand] = key
+        self._values[hand] = value
+        self._hand = (hand + 1) % self.capacity
+
+    def clear(self):
+        self.__init__(self.capacity)
+
+
+class FaceGrid:
+    """
+    Uniform grid over the bounding box of the vertexes with the face of every cell that lies entirely inside one face.
+    A cell is clean if no edge passes through it, and the clean cells are located once by their centers. The cell of a point is computed in doubles, so points closer to a cell border than
+    `border` cells, whose cell could be off by rounding, are left to the index
+    """
+    unknown = -2
+    border = 1e-9
+
+    size: int
+    faces: array
+
+    def __init__(self, index, size: int, locate: Callable[[np.ndarray, np.ndarray], np.ndarray]):
+        """
+        :param index: index with `xs`, `ys`, `v1`, `v2` columns
+        :param size: number of cells along a side
+        :param locate: locates the float64 cell centers
+        """
+        self.size = size
+        xs, ys = np.asarray(index.xs, dtype=np.float64), np.asarray(index.ys, dtype=np.float64)
+        self.x0, self.y0 = float(xs.min()), float(ys.min())
+        width, height = float(xs.max()) - self.x0, float(ys.max()) - self.y0
+        self.x1, self.y1 = self.x0 + width, self.y0 + height
+        # the cells of points are computed in doubles, which must resolve a cell
+        magnitude = max(abs(self.x0), abs(self.y0), abs(self.x1), abs(self.y1))
+        if min(width, height) <= 0 or magnitude * size / min(width, height) > FLOAT_EXACT_LIMIT / 16:
+            self.faces = array('i', [self.unknown]) * (size * size)
+            self.scale_x = self.scale_y = 0.0
+            return
+        self.scale_x, self.scale_y = size / width, size / height
+
+        covered = self._get_covered_cells(xs, ys, np.asarray(index.v1, dtype=np.int64),
+                                          np.asarray(index.v2, dtype=np.int64))
+
+        faces = np.full(size * size, self.unknown, dtype=np.int32)
+        clean = np.flatnonzero(~covered.ravel())
+        if len(clean):
+            center_xs = self.x0 + (clean % size + 0.5) / self.scale_x
+            center_ys = self.y0 + (clean // size + 0.5) / self.scale_y
+            faces[clean] = locate(center_xs, center_ys)
+        self.faces = array('i', faces.tobytes())
+
+    def _get_covered_cells(self, xs: np.ndarray, ys: np.ndarray, v1: np.ndarray, v2: np.ndarray) -> np.ndarray:
+        """
+        Cells that an edge may pass through. Every edge is sampled at most half a cell apart along both axes,
+        so the cells it passes through are the neighbours of the cells of its samples
+
+        :return: boolean array of rows of cells
+        """
+        size = self.size
+        start_x, start_y = (xs[v1] - self.x0) * self.scale_x, (ys[v1] - self.y0) * self.scale_y
+        delta_x, delta_y = (xs[v2] - xs[v1]) * self.scale_x, (ys[v2] - ys[v1]) * self.scale_y
+        counts = np.ceil(2 * np.maximum(np.abs(delta_x), np.abs(delta_y))).astype(np.int64) + 1
+        edges = np.repeat(np.arange(len(v1)), counts)
+        steps = np.arange(len(edges)) - np.repeat(np.cumsum(counts) - counts, counts)
+        fractions = steps / np.maximum(counts - 1, 1)[edges]
+        columns = np.clip(np.floor(start_x[edges] + fractions * delta_x[edges]).astype(np.int64), 0, size - 1)
+        rows = np.clip(np.floor(start_y[edges] + fractions * delta_y[edges]).astype(np.int64), 0, size - 1)
+        covered = np.zeros((size + 2, size + 2), dtype=bool)
+        covered[rows + 1, columns + 1] = True
+        dilated = covered.copy()
+        dilated[1:, :] |= covered[:-1, :]
+        dilated[:-1, :] |= covered[1:, :]
+        covered = dilated.copy()
+        covered[:, 1:] |= dilated[:, :-1]
+        covered[:, :-1] |= dilated[:, 1:]
+        return covered[1:-1, 1:-1]
+
+    def get(self, x: Coordinate, y: Coordinate) -> int:
+        """
+        :return: face of the cell of the point, `unknown` if the cell is not clean, the point is outside the grid
+                 or near a cell border
+        """
+        if not (self.x0 <= x < self.x1 and self.y0 <= y < self.y1):
+            return self.unknown
+        column, row = (float(x) - self.x0) * self.scale_x, (float(y) - self.y0) * self.scale_y
+        column_index, row_index = int(column), int(row)
+        border = self.border
+        if not (border < column - column_index < 1 - border and border < row - row_index < 1 - border):
+            return self.unknown
+        return self.faces[row_index * self.size + column_index]
+
+    def get_batch(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of `get`
+        """
+        columns = (xs.astype(np.float64) - self.x0) * self.scale_x
+        rows = (ys.astype(np.float64) - self.y0) * self.scale_y
+        column_indices, row_indices = np.floor(columns), np.floor(rows)
+        column_fractions, row_fractions = columns - column_indices, rows - row_indices
+        border = self.border
+        inside = (column_indices >= 0) & (column_indices < self.size) & (row_indices >= 0) & \
+            (row_indices < self.size) & (column_fractions > border) & (column_fractions < 1 - border) & \
+            (row_fractions > border) & (row_fractions < 1 - border)
+        faces = np.full(len(xs), self.unknown, dtype=np.int64)
+        cells = row_indices[inside].astype(np.int64) * self.size + column_indices[inside].astype(np.int64)
+        faces[inside] = np.frombuffer(self.faces, dtype=np.int32)[cells]
+        return faces
+
+    @property
+    def clean_count(self) -> int:
+        return len(self.faces) - self.faces.count(self.unknown)
+
+    @property
+    def nbytes(self) -> int:
+        return memoryview(self.faces).nbytes
+
+
+class QueryCache:
+    """
+    Answers of repeated query locations in front of an index, in two layers: a bounded map from the exact
+    coordinates of a point to its face, with LRU or CLOCK eviction, and an optional `FaceGrid`, which answers
+    any point of a clean cell by one lookup. Points that miss both are located by the index and remembered.
+    The memory cap covers the grid and the estimated size of the map entries
+    """
+    policies = {'lru': LRUCache, 'clock': ClockCache}
+    # measured size of an entry with a key of two integers
+    entry_bytes = 240
+
+    points: LRUCache
+    grid: Optional[FaceGrid]
+    hits: int
+    cell_hits: int
+    misses: int
+
+    def __init__(self, index, max_bytes: int, policy: str = 'lru', grid_size: int = 0,
+                 locate_cells: Callable[[np.ndarray, np.ndarray], np.ndarray] = None):
+        """
+        :param index: index that the grid covers
+        :param max_bytes: memory cap of the grid and the map
+        :param policy: eviction of the map, one of `policies`
+        :param grid_size: number of cells along a side of the grid, 0 for no grid
+        :param locate_cells: locates the cell centers of the grid, `index.locate_points` by default
+        """
+        if policy not in self.policies:
+            raise ValueError(f'Unknown cache policy: {policy}')
+        self.grid = FaceGrid(index, grid_size, locate_cells or index.locate_points) if grid_size > 0 else None
+        grid_bytes = self.grid.nbytes if self.grid is not None else 0
+        if grid_bytes > max_bytes:
+            raise ValueError('The grid of the cache does not fit its memory cap')
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.points = self.policies[policy](max(1, (max_bytes - grid_bytes) // self.entry_bytes))
+        self.hits = self.cell_hits = self.misses = 0
+
+    def clear(self):
+        self.points.clear()
+
+    @property
+    def nbytes(self) -> int:
+        return (self.grid.nbytes if self.grid is not None else 0) + len(self.points) * self.entry_bytes
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits, 'cell_hits': self.cell_hits, 'misses': self.misses,
+            'entries': len(self.points), 'capacity': self.points.capacity,
+            'clean_cells': self.grid.clean_count if self.grid is not None else 0,
+        }
+
+    def locate_point(self, x: Coordinate, y: Coordinate, locate: Callable[[Coordinate, Coordinate], int]) -> int:
+        key = (x, y)
+        face = self.points.get(key)
+        if face is not None:
+            self.hits += 1
+            return face
+        if self.grid is not None:
+            face = self.grid.get(x, y)
+            if face != FaceGrid.unknown:
+                self.cell_hits += 1
+                return face
+        self.misses += 1
+        face = locate(x, y)
+        self.points.put(key, face)
+        return face
+
+    def locate_points(self, xs: np.ndarray, ys: np.ndarray,
+                      locate: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Same as `locate_point` for every point: the grid is looked up for all points at once, the map once
+        per distinct point, and the points that miss the map are located by one call
+        """
+        if self.grid is not None:
+            faces = self.grid.get_batch(xs, ys)
+        else:
+            faces = np.full(len(xs), FaceGrid.unknown, dtype=np.int64)
+        rest = np.flatnonzero(faces == FaceGrid.unknown)
+        self.cell_hits += len(xs) - len(rest)
+        if not len(rest):
+            return faces
+        order = rest[np.lexsort((xs[rest], ys[rest]))]
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = (xs[order[1:]] != xs[order[:-1]]) | (ys[order[1:]] != ys[order[:-1]])
+        groups = np.cumsum(is_first) - 1
+        distinct = order[is_first]
+        keys: List[tuple] = list(zip(xs[distinct].tolist(), ys[distinct].tolist()))
+        get = self.points.get
+        found = [get(key) for key in keys]
+        missed = [i for i, face in enumerate(found) if face is None]
+        distinct_faces = np.array([FaceGrid.unknown if face is None else face for face in found], dtype=np.int64)
+        if missed:
+            missed_points = distinct[missed]
+            missed_faces = locate(xs[missed_points], ys[missed_points])
+            distinct_faces[missed] = missed_faces
+            put = self.points.put
+            for i, face in zip(missed, missed_faces.tolist()):
+                put(keys[i], face)
+        self.misses += len(missed)
+        self.hits += len(rest) - len(missed)
+        faces[order] = distinct_faces[groups]
+        return faces
@@ -0,0 +1,63 @@
+"""
+Binary columnar input: the content of the JSON input as one typed column per field, see `write_columns`.
+Vertex and point coordinates are int64, or float64 if some of them are floats; edge fields are int32
+"""
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from dcel import DCEL
+from dcel.coordinates import get_coordinate_array
+from dcel.dcel import EDGE_FIELDS
+from slab.columns import map_columns, write_columns
+
+MAGIC = b'SLABIN01'
+
+
+def _coordinate_column(values: Sequence) -> array:
+    column = get_coordinate_array(values)
+    if column.dtype == object:
+        raise Exception('Coordinates do not fit int64 or float64')
+    return array('d' if column.dtype == np.float64 else 'q', column.tobytes())
+
+
+def write_input(path: str, pslg: Dict[str, List[dict]], points: List[dict]):
+    """
+    Writes the content of the JSON input: `pslg` with `vertexes` and `edges`, and `points`
+    """
+    vertexes, edges = pslg['vertexes'], pslg['edges']
+    columns = {b'xs': _coordinate_column([vertex['x'] for vertex in vertexes]),
+               b'ys': _coordinate_column([vertex['y'] for vertex in vertexes])}
+    columns.update((field.encode(), array('i', (edge[field] for edge in edges))) for field in EDGE_FIELDS)
+    columns[b'points.x'] = _coordinate_column([point['x'] for point in points])
+    columns[b'points.y'] = _coordinate_column([point['y'] for point in points])
+    write_columns(path, MAGIC, columns)
+
+
+class ColumnarInput:
+    """
+    Columns of a file written by `write_input`, mapped into memory
+    """
+    columns: Dict[bytes, memoryview]
+
+    def __init__(self, path: str):
+        try:
+            self.columns = map_columns(path, MAGIC)
+            missing = {b'xs', b'ys', b'points.x', b'points.y'}.union(field.encode() for field in EDGE_FIELDS) - \
+                set(self.columns)
+            if missing:
+                raise ValueError
+        except ValueError:
+            raise Exception(f"Incorrect input file '{path}'")
+
+    def get_dcel(self, stats=None) -> DCEL:
+        return DCEL.from_columns(self.columns[b'xs'], self.columns[b'ys'],
+                                 *(self.columns[field.encode()] for field in EDGE_FIELDS), stats=stats)
+
+    def get_points(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: x and y coordinates of the query points
+        """
+        return tuple(np.frombuffer(self.columns[name], dtype=np.float64 if self.columns[name].format == 'd'
+                                   else np.int64) for name in (b'points.x', b'points.y'))
@@ -0,0 +1,58 @@
+"""
+Binary files of named typed columns: a header with the magic and the table of sections followed by the raw data
+of every column, aligned so that a mapped file can be viewed as typed arrays in place
+"""
+import mmap
+import struct
+from typing import Dict, Sequence
+
+HEADER_FORMAT = '<8sQ'
+SECTION_FORMAT = '<16s4sQQ'
+ALIGNMENT = 8
+
+
+def write_columns(path: str, magic: bytes, columns: Dict[bytes, Sequence]):
+    """
+    :param columns: typed buffers by name, e.g. arrays or memoryviews
+    """
+    offset = struct.calcsize(HEADER_FORMAT) + len(columns) * struct.calcsize(SECTION_FORMAT)
+    table = []
+    for name, column in columns.items():
+        view = memoryview(column)
+        offset += -offset % ALIGNMENT
+        table.append((name, view, offset))
+        offset += view.nbytes
+    with open(path, 'wb') as output_file:
+        output_file.write(struct.pack(HEADER_FORMAT, magic, len(table)))
+        for name, view, offset in table:
+            output_file.write(struct.pack(SECTION_FORMAT, name, view.format.encode(), offset, len(view)))
+        for name, view, offset in table:
+            output_file.write(b'\0' * (offset - output_file.tell()))
+            output_file.write(view)
+
+
+def map_columns(path: str, magic: bytes) -> Dict[bytes, memoryview]:
+    """
+    Maps a file written by `write_columns` into memory, columns are read-only views on the mapped pages
+
+    :raise ValueError: if the file is not a file of columns with the given magic
+    """
+    header_size = struct.calcsize(HEADER_FORMAT)
+    section_size = struct.calcsize(SECTION_FORMAT)
+    try:
+        with open(path, 'rb') as input_file:
+            view = memoryview(mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ))
+        file_magic, sections_count = struct.unpack_from(HEADER_FORMAT, view)
+        if file_magic != magic:
+            raise ValueError
+        columns = {}
+        for i in range(sections_count):
+            name, typecode, offset, length = struct.unpack_from(SECTION_FORMAT, view, header_size + i * section_size)
+            typecode = typecode.rstrip(b'\0').decode()
+            column = view[offset:offset + length * struct.calcsize(typecode)].cast(typecode)
+            if len(column) != length:
+                raise ValueError
+            columns[name.rstrip(b'\0')] = column
+        return columns
+    except (struct.error, TypeError, UnicodeDecodeError):
+        raise ValueError
@@ -0,0 +1,813 @@
+import bisect
+import sys
+from array import array
+from contextlib import nullcontext
+from fractions import Fraction
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Type
+
+import numpy as np
+
+from dcel import DCEL, Point
+from dcel.coordinates import Coordinate, FLOAT_EXACT_LIMIT, get_coordinate_array, is_float_exact
+from slab.buckets import BandBuckets
+from slab.cache import QueryCache
+from slab.columns import map_columns, write_columns
+from slab.lazy import LazySlabs
+from slab.rbtree import FrozenRBTree
+from slab.stats import Stats
+from slab.utils import get_filtered_areas, get_orientation
+
+
+class SlabIndex:
+    """
+    Query-only form of the slab structure: vertex coordinates, edges with faces, lines and the frozen tree.
+    All columns are typed buffers, so an index can be saved to a file and mapped back without a rebuild,
+    except the coordinates of a PSLG with fraction coordinates and the integer columns with values beyond int64,
+    which are kept in lists.
+    An index with `lazy_slabs` builds the versions of the tree for the bands that queries land in, see `LazySlabs`.
+    An index with `query_cache` answers repeated locations from it, see `set_query_cache`.
+    """
+    magic = b'SLABIDX2'
+    coherent_run = 32
+    query_modes = ('int64', 'float64', 'object')
+    # the line coefficient c is a product of two coordinates, so int64 is exact only for moderate coordinates
+    int64_limit = 2 ** 30
+    int64_range = (-2 ** 63, 2 ** 63 - 1)
+
+    xs: Sequence[Coordinate]
+    ys: Sequence[Coordinate]
+    v1: Sequence[int]
+    v2: Sequence[int]
+    f1: Sequence[int]
+    f2: Sequence[int]
+    lines: Sequence[Coordinate]
+    tree: FrozenRBTree
+    coordinate_type: Type[Coordinate]
+    stats: Stats
+    band_buckets: BandBuckets
+    lazy_slabs: LazySlabs
+    query_cache: QueryCache
+    _native_mode: str
+    _query_arrays: Dict[str, Dict[str, np.ndarray]]
+    _line_coefficients: Tuple[Sequence[Coordinate], Sequence[Coordinate], Sequence[Coordinate]]
+
+    def __init__(self, xs: Sequence[Coordinate], ys: Sequence[Coordinate], v1: Sequence[int], v2: Sequence[int],
+                 f1: Sequence[int], f2: Sequence[int], lines: Sequence[Coordinate], tree: FrozenRBTree):
+        self.xs = xs
+        self.ys = ys
+        self.v1 = v1
+        self.v2 = v2
+        self.f1 = f1
+        self.f2 = f2
+        self.lines = lines
+        self.tree = tree
+        if isinstance(xs, list):
+            self.coordinate_type = int if all(type(value) is int for column in (xs, ys) for value in column) \
+                else Fraction
+        else:
+            self.coordinate_type = float if memoryview(xs).format == 'd' else int
+        self.stats = None
+        self.band_buckets = None
+        self.lazy_slabs = None
+        self.query_cache = None
+        self._native_mode = None
+        self._query_arrays = None
+        self._line_coefficients = None
+
+    @staticmethod
+    def _new_coordinate_column(coordinate_type: Type[Coordinate],
+                               values: Iterable[Coordinate]) -> Sequence[Coordinate]:
+        """
+        Typed column for integer and float coordinates, list for fraction ones and for integers beyond int64
+        """
+        if coordinate_type is float:
+            return array('d', values)
+        values = list(values)
+        if coordinate_type is Fraction or not SlabIndex._fits_int64(values):
+            return values
+        return array('q', values)
+
+    @classmethod
+    def _fits_int64(cls, values: Sequence[int]) -> bool:
+        low, high = cls.int64_range
+        return not values or low <= min(values) and max(values) <= high
+
+    @classmethod
+    def _extend_coordinate_column(cls, column: Sequence[Coordinate],
+                                  values: List[Coordinate]) -> Sequence[Coordinate]:
+        """
+        Appends coordinates to a column, an integer column that can not hold them is turned into a list
+        """
+        if isinstance(column, array) and column.typecode == 'q' and not cls._fits_int64(values):
+            column = column.tolist()
+        column.extend(values)
+        return column
+
+    @classmethod
+    def from_dcel(cls, dcel: DCEL, lines: List[Coordinate], tree: FrozenRBTree) -> 'SlabIndex':
+        coordinate_type = dcel.coordinate_type
+        return cls(cls._new_coordinate_column(coordinate_type, (vertex.x for vertex in dcel.vertexes)),
+                   cls._new_coordinate_column(coordinate_type, (vertex.y for vertex in dcel.vertexes)),
+                   array('i', (edge.v1 for edge in dcel.edges)), array('i', (edge.v2 for edge in dcel.edges)),
+                   array('i', (edge.f1 for edge in dcel.edges)), array('i', (edge.f2 for edge in dcel.edges)),
+                   cls._new_coordinate_column(coordinate_type, lines), tree)
+
+    def update(self, dcel: DCEL, edge_indices: Iterable[int], lines: List[Coordinate], tree: FrozenRBTree):
+        """
+        Brings the columns of an index built by `from_dcel` in line with a changed DCEL:
+        appends new vertexes and rewrites only the given edges, a deleted edge gets no faces
+        """
+        self.reset_query_arrays()
+        new_vertexes = dcel.vertexes[len(self.xs):]
+        self.xs = self._extend_coordinate_column(self.xs, [vertex.x for vertex in new_vertexes])
+        self.ys = self._extend_coordinate_column(self.ys, [vertex.y for vertex in new_vertexes])
+        missing = len(dcel.edges) - len(self.v1)
+        self.v1.extend([0] * missing)
+        self.v2.extend([0] * missing)
+        self.f1.extend([-1] * missing)
+        self.f2.extend([-1] * missing)
+        for edge_index in edge_indices:
+            edge = dcel.edges[edge_index]
+            if edge is None:
+                self.v1[edge_index] = self.v2[edge_index] = 0
+                self.f1[edge_index] = self.f2[edge_index] = -1
+            else:
+                self.v1[edge_index], self.v2[edge_index] = edge.v1, edge.v2
+                self.f1[edge_index], self.f2[edge_index] = edge.f1, edge.f2
+        self.lines = self._new_coordinate_column(self.coordinate_type, lines)
+        self.tree = tree
+        if self.band_buckets is not None:
+            self.set_band_buckets(self.band_buckets.mode)
+        if self.query_cache is not None:
+            cache = self.query_cache
+            self.set_query_cache(cache.max_bytes, cache.policy, cache.grid.size if cache.grid is not None else 0)
+
+    def reset_query_arrays(self):
+        """
+        Drops the NumPy views on the columns, so the columns can be resized
+        """
+        self._native_mode = None
+        self._query_arrays = None
+        self._line_coefficients = None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Size of the columns, of the arrays computed for queries if they are built already and of the query cache
+        """
+        nbytes = sum(memoryview(column).nbytes if not isinstance(column, list)
+                     else sys.getsizeof(column) + sum(map(sys.getsizeof, column))
+                     for column in self._get_sections().values())
+        if self._query_arrays is not None:
+            nbytes += sum(column.nbytes for arrays in self._query_arrays.values() for column in arrays.values()
+                          if column is not None and column.base is None)
+        if self.query_cache is not None:
+            nbytes += self.query_cache.nbytes
+        return nbytes
+
+    def _get_sections(self) -> Dict[bytes, Sequence[int]]:
+        sections = {
+            b'xs': self.xs, b'ys': self.ys,
+            b'v1': self.v1, b'v2': self.v2, b'f1': self.f1, b'f2': self.f2,
+            b'lines': self.lines,
+        }
+        sections.update((f'tree.{name}'.encode(), column) for name, column in self.tree.get_columns().items())
+        return sections
+
+    @property
+    def is_savable(self) -> bool:
+        """
+        Whether all columns are typed buffers, see `save`
+        """
+        return not any(isinstance(column, list) for column in (self.xs, self.ys, self.lines))
+
+    def save(self, path: str):
+        """
+        Writes all columns to a binary file, see `write_columns`. A lazy index builds all its versions first
+        """
+        if self.coordinate_type is Fraction:
+            raise Exception('An index with fraction coordinates can not be saved')
+        if not self.is_savable:
+            raise Exception(f'An index with integer coordinates beyond the int64 range '
+                            f'[{self.int64_range[0]}, {self.int64_range[1]}] can not be saved')
+        if self.lazy_slabs is not None:
+            self._load_bands(range(len(self.lines)))
+        write_columns(path, self.magic, self._get_sections())
+
+    @classmethod
+    def load(cls, path: str) -> 'SlabIndex':
+        """
+        Maps a file written by `save` into memory, columns are read-only views on the mapped pages
+        """
+        try:
+            sections = map_columns(path, cls.magic)
+            tree = FrozenRBTree(**{name[len(b'tree.'):].decode(): column for name, column in sections.items()
+                                   if name.startswith(b'tree.')})
+            return cls(sections[b'xs'], sections[b'ys'], sections[b'v1'], sections[b'v2'],
+                       sections[b'f1'], sections[b'f2'], sections[b'lines'], tree)
+        except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+            raise Exception(f"Incorrect index file '{path}'")
+
+    def set_band_buckets(self, mode: str = None):
+        """
+        Finds the bands of single points through buckets over the lines (see `BandBuckets`),
+        `None` goes back to the binary search. Buckets need integer coordinates
+        """
+        if mode is not None and self.coordinate_type is not int:
+            raise ValueError('Band buckets need integer coordinates')
+        self.band_buckets = BandBuckets(self.lines, mode) if mode is not None and len(self.lines) else None
+
+    def set_query_cache(self, max_bytes: int = None, policy: str = 'lru', grid_size: int = 0):
+        """
+        Puts a `QueryCache` in front of single and batch queries, `None` removes it.
+        The cache is cleared when the index is updated. The cell centers of its grid are not counted as queries,
+        and a lazy index gets no grid, whose cells would build almost all its chunks
+        """
+        self.query_cache = None
+        if max_bytes is not None:
+            self.query_cache = QueryCache(self, max_bytes, policy, grid_size if self.lazy_slabs is None else 0,
+                                          self._locate_cell_centers)
+
+    def _search_band(self, y: Coordinate) -> int:
+        if self.band_buckets is not None and type(y) is int:
+            return self.band_buckets.search_band(y)
+        lines = self.lines
+        lines_count = len(lines)
+        if lines_count == 0 or y < lines[0] or y > lines[-1]:
+            return -1
+        r = bisect.bisect_left(lines, y)
+        if y == lines[r]:
+            return r if r < lines_count - 1 else lines_count - 2
+        return r - 1
+
+    def _edge_face(self, edge_index: int) -> int:
+        """
+        Face reported for a point on the edge
+        """
+        return self.f2[edge_index] if self.f2[edge_index] != -1 else self.f1[edge_index]
+
+    def _is_float_exact(self) -> bool:
+        """
+        Whether the coordinates of the PSLG are exact doubles
+        """
+        return self.coordinate_type is float or self._get_native_mode() == 'int64'
+
+    def _get_exact_point(self, x: Coordinate, y: Coordinate) -> Tuple[Coordinate, Coordinate, bool]:
+        """
+        Coordinates of a query point for the single search
+
+        :return: the coordinates, doubles if they and the PSLG are exact doubles and the PSLG is not integer,
+                 or if the point is not integer, and integers or fractions otherwise, and whether they are doubles
+        """
+        if type(x) is int and type(y) is int and self.coordinate_type is int:
+            return x, y, False
+        if is_float_exact(x) and is_float_exact(y) and self._is_float_exact():
+            return float(x), float(y), True
+        return (x if isinstance(x, int) else Fraction(x)), (y if isinstance(y, int) else Fraction(y)), False
+
+    def _search_face(self, x: Coordinate, y: Coordinate, band_index: int) -> int:
+        """
+        A point on a vertex is reported by the leftmost edge of the band through it,
+        so the answer does not depend on the shape of the tree.
+        Double coordinates are tested by `get_orientation`, other ones by the exact line coefficients
+        """
+        if self.lazy_slabs is not None:
+            self._load_bands((band_index,))
+        null = self.tree.null
+        left, right, edge_indices = self.tree.left, self.tree.right, self.tree.edge
+        has_mods, mod_version, mod_left, mod_child = \
+            self.tree.has_mods, self.tree.mod_version, self.tree.mod_left, self.tree.mod_child
+        xs, ys, v1, v2 = self.xs, self.ys, self.v1, self.v2
+        x, y, filtered = self._get_exact_point(x, y)
+        a, b, c = self._get_line_coefficients() if not filtered else (None, None, None)
+        node = self.tree.get_root(band_index)
+        vertex_edge_index = null
+        if node == null:
+            return -1
+        while True:
+            edge_index = edge_indices[node]
+            if filtered:
+                area = get_orientation(xs[v1[edge_index]], ys[v1[edge_index]], xs[v2[edge_index]], ys[v2[edge_index]],
+                                       x, y)
+            else:
+                area = a[edge_index] * x + b[edge_index] * y + c[edge_index]
+            if area == 0:
+                if (x != xs[v1[edge_index]] or y != ys[v1[edge_index]]) and \
+                        (x != xs[v2[edge_index]] or y != ys[v2[edge_index]]):
+                    return self._edge_face(edge_index)
+                vertex_edge_index = edge_index
+            if area >= 0:
+                if has_mods and mod_left[node] and mod_version[node] <= band_index:
+                    node = mod_child[node]
+                else:
+                    node = left[node]
+                if node == null:
+                    return self.f1[edge_index] if vertex_edge_index == null else self._edge_face(vertex_edge_index)
+            else:
+                if has_mods and not mod_left[node] and mod_version[node] <= band_index:
+                    node = mod_child[node]
+                else:
+                    node = right[node]
+                if node == null:
+                    return self.f2[edge_index] if vertex_edge_index == null else self._edge_face(vertex_edge_index)
+
+    def locate_point(self, point: Point) -> int:
+        """
+        A point on an edge is located in the face to the right of the edge going up, or in the face to its left
+        if the right one is the outer face. A point on a vertex is located the same way by the leftmost edge
+        that goes up from the vertex, or that comes into it on the top line
+
+        :return: face index, -1 for the outer face
+        """
+        if self.query_cache is not None:
+            return self.query_cache.locate_point(point.x, point.y, self._locate_point)
+        return self._locate_point(point.x, point.y)
+
+    def _locate_point(self, x: Coordinate, y: Coordinate) -> int:
+        if self.stats is not None:
+            return int(self._locate_points(*map(get_coordinate_array, ([x], [y])))[0])
+        band_index = self._search_band(y)
+        if band_index == -1:
+            return -1
+        return self._search_face(x, y, band_index)
+
+    def _iterate_edges(self, band_index: int, is_ahead: Callable[[int], bool],
+                       rightwards: bool) -> Tuple[int, Iterator[int]]:
+        """
+        Edges of the band in order from left to right, or from right to left, starting with the first one
+        that `is_ahead`; the predicate must hold for a suffix of this order
+
+        :return: the last edge before them, `null` if none, and the iterator over the edges
+        """
+        if self.lazy_slabs is not None:
+            self._load_bands((band_index,))
+        tree = self.tree
+        null = tree.null
+        stack = []
+        behind = null
+        node = tree.get_root(band_index)
+        while node != null:
+            if is_ahead(tree.edge[node]):
+                stack.append(node)
+                node = tree.get_child(node, rightwards, band_index)
+            else:
+                behind = tree.edge[node]
+                node = tree.get_child(node, not rightwards, band_index)
+
+        def iterate() -> Iterator[int]:
+            while stack:
+                ahead = stack.pop()
+                yield tree.edge[ahead]
+                child = tree.get_child(ahead, not rightwards, band_index)
+                while child != null:
+                    stack.append(child)
+                    child = tree.get_child(child, rightwards, band_index)
+
+        return behind, iterate()
+
+    def _gap_face(self, behind: int, ahead: int, rightwards: bool) -> int:
+        """
+        Face between two neighbouring edges of a band, either may be `null`
+        """
+        if ahead != self.tree.null:
+            return self.f1[ahead] if rightwards else self.f2[ahead]
+        if behind != self.tree.null:
+            return self.f2[behind] if rightwards else self.f1[behind]
+        return -1
+
+    def _add_crossed_faces(self, faces: List[int], band_index: int, entry: Tuple[int, int, int],
+                           finish: Tuple[int, int, int], dx: int, dy: int, line_y: int = None):
+        """
+        Adds the faces of the band crossed by a piece of a segment in the order of travel
+
+        :param entry: homogeneous coordinates (x * d, y * d, d), d > 0, of the start of the piece
+        :param finish: same for the end of the piece
+        :param dx: direction of the segment
+        :param line_y: y of the line that a horizontal piece lies on, faces that the piece touches only
+                       at a vertex of the line are skipped
+        """
+        a, b, c = self._get_line_coefficients()
+        f1, f2, null = self.f1, self.f2, self.tree.null
+
+        def side(edge_index: int, point: Tuple[int, int, int], sign: int) -> int:
+            """
+            Positive if the point moved a little along `sign * (dx, dy)` is to the left of the edge,
+            a piece along the edge is on the side of the face that `locate_point` reports for it
+            """
+            x, y, d = point
+            area = a[edge_index] * x + b[edge_index] * y + c[edge_index] * d
+            if area == 0:
+                area = sign * (a[edge_index] * dx + b[edge_index] * dy)
+            if area == 0:
+                area = -1 if f2[edge_index] != -1 else 1
+            return area
+
+        # the edges of a band do not cross, so the piece crosses them all in one direction,
+        # which depends on the slopes of the edges and not only on the direction of the segment
+        for rightwards in (True, False):
+            direction = 1 if rightwards else -1
+            behind, edges = self._iterate_edges(
+                band_index, lambda edge_index: side(edge_index, entry, 1) * direction > 0, rightwards)
+            edge_index = next(edges, null)
+            if rightwards:
+                faces.append(self._gap_face(behind, edge_index, rightwards))
+            if edge_index != null and side(edge_index, finish, -1) * direction < 0:
+                break
+        else:
+            return
+        previous_vertex = None
+        while edge_index != null and side(edge_index, finish, -1) * direction < 0:
+            vertex = None
+            if line_y is not None:
+                vertex = next(((self.xs[v], self.ys[v]) for v in (self.v1[edge_index], self.v2[edge_index])
+                               if self.ys[v] == line_y), None)
+                if vertex is not None and vertex == previous_vertex:
+                    faces.pop()
+            faces.append(f2[edge_index] if rightwards else f1[edge_index])
+            previous_vertex = vertex
+            edge_index = next(edges, null)
+
+    @staticmethod
+    def _to_exact(point: Point) -> Point:
+        """
+        Point with integer or fraction coordinates, for the exact line coefficients
+        """
+        if type(point.x) is int and type(point.y) is int:
+            return point
+        return Point(*(value if isinstance(value, int) else Fraction(value) for value in point))
+
+    def get_segment_faces(self, start: Point, end: Point) -> List[int]:
+        """
+        Faces that the segment passes through, in the order of travel and each once: the faces of its ends
+        as given by `locate_point`, and every face whose interior the segment crosses.
+        A part of the segment that runs along an edge counts as a point on the edge.
+        Every band crossed by the segment is searched once from the root of its tree, then its edges are followed
+        as far as the segment goes. The cost is one tree descent per crossed band plus the crossed edges,
+        so it grows with the number of lines in the y range of the segment, not only with the number of faces
+        """
+        faces = [self.locate_point(start)]
+        end_face = self.locate_point(end)
+        start, end = self._to_exact(start), self._to_exact(end)
+        lines = self.lines
+        dx, dy = end.x - start.x, end.y - start.y
+        if dy != 0:
+            first_band = max(bisect.bisect_right(lines, min(start.y, end.y)) - 1, 0)
+            last_band = min(bisect.bisect_left(lines, max(start.y, end.y)) - 1, len(lines) - 2)
+            bands = range(first_band, last_band + 1) if dy > 0 else range(last_band, first_band - 1, -1)
+            sign = 1 if dy > 0 else -1
+
+            def point_at(y: int) -> Tuple[int, int, int]:
+                return (start.x * dy + (y - start.y) * dx) * sign, y * dy * sign, dy * sign
+
+            for band_index in bands:
+                low, high = lines[band_index], lines[band_index + 1]
+                self._add_crossed_faces(faces, band_index, point_at(min(max(start.y, low), high)),
+                                        point_at(min(max(end.y, low), high)), dx, dy)
+        elif dx != 0:
+            band_index = self._search_band(start.y)
+            if band_index != -1:
+                line_y = start.y if start.y in (lines[band_index], lines[band_index + 1]) else None
+                self._add_crossed_faces(faces, band_index, (start.x, start.y, 1), (end.x, end.y, 1), dx, dy, line_y)
+        faces.append(end_face)
+        return list(dict.fromkeys(faces))
+
+    def get_box_faces(self, corner1: Point, corner2: Point) -> List[int]:
+        """
+        Sorted faces whose interior meets the box with the given opposite corners, -1 if the box reaches
+        outside the PSLG. In every band the box overlaps, the edges are followed from the first one
+        that is not entirely to the left of the box to the last one that is not entirely to the right of it,
+        so as for segments the cost is one tree descent per band plus the edges in the box
+        """
+        corner1, corner2 = self._to_exact(corner1), self._to_exact(corner2)
+        x_min, x_max = min(corner1.x, corner2.x), max(corner1.x, corner2.x)
+        y_min, y_max = min(corner1.y, corner2.y), max(corner1.y, corner2.y)
+        if y_min == y_max:
+            return sorted(self.get_segment_faces(Point(x_min, y_min), Point(x_max, y_max)))
+        lines = self.lines
+        faces = set()
+        if len(lines) < 2 or y_min < lines[0] or y_max > lines[-1]:
+            faces.add(-1)
+        a, b, c = self._get_line_coefficients()
+        null = self.tree.null
+        first_band = max(bisect.bisect_right(lines, y_min) - 1, 0)
+        last_band = min(bisect.bisect_left(lines, y_max) - 1, len(lines) - 2)
+        for band_index in range(first_band, last_band + 1):
+            low, high = max(lines[band_index], y_min), min(lines[band_index + 1], y_max)
+            behind, edges = self._iterate_edges(
+                band_index, lambda edge_index: a[edge_index] * x_min + b[edge_index] * low + c[edge_index] > 0 or
+                a[edge_index] * x_min + b[edge_index] * high + c[edge_index] > 0, True)
+            edge_index = next(edges, null)
+            faces.add(self._gap_face(behind, edge_index, True))
+            while edge_index != null and (a[edge_index] * x_max + b[edge_index] * low + c[edge_index] < 0 or
+                                          a[edge_index] * x_max + b[edge_index] * high + c[edge_index] < 0):
+                faces.add(self.f2[edge_index])
+                edge_index = next(edges, null)
+        return sorted(faces)
+
+    def _get_line_coefficients(self) -> Tuple[Sequence[Coordinate], Sequence[Coordinate], Sequence[Coordinate]]:
+        """
+        Exact line coefficients of the edges (see `Edge.set_line`) as sequences of Python ints or fractions
+        for the single search
+        """
+        if self._line_coefficients is None:
+            arrays = self._get_query_arrays('int64' if self._get_native_mode() == 'int64' else 'object')
+            self._line_coefficients = tuple(memoryview(arrays[name]) if arrays[name].dtype == np.int64
+                                            else arrays[name].tolist() for name in ('a', 'b', 'c'))
+        return self._line_coefficients
+
+    def _get_native_mode(self) -> str:
+        """
+        Query mode that fits the coordinates of the PSLG, see `_get_query_arrays`
+        """
+        if self._native_mode is None:
+            if self.coordinate_type is float:
+                self._native_mode = 'float64'
+            elif self.coordinate_type is Fraction or not self.is_savable:
+                self._native_mode = 'object'
+            else:
+                xs, ys = np.frombuffer(self.xs, dtype=np.int64), np.frombuffer(self.ys, dtype=np.int64)
+                self._native_mode = 'object' if len(xs) and \
+                    max(-xs.min(), xs.max(), -ys.min(), ys.max()) >= self.int64_limit else 'int64'
+        return self._native_mode
+
+    def _get_coordinate_arrays(self, mode: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vertex coordinates and lines in the dtype of the query mode
+        """
+        columns = (self.xs, self.ys, self.lines)
+        if self.coordinate_type is Fraction:
+            return tuple(np.array(column, dtype=object) for column in columns)
+        dtype = np.float64 if self.coordinate_type is float else np.int64
+        arrays = tuple(np.array(column, dtype=object) if isinstance(column, list)
+                       else np.frombuffer(column, dtype=dtype) for column in columns)
+        if mode == 'object':
+            if self.coordinate_type is float:
+                return tuple(np.array([Fraction(value) for value in array.tolist()], dtype=object) for array in arrays)
+            return tuple(array.astype(object) for array in arrays)
+        return tuple(array.astype(np.float64) if mode == 'float64' else array for array in arrays)
+
+    def _get_tree_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'left': np.frombuffer(self.tree.left, dtype=np.int32),
+            'right': np.frombuffer(self.tree.right, dtype=np.int32),
+            'edge': np.frombuffer(self.tree.edge, dtype=np.int32),
+            'roots': np.frombuffer(self.tree.roots, dtype=np.int32),
+            'mod_version': np.frombuffer(self.tree.mod_version, dtype=np.int32) if self.tree.has_mods else None,
+            'mod_left': np.frombuffer(self.tree.mod_left, dtype=np.int8).astype(bool) if self.tree.has_mods else None,
+            'mod_child': np.frombuffer(self.tree.mod_child, dtype=np.int32) if self.tree.has_mods else None,
+        }
+
+    def _load_bands(self, band_indices: Iterable[int]):
+        """
+        Builds the versions of the given bands of a lazy index that are not built yet. The nodes are appended
+        to the tree columns, so the NumPy views on them are dropped first and the query arrays get new ones
+        """
+        chunks = self.lazy_slabs.get_missing_chunks(band_indices)
+        if not chunks:
+            return
+        with self.stats.phase('lazy_build') if self.stats is not None else nullcontext():
+            query_arrays = (self._query_arrays or {}).values()
+            for arrays in query_arrays:
+                arrays.update(left=None, right=None, edge=None, roots=None)
+            for chunk in chunks:
+                self.lazy_slabs.build_chunk(chunk, self.tree)
+            if query_arrays:
+                tree_arrays = self._get_tree_arrays()
+                for arrays in query_arrays:
+                    arrays.update(tree_arrays)
+
+    def _get_query_arrays(self, mode: str = None) -> Dict[str, np.ndarray]:
+        """
+        Views the columns as NumPy arrays for one of `query_modes`, by default for the mode that fits the PSLG.
+        In the 'int64' and 'object' modes the line coefficients of the edges are computed, so the side of a point
+        is found by two products: `a * x + b * y + c`, in int64 for moderate integer coordinates and with exact
+        Python numbers otherwise. In the 'float64' mode the side is found from the coordinates of the edge ends
+        by the filtered test of `get_filtered_areas`
+        """
+        if self._query_arrays is None:
+            self._query_arrays = {}
+        mode = mode or self._get_native_mode()
+        if mode in self._query_arrays:
+            return self._query_arrays[mode]
+        xs, ys, lines = self._get_coordinate_arrays(mode)
+        v1 = np.frombuffer(self.v1, dtype=np.int32)
+        v2 = np.frombuffer(self.v2, dtype=np.int32)
+        tree_arrays = next(iter(self._query_arrays.values()), None) or {
+            **self._get_tree_arrays(),
+            'v1': v1, 'v2': v2,
+            'f1': np.frombuffer(self.f1, dtype=np.int32),
+            'f2': np.frombuffer(self.f2, dtype=np.int32),
+        }
+        arrays = {name: tree_arrays[name] for name in ('left', 'right', 'edge', 'roots', 'mod_version', 'mod_left',
+                                                       'mod_child', 'v1', 'v2', 'f1', 'f2')}
+        arrays.update(lines=lines, xs=xs, ys=ys)
+        if mode == 'float64':
+            arrays.update(x1=xs[v1], y1=ys[v1], x2=xs[v2], y2=ys[v2])
+        else:
+            arrays.update(a=ys[v1] - ys[v2], b=xs[v2] - xs[v1], c=xs[v1] * ys[v2] - ys[v1] * xs[v2])
+        self._query_arrays[mode] = arrays
+        return arrays
+
+    def _get_query_mode(self, xs: np.ndarray, ys: np.ndarray) -> str:
+        """
+        Query mode for a batch given by `get_coordinate_array`: int64 if the PSLG and the points are moderate
+        integers, float64 if they all are exact doubles, object otherwise. Every column is checked by its own
+        dtype, so integers beyond the exact doubles are not rounded next to a float column
+        """
+        native_mode = self._get_native_mode()
+        if native_mode == 'object' or xs.dtype == object or ys.dtype == object:
+            return 'object'
+        limits = [max(-int(values.min()), int(values.max())) if len(values) else 0
+                  for values in (xs, ys) if values.dtype == np.int64]
+        if any(limit > FLOAT_EXACT_LIMIT for limit in limits):
+            return 'object'
+        if native_mode == 'int64' and len(limits) == 2 and max(limits) < self.int64_limit:
+            return 'int64'
+        return 'float64'
+
+    @staticmethod
+    def _convert_queries(values: np.ndarray, mode: str) -> np.ndarray:
+        if values.dtype == mode:
+            return values
+        if mode == 'float64':
+            return values.astype(np.float64)
+        if values.dtype == np.float64:
+            return np.array([Fraction(value) for value in values.tolist()], dtype=object)
+        return values.astype(object)
+
+    @staticmethod
+    def _get_areas(arrays: Dict[str, np.ndarray], edge_indices: np.ndarray, xs: np.ndarray,
+                   ys: np.ndarray) -> np.ndarray:
+        """
+        Signed areas of the points against their edges, or numbers of the same sign in the float64 mode
+        """
+        if 'a' in arrays:
+            return arrays['a'][edge_indices] * xs + arrays['b'][edge_indices] * ys + arrays['c'][edge_indices]
+        return get_filtered_areas(arrays['x1'][edge_indices], arrays['y1'][edge_indices],
+                                  arrays['x2'][edge_indices], arrays['y2'][edge_indices], xs, ys)
+
+    @staticmethod
+    def _search_bands(ys: np.ndarray, lines: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of `_search_band`
+        """
+        lines_count = len(lines)
+        if lines_count == 0:
+            return np.full(len(ys), -1, dtype=np.int64)
+        r = np.searchsorted(lines, ys, side='left')
+        on_line = np.zeros(len(ys), dtype=bool)
+        inside = r < lines_count
+        on_line[inside] = lines[r[inside]] == ys[inside]
+        bands = np.where(on_line, np.minimum(r, lines_count - 2), np.maximum(r - 1, 0))
+        bands[(ys < lines[0]) | (ys > lines[-1])] = -1
+        return bands
+
+    @staticmethod
+    def _is_vertex(arrays: Dict[str, np.ndarray], edge_indices: np.ndarray, xs: np.ndarray,
+                   ys: np.ndarray) -> np.ndarray:
+        """
+        Whether every point is an endpoint of its edge
+        """
+        v1, v2 = arrays['v1'][edge_indices], arrays['v2'][edge_indices]
+        return ((xs == arrays['xs'][v1]) & (ys == arrays['ys'][v1])) | \
+            ((xs == arrays['xs'][v2]) & (ys == arrays['ys'][v2]))
+
+    def _walk(self, arrays: Dict[str, np.ndarray], xs: np.ndarray, ys: np.ndarray, bands: np.ndarray,
+              with_trapezoids: bool = False, depths: np.ndarray = None) -> Tuple[np.ndarray, ...]:
+        """
+        Descends the trees of the bands for all points in lockstep
+
+        :param with_trapezoids: also return for every point the edges to its left and to its right in the band,
+                                `null` for none, and whether the point lies strictly between them
+        :param depths: array that gets the number of nodes visited by every point
+        :return: array of face indices, and arrays of left edges, right edges and flags with `with_trapezoids`
+        """
+        if self.lazy_slabs is not None:
+            self._load_bands(np.unique(bands[bands != -1]).tolist())
+        faces = np.full(len(xs), -1, dtype=np.int64)
+        if with_trapezoids:
+            left_edges = np.full(len(xs), -1, dtype=np.int64)
+            right_edges = np.full(len(xs), -1, dtype=np.int64)
+            inside = np.ones(len(xs), dtype=bool)
+        active = np.flatnonzero(bands != -1)
+        versions = bands[active]
+        nodes = arrays['roots'][versions]
+        active, versions, nodes = active[nodes != -1], versions[nodes != -1], nodes[nodes != -1]
+        vertex_edges = np.full(len(active), -1, dtype=np.int64)
+        depth = 0
+        while len(active):
+            depth += 1
+            edge_indices = arrays['edge'][nodes]
+            x, y = xs[active], ys[active]
+            areas = self._get_areas(arrays, edge_indices, x, y)
+            f1, f2 = arrays['f1'][edge_indices], arrays['f2'][edge_indices]
+
+            on_line = areas == 0
+            on_vertex = on_line.copy()
+            on_vertex[on_line] = self._is_vertex(arrays, edge_indices[on_line], x[on_line], y[on_line])
+            on_edge = on_line & ~on_vertex
+            faces[active[on_edge]] = np.where(f2[on_edge] != -1, f2[on_edge], f1[on_edge])
+            vertex_edges[on_vertex] = edge_indices[on_vertex]
+            go_left = areas >= 0
+            if with_trapezoids:
+                right_edges[active[go_left]] = edge_indices[go_left]
+                left_edges[active[~go_left]] = edge_indices[~go_left]
+                inside[active[on_line]] = False
+            next_nodes = np.where(go_left, arrays['left'][nodes], arrays['right'][nodes])
+            if arrays['mod_version'] is not None:
+                modified = (arrays['mod_version'][nodes] <= versions) & (arrays['mod_left'][nodes] == go_left)
+                next_nodes = np.where(modified, arrays['mod_child'][nodes], next_nodes)
+            leaf = ~on_edge & (next_nodes == -1)
+            leaf_faces = np.where(go_left[leaf], f1[leaf], f2[leaf])
+            leaf_vertex_edges = vertex_edges[leaf]
+            at_vertex = leaf_vertex_edges != -1
+            vertex_f1 = arrays['f1'][leaf_vertex_edges[at_vertex]]
+            vertex_f2 = arrays['f2'][leaf_vertex_edges[at_vertex]]
+            leaf_faces[at_vertex] = np.where(vertex_f2 != -1, vertex_f2, vertex_f1)
+            faces[active[leaf]] = leaf_faces
+
+            proceed = ~on_edge & ~leaf
+            if depths is not None:
+                depths[active[~proceed]] = depth
+            active, versions, nodes = active[proceed], versions[proceed], next_nodes[proceed]
+            vertex_edges = vertex_edges[proceed]
+        if with_trapezoids:
+            return faces, left_edges, right_edges, inside
+        return faces,
+
+    def locate_points(self, xs: Sequence[Coordinate], ys: Sequence[Coordinate], coherent: bool = False) -> np.ndarray:
+        """
+        Locates a batch of points given by coordinate arrays, the result matches `locate_point` for every point
+
+        :param coherent: a hint that consecutive points are close to each other, e.g. points of a trajectory,
+                         see `_locate_coherent_points`. The points are taken in the given order
+        :return: array of face indices
+        """
+        xs, ys = get_coordinate_array(xs), get_coordinate_array(ys)
+        if len(xs) == 0:
+            return np.full(0, -1, dtype=np.int64)
+        if self.query_cache is not None:
+            return self.query_cache.locate_points(xs, ys, lambda xs, ys: self._locate_points(xs, ys, coherent))
+        return self._locate_points(xs, ys, coherent)
+
+    def _locate_points(self, xs: np.ndarray, ys: np.ndarray, coherent: bool = False) -> np.ndarray:
+        """
+        `locate_points` for coordinate arrays given by `get_coordinate_array`
+        """
+        mode = self._get_query_mode(xs, ys)
+        arrays = self._get_query_arrays(mode)
+        xs, ys = self._convert_queries(xs, mode), self._convert_queries(ys, mode)
+        if coherent:
+            return self._locate_coherent_points(arrays, xs, ys)
+        depths = np.zeros(len(xs), dtype=np.int64) if self.stats is not None else None
+        faces = self._walk(arrays, xs, ys, self._search_bands(ys, arrays['lines']), depths=depths)[0]
+        if depths is not None:
+            self.stats.add_queries(depths)
+        return faces
+
+    def _locate_cell_centers(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        `_locate_points` for the cell centers of the grid of the query cache, without statistics
+        """
+        mode = self._get_query_mode(xs, ys)
+        arrays = self._get_query_arrays(mode)
+        xs, ys = self._convert_queries(xs, mode), self._convert_queries(ys, mode)
+        return self._walk(arrays, xs, ys, self._search_bands(ys, arrays['lines']))[0]
+
+    def _locate_coherent_points(self, arrays: Dict[str, np.ndarray], xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Consecutive points of a coherent batch mostly fall into the same trapezoid of a band: between the same
+        two edges. Only the first point of every run of `coherent_run` points within a band descends the tree,
+        the other points of the run check the two edges around it and descend only if they are not strictly
+        between them. The order of the points is not changed: a point that misses the trapezoid of its run
+        descends the tree from the root, so sorting random points does not pay off
+        """
+        bands = self._search_bands(ys, arrays['lines'])
+        positions = np.arange(len(xs))
+        is_leader = positions % self.coherent_run == 0
+        is_leader[1:] |= bands[1:] != bands[:-1]
+        leaders = np.flatnonzero(is_leader)
+        depths = np.zeros(len(xs), dtype=np.int64) if self.stats is not None else None
+        leader_depths = depths[leaders] if depths is not None else None
+        leader_faces, left_edges, right_edges, inside = self._walk(arrays, xs[leaders], ys[leaders], bands[leaders],
+                                                                   with_trapezoids=True, depths=leader_depths)
+
+        followers = np.flatnonzero(~is_leader)
+        runs = (np.cumsum(is_leader) - 1)[followers]
+        x, y = xs[followers], ys[followers]
+        hits = inside[runs]
+        for edges, sign in ((left_edges[runs], -1), (right_edges[runs], 1)):
+            areas = self._get_areas(arrays, edges, x, y)
+            hits &= (edges == -1) | (areas * sign > 0)
+
+        faces = np.empty(len(xs), dtype=np.int64)
+        faces[leaders] = leader_faces
+        faces[followers[hits]] = leader_faces[runs[hits]]
+        misses = followers[~hits]
+        miss_depths = np.zeros(len(misses), dtype=np.int64) if depths is not None else None
+        faces[misses] = self._walk(arrays, xs[misses], ys[misses], bands[misses], depths=miss_depths)[0]
+        if depths is not None:
+            depths[leaders] = leader_depths
+            depths[misses] = miss_depths
+            self.stats.add_queries(depths)
+        return faces
@@ -0,0 +1,95 @@
+from typing import Iterable, List
+
+import numpy as np
+
+from slab.rbtree import FrozenRBTree, RBTree
+
+
+class LazySlabs:
+    """
+    Versions of the slab tree built on demand for sparse query workloads. The lines are set up front, and the versions
+    are built in chunks of `chunk_size` consecutive lines the first time a query lands in one of their bands:
+    the sweep starts from a checkpoint, the edges of the band under the first line of the chunk, and replays only
+    the vertexes of the chunk. The checkpoints of all chunks are found in one vectorized pass over the edges,
+    so the startup is linear and the build time and the memory of the tree grow with the queried chunks only.
+    Answers are the same as the ones of the eager build.
+
+    Nodes of a chunk are appended to the columns of the frozen tree of the index, which needs path copying
+    """
+    chunk_size: int
+    starts: List[int]
+    built: bytearray
+
+    def __init__(self, search_system, chunk_size: int):
+        """
+        :param search_system: search system with sorted vertexes, its DCEL and edge order are used for the sweep
+        :param chunk_size: number of lines per chunk
+        """
+        if chunk_size < 1:
+            raise ValueError('Chunk size must be positive')
+        self.search_system = search_system
+        self.chunk_size = chunk_size
+        self.starts = search_system._get_line_starts()
+        chunks_count = -(-len(self.starts) // chunk_size)
+        self.built = bytearray(chunks_count)
+        self._edge_index_by_id = None
+        self._init_checkpoints()
+
+    def _init_checkpoints(self):
+        """
+        An edge with its lower vertex on line `lo` and its upper one on line `hi` belongs to the checkpoints of
+        the chunks whose first line `l` has `lo < l <= hi`. Checkpoints are stored as one column of edge indices
+        sorted by chunk and the offsets of the chunks in it
+        """
+        dcel = self.search_system.dcel
+        vertex_lines = np.empty(len(dcel.vertexes), dtype=np.int64)
+        is_start = np.zeros(len(dcel.vertexes), dtype=np.int64)
+        is_start[self.starts] = 1
+        vertex_lines[self.search_system._sorted_vertex_indexes] = np.cumsum(is_start) - 1
+        edges_count = len(dcel.edges)
+        lo = vertex_lines[np.fromiter((edge.v1 for edge in dcel.edges), dtype=np.int64, count=edges_count)]
+        hi = vertex_lines[np.fromiter((edge.v2 for edge in dcel.edges), dtype=np.int64, count=edges_count)]
+        first_chunks = lo // self.chunk_size + 1
+        counts = hi // self.chunk_size + 1 - first_chunks
+        edge_indices = np.repeat(np.arange(edges_count), counts)
+        chunks = np.repeat(first_chunks - np.cumsum(counts) + counts, counts) + np.arange(len(edge_indices))
+        order = np.argsort(chunks, kind='stable')
+        self._checkpoint_edges = edge_indices[order].astype(np.int32)
+        self._checkpoint_offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(chunks, minlength=len(self.built))[:len(self.built)])))
+
+    @property
+    def built_count(self) -> int:
+        return sum(self.built)
+
+    def get_missing_chunks(self, band_indices: Iterable[int]) -> List[int]:
+        """
+        Chunks of the given bands whose versions are not built yet
+        """
+        chunk_size, built = self.chunk_size, self.built
+        return sorted({band_index // chunk_size for band_index in band_indices if not built[band_index // chunk_size]})
+
+    def build_chunk(self, chunk: int, tree: FrozenRBTree):
+        """
+        Sweeps the lines of the chunk from its checkpoint and appends the compiled versions to the columns of `tree`,
+        which must be resizable arrays without exported buffers, and sets the roots of the lines of the chunk
+        """
+        search_system = self.search_system
+        edges = search_system.dcel.edges
+        if self._edge_index_by_id is None:
+            self._edge_index_by_id = {id(edge): edge_index for edge_index, edge in enumerate(edges)}
+        first_line = chunk * self.chunk_size
+        end_line = min(first_line + self.chunk_size, len(self.starts))
+        end = self.starts[end_line] if end_line < len(self.starts) else len(search_system._sorted_ys)
+
+        chunk_tree = RBTree(search_system.edge_compare)
+        checkpoint = self._checkpoint_edges[self._checkpoint_offsets[chunk]:self._checkpoint_offsets[chunk + 1]]
+        for edge_index in checkpoint.tolist():
+            chunk_tree.insert(edges[edge_index])
+        i = self.starts[first_line]
+        while i < end:
+            chunk_tree.increase_version()
+            i = search_system._sweep_group(chunk_tree, i, end)
+        part = chunk_tree.freeze(lambda edge: self._edge_index_by_id[id(edge)], range(1, chunk_tree.version + 1), tree)
+        tree.roots[first_line:end_line] = part.roots
+        self.built[chunk] = 1
@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import tempfile
+from multiprocessing.pool import Pool
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+from slab.index import SlabIndex
+from slab.rbtree import FrozenRBTree
+from slab.stats import Stats
+from slab.trapezoid import TrapezoidMap
+
+_worker_index: Union[SlabIndex, TrapezoidMap] = None
+_worker_system = None
+
+
+def _init_worker(index: Union[SlabIndex, TrapezoidMap, str], collect_stats: bool):
+    global _worker_index
+    _worker_index = SlabIndex.load(index) if isinstance(index, str) else index
+    if isinstance(_worker_index, SlabIndex):
+        _worker_index.stats = Stats() if collect_stats else None
+
+
+def _locate(index: Union[SlabIndex, TrapezoidMap], xs: np.ndarray, ys: np.ndarray, coherent: bool) -> np.ndarray:
+    if not coherent:
+        return index.locate_points(xs, ys)
+    return index.locate_points(xs, ys, coherent)
+
+
+def _locate_chunk(chunk: Tuple[np.ndarray, np.ndarray, bool]) -> Tuple[np.ndarray, Stats]:
+    """
+    :return: faces and the query statistics of the chunk if they are collected
+    """
+    stats = getattr(_worker_index, 'stats', None)
+    if stats is not None:
+        stats = _worker_index.stats = Stats()
+    return _locate(_worker_index, *chunk), stats
+
+
+def _init_builder(search_system):
+    global _worker_system
+    _worker_system = search_system
+
+
+def _build_slab_range(bounds: Tuple[int, int]) -> FrozenRBTree:
+    return _worker_system._build_slab_range(*bounds)
+
+
+def build_slab_ranges(search_system, ranges: List[Tuple[int, int]], workers: int) -> List[FrozenRBTree]:
+    """
+    Builds ranges of slabs of a search system over a process pool, see `SearchSystem._init_slabs_parallel`.
+    With the fork start method workers inherit the DCEL, otherwise the search system is pickled once per worker
+    """
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    with context.Pool(min(workers, len(ranges)), initializer=_init_builder, initargs=(search_system,)) as pool:
+        return pool.map(_build_slab_range, ranges, chunksize=1)
+
+
+class ParallelLocator:
+    """
+    Locates batches of points over a process pool that shares one read-only index.
+    With the fork start method workers inherit the index pages, otherwise a slab index is saved to a temporary file
+    that every worker maps and a trapezoid map or a slab index that can not be saved is pickled once per worker,
+    so the index is never pickled per task.
+    """
+    min_chunk_size = 4096
+    chunks_per_worker = 4
+
+    index: Union[SlabIndex, TrapezoidMap]
+    workers: int
+    coherent: bool
+
+    def __init__(self, index: Union[SlabIndex, TrapezoidMap], workers: int, coherent: bool = False):
+        """
+        :param coherent: see `SlabIndex.locate_points`, every chunk is handled on its own
+        """
+        self.index = index
+        self.workers = workers
+        self.coherent = coherent
+        self._pool = None
+        self._index_path = None
+
+    def __enter__(self) -> 'ParallelLocator':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_pool(self) -> Pool:
+        if self._pool is None:
+            if 'fork' in multiprocessing.get_all_start_methods():
+                # gathered query arrays are built before forking, so that workers share them too
+                self.index._get_query_arrays()
+                context, shared_index = multiprocessing.get_context('fork'), self.index
+            elif not isinstance(self.index, SlabIndex) or not self.index.is_savable:
+                context, shared_index = multiprocessing.get_context(), self.index
+            else:
+                context = multiprocessing.get_context()
+                descriptor, self._index_path = tempfile.mkstemp(suffix='.bin')
+                os.close(descriptor)
+                self.index.save(self._index_path)
+                shared_index = self._index_path
+            collect_stats = getattr(self.index, 'stats', None) is not None
+            self._pool = context.Pool(self.workers, initializer=_init_worker, initargs=(shared_index, collect_stats))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self._index_path is not None:
+            os.remove(self._index_path)
+            self._index_path = None
+
+    def locate_points(self, xs: Sequence[int], ys: Sequence[int]) -> np.ndarray:
+        """
+        Same as `locate_points` of the index, the points are split into contiguous chunks that keep the input order
+        """
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        points_count = len(xs)
+        if self.workers <= 1 or points_count <= self.min_chunk_size:
+            return _locate(self.index, xs, ys, self.coherent)
+        chunk_size = max(self.min_chunk_size, -(-points_count // (self.workers * self.chunks_per_worker)))
+        chunks = [(xs[i:i + chunk_size], ys[i:i + chunk_size], self.coherent)
+                  for i in range(0, points_count, chunk_size)]
+        results = self._get_pool().map(_locate_chunk, chunks)
+        for _, stats in results:
+            if stats is not None:
+                self.index.stats.merge(stats)
+        return np.concatenate([faces for faces, _ in results])
@@ -1,2 +1,4 @@
+from .frozen import FrozenRBTree
 from .node import RBNode
+from .node_copying import NCNode, NodeCopyingRBTree
 from .tree import RBTree
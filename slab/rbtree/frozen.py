@@ -0,0 +1,96 @@
+from array import array
+from typing import List, Sequence
+
+import numpy as np
+
+
+class FrozenRBTree:
+    """
+    Read-only form of the persistent tree compiled into typed arrays.
+    Every node is an index into `left`, `right` and `edge`, nodes shared between versions are stored once.
+    Columns are int32 buffers such as `array('i')` or a memoryview on a mapped file.
+
+    A tree compiled from node copying also has modification columns: from version `mod_version` on,
+    the left child (if `mod_left`) or the right child of the node is `mod_child`.
+    """
+    null = -1
+    no_mod = 2 ** 31 - 1
+    left: Sequence[int]
+    right: Sequence[int]
+    edge: Sequence[int]
+    roots: Sequence[int]
+    mod_version: Sequence[int]
+    mod_left: Sequence[int]
+    mod_child: Sequence[int]
+
+    def __init__(self, left: Sequence[int], right: Sequence[int], edge: Sequence[int], roots: Sequence[int],
+                 mod_version: Sequence[int] = None, mod_left: Sequence[int] = None, mod_child: Sequence[int] = None):
+        """
+        :param left: index of left child per node, `null` if none
+        :param right: index of right child per node, `null` if none
+        :param edge: index of the node edge in `DCEL.edges` per node
+        :param roots: index of root node per version, `null` for an empty tree
+        :param mod_version: version of the modification per node, `no_mod` if none
+        :param mod_left: 1 if the modification replaces the left child, int8 column
+        :param mod_child: child set by the modification per node
+        """
+        self.left = left
+        self.right = right
+        self.edge = edge
+        self.roots = roots
+        self.mod_version = mod_version
+        self.mod_left = mod_left
+        self.mod_child = mod_child
+
+    def __len__(self) -> int:
+        return len(self.edge)
+
+    @property
+    def has_mods(self) -> bool:
+        return self.mod_version is not None
+
+    def get_root(self, version: int) -> int:
+        return self.roots[version]
+
+    def get_child(self, node: int, is_left: bool, version: int) -> int:
+        if self.mod_version is not None and self.mod_version[node] <= version and bool(self.mod_left[node]) == is_left:
+            return self.mod_child[node]
+        return self.left[node] if is_left else self.right[node]
+
+    def get_columns(self) -> dict:
+        columns = {'left': self.left, 'right': self.right, 'edge': self.edge, 'roots': self.roots}
+        if self.has_mods:
+            columns.update(mod_version=self.mod_version, mod_left=self.mod_left, mod_child=self.mod_child)
+        return columns
+
+    @property
+    def nbytes(self) -> int:
+        return sum(memoryview(column).nbytes for column in self.get_columns().values())
+
+    @classmethod
+    def concatenate(cls, trees: List['FrozenRBTree'], version_offsets: List[int]) -> 'FrozenRBTree':
+        """
+        Joins trees compiled separately for consecutive ranges of versions into one tree:
+        node indices of every tree are shifted past the nodes of the previous ones
+
+        :param version_offsets: per tree, the number added to its modification versions
+        """
+        def join(columns: List[np.ndarray], offsets: List[int], keep: int) -> array:
+            joined = np.concatenate([np.where(column == keep, keep, column + offset)
+                                     for column, offset in zip(columns, offsets)]).astype(np.int32)
+            return array('i', joined.tobytes())
+
+        node_offsets = list(np.cumsum([0] + [len(tree) for tree in trees[:-1]]))
+        columns = {name: [np.frombuffer(tree.get_columns()[name], dtype=np.int8 if name == 'mod_left' else np.int32)
+                          .astype(np.int64) for tree in trees]
+                   for name in trees[0].get_columns()}
+        mods = {}
+        if trees[0].has_mods:
+            mods = {
+                'mod_version': join(columns['mod_version'], version_offsets, cls.no_mod),
+                'mod_left': array('b', np.concatenate(columns['mod_left']).astype(np.int8).tobytes()),
+                'mod_child': join(columns['mod_child'], node_offsets, cls.null),
+            }
+        return cls(join(columns['left'], node_offsets, cls.null), join(columns['right'], node_offsets, cls.null),
+                   join(columns['edge'], [0] * len(trees), cls.null), join(columns['roots'], node_offsets, cls.null),
+                   **mods)
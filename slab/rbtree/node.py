@@ -18,6 +18,7 @@ class RBNode:
         self.edge = edge
         self.left = left
         self.right = right
+        self.frozen_index = -1
 
     def _repr_edge(self):
         return self.edge.__repr__() if self.edge is not None else None
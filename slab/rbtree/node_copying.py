@@ -0,0 +1,305 @@
+from array import array
+from typing import Callable, Dict, List, Set, Union
+
+from .frozen import FrozenRBTree
+from .node import Color
+from dcel import Edge
+
+
+class NCNode:
+    """
+    Persistent node with one extra modification slot, the slot holds a child pointer changed after the node was created
+    """
+    __slots__ = ('version', 'edge', 'left', 'right', 'mod_version', 'mod_left', 'mod_child')
+
+    def __init__(self, version: int, edge: Edge, left: 'NCNode' = None, right: 'NCNode' = None):
+        self.version = version
+        self.edge = edge
+        self.left = left
+        self.right = right
+        self.mod_version = None
+        self.mod_left = None
+        self.mod_child = None
+
+    def __repr__(self):
+        return f'<NCNode version={self.version} edge={self.edge} mod_version={self.mod_version}>'
+
+    def get_child(self, is_left: bool, version: int = None) -> Union['NCNode', None]:
+        """
+        :param version: version of the tree, the latest one if None
+        """
+        if self.mod_version is not None and self.mod_left == is_left and (version is None or self.mod_version <= version):
+            return self.mod_child
+        return self.left if is_left else self.right
+
+    def get_left(self, version: int = None) -> Union['NCNode', None]:
+        return self.get_child(True, version)
+
+    def get_right(self, version: int = None) -> Union['NCNode', None]:
+        return self.get_child(False, version)
+
+
+class _LiveNode:
+    """
+    Node of the ephemeral red-black tree of the latest version, `persistent` is its current persistent copy
+    """
+    __slots__ = ('edge', 'color', 'parent', 'left', 'right', 'persistent')
+
+    def __init__(self, edge: Union[Edge, None], color: Color):
+        self.edge = edge
+        self.color = color
+        self.parent = self.left = self.right = None
+        self.persistent = None
+
+
+class NodeCopyingRBTree:
+    """
+    Persistent red-black tree by node copying (Driscoll, Sarnak, Sleator, Tarjan).
+    Updates run on an ephemeral tree with parent pointers and colors, afterwards every changed child pointer
+    is recorded in the modification slot of the persistent node or, if the slot is taken, in a copy of the node
+    that is linked to its parent the same way. That gives amortized O(1) new nodes per update and O(n) space.
+    """
+    null = None
+    roots: List[Union[NCNode, None]]
+    edge_compare: Callable[[Edge, Edge], bool]
+    nodes_count: int
+
+    def __init__(self, edge_compare: Callable[[Edge, Edge], bool]):
+        """
+        :param edge_compare: function for comparison of two edges that returns True if first edge is `less` than second
+        """
+        self.nil = _LiveNode(None, Color.black)
+        self._root = self.nil
+        self._live_nodes: Dict[int, _LiveNode] = {}
+        self._dirty: Set[_LiveNode] = set()
+        self.roots = [None]
+        self.version = 0
+        self.edge_compare = edge_compare
+        self.nodes_count = 0
+
+    def get_root(self, version: int = None) -> Union[NCNode, None]:
+        return self.roots[self.version] if version is None else self.roots[version]
+
+    root = property(get_root)
+
+    def increase_version(self):
+        self.roots.append(self.roots[self.version])
+        self.version += 1
+
+    def _set_child(self, node: _LiveNode, is_left: bool, child: _LiveNode):
+        if is_left:
+            node.left = child
+        else:
+            node.right = child
+        self._dirty.add(node)
+
+    def _replace_child(self, parent: _LiveNode, old: _LiveNode, new: _LiveNode):
+        if parent == self.nil:
+            self._root = new
+        else:
+            self._set_child(parent, old == parent.left, new)
+
+    def _rotate(self, x: _LiveNode, is_left: bool):
+        """
+        Left rotation moves the right child `y` of `x` up, right rotation is symmetric
+        """
+        y = x.right if is_left else x.left
+        inner = y.left if is_left else y.right
+        self._set_child(x, not is_left, inner)
+        if inner != self.nil:
+            inner.parent = x
+        y.parent = x.parent
+        self._replace_child(x.parent, x, y)
+        self._set_child(y, is_left, x)
+        x.parent = y
+
+    def insert(self, edge: Edge):
+        node = _LiveNode(edge, Color.red)
+        node.left = node.right = self.nil
+        parent, x = self.nil, self._root
+        is_left = True
+        while x != self.nil:
+            parent = x
+            is_left = self.edge_compare(edge, x.edge)
+            x = x.left if is_left else x.right
+        node.parent = parent
+        if parent == self.nil:
+            self._root = node
+        else:
+            self._set_child(parent, is_left, node)
+        self._live_nodes[id(edge)] = node
+        self._dirty.add(node)
+        self._insert_fixup(node)
+        self._commit()
+
+    def _insert_fixup(self, z: _LiveNode):
+        while z.parent.color == Color.red:
+            grandparent = z.parent.parent
+            parent_is_left = z.parent == grandparent.left
+            uncle = grandparent.right if parent_is_left else grandparent.left
+            if uncle.color == Color.red:
+                z.parent.color = Color.black
+                uncle.color = Color.black
+                grandparent.color = Color.red
+                z = grandparent
+            else:
+                if z == (z.parent.right if parent_is_left else z.parent.left):
+                    z = z.parent
+                    self._rotate(z, parent_is_left)
+                z.parent.color = Color.black
+                z.parent.parent.color = Color.red
+                self._rotate(z.parent.parent, not parent_is_left)
+        self._root.color = Color.black
+
+    def _transplant(self, u: _LiveNode, v: _LiveNode):
+        self._replace_child(u.parent, u, v)
+        v.parent = u.parent
+
+    def delete(self, edge: Edge):
+        z = self._live_nodes.pop(id(edge), None)
+        if z is None:
+            return
+        y, y_color = z, z.color
+        if z.left == self.nil:
+            x = z.right
+            self._transplant(z, z.right)
+        elif z.right == self.nil:
+            x = z.left
+            self._transplant(z, z.left)
+        else:
+            y = z.right
+            while y.left != self.nil:
+                y = y.left
+            y_color = y.color
+            x = y.right
+            if y.parent == z:
+                x.parent = y
+            else:
+                self._transplant(y, y.right)
+                self._set_child(y, False, z.right)
+                y.right.parent = y
+            self._transplant(z, y)
+            self._set_child(y, True, z.left)
+            y.left.parent = y
+            y.color = z.color
+        self._dirty.discard(z)
+        if y_color == Color.black:
+            self._delete_fixup(x)
+        self._commit()
+
+    def _delete_fixup(self, x: _LiveNode):
+        while x != self._root and x.color == Color.black:
+            is_left = x == x.parent.left
+            sibling = x.parent.right if is_left else x.parent.left
+            if sibling.color == Color.red:
+                sibling.color = Color.black
+                x.parent.color = Color.red
+                self._rotate(x.parent, is_left)
+                sibling = x.parent.right if is_left else x.parent.left
+            near, far = (sibling.left, sibling.right) if is_left else (sibling.right, sibling.left)
+            if near.color == Color.black and far.color == Color.black:
+                sibling.color = Color.red
+                x = x.parent
+            else:
+                if far.color == Color.black:
+                    near.color = Color.black
+                    sibling.color = Color.red
+                    self._rotate(sibling, not is_left)
+                    sibling = x.parent.right if is_left else x.parent.left
+                    far = sibling.right if is_left else sibling.left
+                sibling.color = x.parent.color
+                x.parent.color = Color.black
+                far.color = Color.black
+                self._rotate(x.parent, is_left)
+                x = self._root
+        x.color = Color.black
+
+    def _new_node(self, node: _LiveNode) -> NCNode:
+        self.nodes_count += 1
+        node.persistent = NCNode(self.version, node.edge)
+        return node.persistent
+
+    def _write(self, node: _LiveNode, is_left: bool, child: Union[NCNode, None]):
+        """
+        Records a child pointer of the latest version in the persistent copy of `node`
+        """
+        persistent = node.persistent
+        if persistent.get_child(is_left) is child:
+            return
+        if persistent.version == self.version:
+            if is_left:
+                persistent.left = child
+            else:
+                persistent.right = child
+        elif persistent.mod_version is None or (persistent.mod_version == self.version and
+                                                persistent.mod_left == is_left):
+            persistent.mod_version, persistent.mod_left, persistent.mod_child = self.version, is_left, child
+        else:
+            copy = self._new_node(node)
+            copy.left, copy.right = persistent.get_left(), persistent.get_right()
+            if is_left:
+                copy.left = child
+            else:
+                copy.right = child
+            if node.parent != self.nil:
+                self._write(node.parent, node == node.parent.left, copy)
+
+    def _commit(self):
+        """
+        Transfers the child pointers changed by the last update to the persistent nodes of the current version
+        """
+        for node in self._dirty:
+            if node.persistent is None:
+                self._new_node(node)
+        for node in self._dirty:
+            self._write(node, True, node.left.persistent)
+            self._write(node, False, node.right.persistent)
+        self._dirty.clear()
+        self.roots[self.version] = self._root.persistent
+
+    def count_nodes_per_version(self) -> List[int]:
+        """
+        Number of nodes allocated by every version that are reachable from some version
+        """
+        counts = [0] * len(self.roots)
+        visited = set()
+        stack = [root for root in self.roots if root is not None]
+        while stack:
+            node = stack.pop()
+            if id(node) in visited:
+                continue
+            visited.add(id(node))
+            counts[node.version] += 1
+            stack += [child for child in (node.left, node.right, node.mod_child) if child is not None]
+        return counts
+
+    def freeze(self, edge_index: Callable[[Edge], int]) -> FrozenRBTree:
+        """
+        Compiles all versions into a FrozenRBTree with modification columns.
+        Pointers of different versions may form cycles, so nodes are numbered before the columns are filled.
+
+        :param edge_index: function that returns index of edge in the edge list
+        """
+        nodes = []
+        node_indices = {}
+        stack = [root for root in self.roots if root is not None]
+        while stack:
+            node = stack.pop()
+            if id(node) in node_indices:
+                continue
+            node_indices[id(node)] = len(nodes)
+            nodes.append(node)
+            stack += [child for child in (node.left, node.right, node.mod_child) if child is not None]
+
+        def index_of(node: Union[NCNode, None]) -> int:
+            return FrozenRBTree.null if node is None else node_indices[id(node)]
+
+        return FrozenRBTree(
+            array('i', (index_of(node.left) for node in nodes)),
+            array('i', (index_of(node.right) for node in nodes)),
+            array('i', (edge_index(node.edge) for node in nodes)),
+            array('i', (index_of(root) for root in self.roots)),
+            array('i', (FrozenRBTree.no_mod if node.mod_version is None else node.mod_version for node in nodes)),
+            array('b', (bool(node.mod_left) for node in nodes)),
+            array('i', (index_of(node.mod_child) for node in nodes)),
+        )
@@ -1,5 +1,7 @@
-from typing import Callable, List, Tuple
+from array import array
+from typing import Callable, List, Sequence, Tuple
 
+from .frozen import FrozenRBTree
 from .node import Color, RBNode
 from dcel import Edge
 
@@ -16,6 +18,7 @@ class RBTree:
         self.null = RBNode(0, Color.black, None, None)
         self.roots = [self.null]
         self.version = 0
+        self.frozen_version = -1
         self.edge_compare = edge_compare
 
     def get_root(self, version: int = None) -> RBNode:
@@ -315,3 +318,66 @@ class RBTree:
             way += [y] + way_min[:-1] + [x]
         if color == Color.black:
             self._delete_fixup(way)
+
+    def count_nodes_per_version(self) -> List[int]:
+        """
+        Number of nodes allocated by every version that are reachable from some version
+        """
+        counts = [0] * len(self.roots)
+        visited = set()
+        stack = [root for root in self.roots if root != self.null]
+        while stack:
+            node = stack.pop()
+            if id(node) in visited:
+                continue
+            visited.add(id(node))
+            counts[node.version] += 1
+            stack += [child for child in (node.left, node.right) if child != self.null]
+        return counts
+
+    def freeze(self, edge_index: Callable[[Edge], int], versions: Sequence[int] = None,
+               frozen: FrozenRBTree = None) -> FrozenRBTree:
+        """
+        Compiles versions into a FrozenRBTree, nodes shared between versions are numbered once
+
+        :param edge_index: function that returns index of edge in the edge list
+        :param versions: versions to compile, their roots go to the result in this order, all versions by default
+        :param frozen: tree compiled by the previous call, only nodes created since then are compiled
+                       and appended to its columns in place
+        """
+        if frozen is None:
+            left, right, edges = array('i'), array('i'), array('i')
+            compiled_version = -1
+        else:
+            left, right, edges = frozen.left, frozen.right, frozen.edge
+            compiled_version = self.frozen_version
+        visited = set()
+
+        def is_compiled(node: RBNode) -> bool:
+            return node.version <= compiled_version or id(node) in visited
+
+        def visit(root: RBNode) -> int:
+            if root == self.null:
+                return FrozenRBTree.null
+            stack = [root]
+            while stack:
+                node = stack[-1]
+                children = [child for child in (node.left, node.right) if child != self.null and not is_compiled(child)]
+                if children:
+                    stack += children
+                    continue
+                stack.pop()
+                if is_compiled(node):
+                    continue
+                visited.add(id(node))
+                node.frozen_index = len(edges)
+                left.append(node.left.frozen_index if node.left != self.null else FrozenRBTree.null)
+                right.append(node.right.frozen_index if node.right != self.null else FrozenRBTree.null)
+                edges.append(edge_index(node.edge))
+            return root.frozen_index
+
+        if versions is None:
+            versions = range(len(self.roots))
+        roots = array('i', (visit(self.roots[version]) for version in versions))
+        self.frozen_version = self.version
+        return FrozenRBTree(left, right, edges, roots)
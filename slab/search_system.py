@@ -1,89 +1,299 @@
-from typing import List
+import bisect
+from array import array
+from contextlib import nullcontext
+from typing import ContextManager, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+import numpy as np
 
 from dcel import Edge, DCEL, Point
-from slab.rbtree import RBTree
-from slab.utils import get_area
+from dcel.coordinates import Coordinate
+from slab.index import SlabIndex
+from slab.lazy import LazySlabs
+from slab.parallel import build_slab_ranges
+from slab.rbtree import FrozenRBTree, NodeCopyingRBTree, RBTree
+from slab.stats import Stats
+from slab.utils import get_area, get_orientation
 
 
 class SearchSystem:
+    persistence_modes: Dict[str, Type[Union[RBTree, NodeCopyingRBTree]]] = {
+        'path_copying': RBTree,
+        'node_copying': NodeCopyingRBTree,
+    }
+
     dcel: DCEL
-    tree: RBTree
-    lines: List[int]
+    tree: Union[RBTree, NodeCopyingRBTree]
+    frozen: FrozenRBTree
+    lines: List[Coordinate]
+    band_versions: List[int]
+    index: SlabIndex
+    lazy_slabs: LazySlabs
+    stats: Stats
 
-    def __init__(self, dcel: DCEL):
+    def __init__(self, dcel: DCEL, persistence: str = 'path_copying', workers: int = 1, stats: Stats = None,
+                 lazy_chunk: int = None, updatable: bool = False):
+        """
+        :param persistence: how the tree keeps its versions, one of `persistence_modes`
+        :param workers: number of processes that build the slabs, see `_init_slabs_parallel`
+        :param stats: collects build phase times, nodes per version and, through the index, query statistics
+        :param lazy_chunk: build the versions on demand in chunks of this many lines, see `LazySlabs`
+        :param updatable: keep the nodes of the tree after the freeze for `update`,
+                          otherwise queries only use the frozen columns and the nodes are released
+        """
+        if lazy_chunk is not None and (persistence != 'path_copying' or workers > 1):
+            raise Exception('Lazy slabs need path copying persistence and a sequential build')
+        if updatable and (persistence != 'path_copying' or workers > 1 or lazy_chunk is not None):
+            raise Exception('Incremental updates need path copying persistence and an eager sequential build')
         self.dcel = dcel
-        self.tree = RBTree(self.edge_compare)
+        self._get_area = self._get_filtered_area if dcel.coordinate_type is float else get_area
+        self.persistence = persistence
         self.lines = []
-        self._init_slabs()
+        self.lazy_slabs = None
+        self.stats = stats
+        with self._phase('sorting'):
+            self._sort_vertexes()
+        if lazy_chunk is not None:
+            self.tree = None
+            with self._phase('checkpoints'):
+                self._init_lazy_slabs(lazy_chunk)
+        elif workers > 1:
+            self.tree = None
+            with self._phase('sweep'):
+                self._init_slabs_parallel(workers)
+        else:
+            self.tree = self.persistence_modes[persistence](self.edge_compare)
+            with self._phase('sweep'):
+                self._init_slabs()
+            with self._phase('freeze'):
+                self.frozen = self._freeze()
+        with self._phase('index'):
+            self.index = SlabIndex.from_dcel(dcel, self.lines, self.frozen)
+        self.index.lazy_slabs = self.lazy_slabs
+        if stats is not None:
+            if self.tree is not None:
+                stats.nodes_per_version = self.tree.count_nodes_per_version()
+            self.index.stats = stats
+            stats.memory['index'] = self.index.nbytes
+        if not updatable:
+            self.tree = None
+            self._edge_index_by_id = None
 
-    def _init_slabs(self):
+    def _phase(self, name: str) -> ContextManager:
+        return self.stats.phase(name) if self.stats is not None else nullcontext()
+
+    def _sort_vertexes(self):
         vertexes_count = len(self.dcel.vertexes)
-        sorted_vertex_indexes = sorted(range(vertexes_count), key=lambda ind: tuple(self.dcel.vertexes[ind])[::-1])
-
-        y = self.dcel.vertexes[sorted_vertex_indexes[0]].y
-        i = 0
-        while self.dcel.vertexes[sorted_vertex_indexes[i]].y == y:
-            for edge in self.dcel.get_incident_edges_for_vertex(sorted_vertex_indexes[i]):
-                if self.dcel.vertexes[edge.v2].y > y:
-                    self.tree.insert(edge)
-            i += 1
-        self.lines.append(y)
+        self._sorted_vertex_indexes = sorted(range(vertexes_count),
+                                             key=lambda ind: tuple(self.dcel.vertexes[ind])[::-1])
+        self._sorted_ys = [self.dcel.vertexes[vertex_index].y for vertex_index in self._sorted_vertex_indexes]
 
+    def _init_slabs(self):
+        """
+        Sweeps all vertexes bottom-up with one new version of the tree per line, see `_sweep_group`
+        """
+        sorted_ys = self._sorted_ys
+        vertexes_count = len(sorted_ys)
+        i = self._sweep_group(self.tree, 0, vertexes_count)
+        self.lines.append(sorted_ys[0])
         while i < vertexes_count - 1:
             self.tree.increase_version()
-            y = self.dcel.vertexes[sorted_vertex_indexes[i]].y
-            while i < vertexes_count and self.dcel.vertexes[sorted_vertex_indexes[i]].y == y:
-                edges_to_add = []
-                for edge in self.dcel.get_incident_edges_for_vertex(sorted_vertex_indexes[i]):
-                    if self.dcel.vertexes[edge.v2].y > y:
-                        edges_to_add.append(edge)
-                    elif self.dcel.vertexes[edge.v1].y < y:
-                        self.tree.delete(edge)
-                for edge in edges_to_add:
-                    self.tree.insert(edge)
-                i += 1
+            y = sorted_ys[i]
+            i = self._sweep_group(self.tree, i, vertexes_count)
             self.lines.append(y)
         if i == vertexes_count - 1:
-            self.lines.append(self.dcel.vertexes[sorted_vertex_indexes[i]].y)
+            self.lines.append(sorted_ys[i])
+        self.band_versions = list(range(len(self.tree.roots)))
+
+    def _sweep_group(self, tree: Union[RBTree, NodeCopyingRBTree], i: int, end: int) -> int:
+        """
+        Updates the tree by the vertexes on the line of the vertex at sorted position `i`
+
+        :return: sorted position of the next line, at most `end`
+        """
+        vertexes = self.dcel.vertexes
+        y = self._sorted_ys[i]
+        while i < end and self._sorted_ys[i] == y:
+            edges_to_add = []
+            for edge in self.dcel.get_incident_edges_for_vertex(self._sorted_vertex_indexes[i]):
+                if vertexes[edge.v2].y > y:
+                    edges_to_add.append(edge)
+                elif vertexes[edge.v1].y < y:
+                    tree.delete(edge)
+            for edge in edges_to_add:
+                tree.insert(edge)
+            i += 1
+        return i
+
+    def _build_slab_range(self, first: int, end: int) -> FrozenRBTree:
+        """
+        Builds the versions of the lines of the vertexes at sorted positions [first, end) with a tree of their own.
+        The tree starts with the edges that cross the first line from below, i.e. the edges of the band under it
+
+        :return: compiled tree with a root per line, its modification version 1 is the first line
+        """
+        vertexes = self.dcel.vertexes
+        tree = self.persistence_modes[self.persistence](self.edge_compare)
+        y = self._sorted_ys[first]
+        for edge in self.dcel.edges:
+            if edge is not None and vertexes[edge.v1].y < y <= vertexes[edge.v2].y:
+                tree.insert(edge)
+        i = first
+        while i < end:
+            tree.increase_version()
+            i = self._sweep_group(tree, i, end)
+        edge_index_by_id = {id(edge): edge_index for edge_index, edge in enumerate(self.dcel.edges)}
+        frozen = tree.freeze(lambda edge: edge_index_by_id[id(edge)])
+        frozen.roots = frozen.roots[1:]
+        return frozen
+
+    def _get_line_starts(self) -> List[int]:
+        """
+        :return: sorted position of the first vertex of every line
+        """
+        sorted_ys = self._sorted_ys
+        return [i for i in range(len(sorted_ys)) if i == 0 or sorted_ys[i] != sorted_ys[i - 1]]
+
+    def _init_lazy_slabs(self, chunk_size: int):
+        """
+        Sets up the lines and the checkpoints of `LazySlabs`, the frozen tree has no nodes yet
+        and the index builds the versions of the queried bands
+        """
+        self.lazy_slabs = LazySlabs(self, chunk_size)
+        self.lines = [self._sorted_ys[i] for i in self.lazy_slabs.starts]
+        self.frozen = FrozenRBTree(array('i'), array('i'), array('i'),
+                                   array('i', [FrozenRBTree.null] * len(self.lines)))
+
+    def _init_slabs_parallel(self, workers: int):
+        """
+        Splits the lines into a range per worker with about the same number of vertexes.
+        Every worker builds the versions of its range by `_build_slab_range`, and the compiled trees are joined
+        into one, so the index is the same as the one of a sequential build up to the numbering of nodes.
+        Nodes can not be shared between ranges, so every range adds a copy of the tree at its first line
+        """
+        vertexes_count = len(self._sorted_ys)
+        starts = self._get_line_starts()
+        self.lines = [self._sorted_ys[i] for i in starts]
+        bounds = sorted({starts[min(bisect.bisect_left(starts, vertexes_count * k // workers), len(starts) - 1)]
+                         for k in range(workers)})
+        ranges = list(zip(bounds, bounds[1:] + [vertexes_count]))
+        parts = build_slab_ranges(self, ranges, workers)
+        self.frozen = FrozenRBTree.concatenate(parts, [bisect.bisect_left(starts, first) - 1 for first, _ in ranges])
+
+    def _freeze(self) -> FrozenRBTree:
+        self._edge_index_by_id = {id(edge): edge_index for edge_index, edge in enumerate(self.dcel.edges)}
+        return self.tree.freeze(lambda edge: self._edge_index_by_id[id(edge)])
+
+    def _sweep_range(self, low: int, high: int) -> Tuple[int, int, int]:
+        """
+        Replays the sweep over the vertexes with y in [low, high] on top of the last version below `low`.
+        Every new version gets a fresh number, so versions that other bands still use are never changed
+
+        :return: first and last (exclusive) replaced band and the number of bands that replace them
+        """
+        first_band = bisect.bisect_left(self.lines, low)
+        last_band = bisect.bisect_right(self.lines, high)
+        base_root = self.tree.get_root(self.band_versions[first_band - 1]) if first_band > 0 else self.tree.null
+        self.tree.roots.append(base_root)
+        self.tree.version = len(self.tree.roots) - 1
+        base_version = self.tree.version
+
+        lines, versions = [], []
+        i = bisect.bisect_left(self._sorted_ys, low)
+        end = bisect.bisect_right(self._sorted_ys, high)
+        while i < end:
+            self.tree.increase_version()
+            lines.append(self._sorted_ys[i])
+            i = self._sweep_group(self.tree, i, end)
+            versions.append(self.tree.version)
+
+        for version in [base_version] + self.band_versions[first_band:last_band]:
+            self.tree.roots[version] = self.tree.null
+        self.lines[first_band:last_band] = lines
+        self.band_versions[first_band:last_band] = versions
+        return first_band, last_band, len(versions)
+
+    def update(self, vertexes: List[dict] = (), edges: Dict[int, Optional[dict]] = None):
+        """
+        Applies a diff to the DCEL (see `DCEL.update`) and rebuilds only the versions of the slabs
+        within the y-range of the edges whose endpoints changed, all other versions are reused as they are.
+        Edges that keep their endpoints only get their faces rewritten.
+        Nodes of the replaced versions stay in the frozen columns until a full rebuild.
+
+        Needs a search system built with `updatable`
+        """
+        if self.tree is None:
+            raise Exception('Incremental updates need a search system built with updatable=True')
+        edges = edges or {}
+        first_vertex_index = len(self.dcel.vertexes)
+        moved = self.dcel.update(list(vertexes), edges)
+        for vertex_index in range(first_vertex_index, len(self.dcel.vertexes)):
+            y = self.dcel.vertexes[vertex_index].y
+            position = bisect.bisect_right(self._sorted_ys, y)
+            self._sorted_ys.insert(position, y)
+            self._sorted_vertex_indexes.insert(position, vertex_index)
+        for old_edge, new_edge in moved:
+            if old_edge is not None:
+                del self._edge_index_by_id[id(old_edge)]
+        for edge_index in edges:
+            if self.dcel.edges[edge_index] is not None:
+                self._edge_index_by_id[id(self.dcel.edges[edge_index])] = edge_index
+
+        ys = [self.dcel.vertexes[vertex_index].y for vertex_index in range(first_vertex_index, len(self.dcel.vertexes))]
+        ys += [self.dcel.vertexes[vertex_index].y for pair in moved for edge in pair if edge is not None
+               for vertex_index in (edge.v1, edge.v2)]
+        self.index.reset_query_arrays()
+        if ys:
+            first_band, last_band, versions_count = self._sweep_range(min(ys), max(ys))
+            part = self.tree.freeze(lambda edge: self._edge_index_by_id[id(edge)],
+                                    self.band_versions[first_band:first_band + versions_count], self.frozen)
+            roots = self.frozen.roots
+            self.frozen = FrozenRBTree(part.left, part.right, part.edge,
+                                       roots[:first_band] + part.roots + roots[last_band:])
+        self.index.update(self.dcel, edges, self.lines, self.frozen)
+
+    def _get_filtered_area(self, edge: Edge, point: Point) -> float:
+        """
+        `get_area` for float coordinates, whose rounded line coefficients could give a wrong sign
+        """
+        vertex1, vertex2 = self.dcel.vertexes[edge.v1], self.dcel.vertexes[edge.v2]
+        return get_orientation(vertex1.x, vertex1.y, vertex2.x, vertex2.y, point.x, point.y)
 
     def edge_compare(self, edge1: Edge, edge2: Edge) -> bool:
+        """
+        Compares edges by an endpoint that lies within the y-range of the other edge,
+        the line of an edge is meaningless outside of it
+        """
+        vertexes = self.dcel.vertexes
         if edge1.v1 == edge2.v1:
-            return get_area(edge2, self.dcel.vertexes[edge1.v2], self.dcel.vertexes) > 0
+            return self._get_area(edge2, vertexes[edge1.v2]) > 0
+        elif vertexes[edge1.v1].y >= vertexes[edge2.v1].y:
+            return self._get_area(edge2, vertexes[edge1.v1]) > 0
         else:
-            return get_area(edge2, self.dcel.vertexes[edge1.v1], self.dcel.vertexes) > 0
-
-    def _search_band(self, y: int) -> int:
-        if y < self.lines[0] or y > self.lines[-1]:
-            return -1
-        lines_count = len(self.lines)
-        l, r = -1, lines_count
-        while r - l > 1:
-            m = (l + r) // 2
-            if self.lines[m] < y:
-                l = m
-            else:
-                r = m
-        if y == self.lines[r]:
-            return r if r < lines_count - 1 else lines_count - 2
-        return r - 1 if r > 0 else 0
-
-    def _search_face(self, point: Point, band_index: int) -> int:
-        node = self.tree.get_root(band_index)
-        while True:
-            area = get_area(node.edge, point, self.dcel.vertexes)
-            if area == 0:
-                return node.edge.f2 if node.edge.f2 != -1 else node.edge.f1
-            elif area > 0:
-                if node.left == self.tree.null:
-                    return node.edge.f1
-                node = node.left
-            else:
-                if node.right == self.tree.null:
-                    return node.edge.f2
-                node = node.right
+            return self._get_area(edge1, vertexes[edge2.v1]) < 0
 
     def locate_point(self, point: Point) -> int:
-        band_index = self._search_band(point.y)
-        if band_index == -1:
-            return -1
-        return self._search_face(point, band_index)
+        """
+        See `SlabIndex.locate_point` for points on edges and vertexes
+        """
+        return self.index.locate_point(point)
+
+    def locate_points(self, xs: Sequence[Coordinate], ys: Sequence[Coordinate], coherent: bool = False) -> np.ndarray:
+        """
+        Locates a batch of points given by coordinate arrays, the result matches `locate_point` for every point
+
+        :param coherent: see `SlabIndex.locate_points`
+        :return: array of face indices
+        """
+        return self.index.locate_points(xs, ys, coherent)
+
+    def get_segment_faces(self, start: Point, end: Point) -> List[int]:
+        """
+        Faces that the segment passes through in the order of travel, see `SlabIndex.get_segment_faces`
+        """
+        return self.index.get_segment_faces(start, end)
+
+    def get_box_faces(self, corner1: Point, corner2: Point) -> List[int]:
+        """
+        Faces whose interior meets the box, see `SlabIndex.get_box_faces`
+        """
+        return self.index.get_box_faces(corner1, corner2)
@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Set, Tuple
+
+from dcel import DCEL
+from slab.index import SlabIndex
+from slab.search_system import SearchSystem
+
+
+class IndexRegistry:
+    """
+    Built indexes keyed by a content hash of their PSLG, so every PSLG is built once for all clients.
+    The least recently used indexes are evicted when together they take more than `memory_budget` bytes,
+    the most recent one is always kept
+    """
+    memory_budget: int
+    persistence: str
+    memory: int
+    evictions: int
+
+    def __init__(self, memory_budget: int, persistence: str = 'path_copying'):
+        """
+        :param memory_budget: bytes of the columns and query arrays of all kept indexes
+        """
+        self.memory_budget = memory_budget
+        self.persistence = persistence
+        self.memory = 0
+        self.evictions = 0
+        self._indexes: 'OrderedDict[str, Tuple[SlabIndex, int]]' = OrderedDict()
+        self._building: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    @staticmethod
+    def get_key(pslg: dict) -> str:
+        return hashlib.sha256(json.dumps(pslg, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+    def _build(self, pslg: dict) -> SlabIndex:
+        index = SearchSystem(DCEL(**pslg), self.persistence).index
+        index._get_query_arrays()
+        return index
+
+    async def load(self, pslg: dict) -> str:
+        """
+        Builds the index of a PSLG in a worker thread unless it is kept already,
+        concurrent loads of the same PSLG wait for one build
+
+        :return: key of the index
+        """
+        key = self.get_key(pslg)
+        if key in self._indexes:
+            self._indexes.move_to_end(key)
+            return key
+        if key not in self._building:
+            self._building[key] = asyncio.get_running_loop().run_in_executor(None, self._build, pslg)
+        try:
+            index = await self._building[key]
+        finally:
+            self._building.pop(key, None)
+        if key not in self._indexes:
+            self._add(key, index)
+        return key
+
+    def _add(self, key: str, index: SlabIndex):
+        size = index.nbytes
+        self._indexes[key] = (index, size)
+        self.memory += size
+        while self.memory > self.memory_budget and len(self._indexes) > 1:
+            _, (_, evicted_size) = self._indexes.popitem(last=False)
+            self.memory -= evicted_size
+            self.evictions += 1
+
+    def get(self, key: str) -> SlabIndex:
+        if key not in self._indexes:
+            raise Exception(f"Unknown index '{key}', load its PSLG first")
+        self._indexes.move_to_end(key)
+        return self._indexes[key][0]
+
+
+class _Batch:
+    """
+    Points of small requests for one index that are located together
+    """
+
+    def __init__(self, index: SlabIndex, timer: asyncio.TimerHandle):
+        self.index = index
+        self.timer = timer
+        self.xs: List[int] = []
+        self.ys: List[int] = []
+        self.requests: List[Tuple[asyncio.Future, int, int]] = []
+
+    def add(self, xs: Sequence[int], ys: Sequence[int], future: asyncio.Future):
+        self.requests.append((future, len(self.xs), len(xs)))
+        self.xs += xs
+        self.ys += ys
+
+
+class LocateService:
+    """
+    Serves point location over newline-delimited JSON: every request is an object on its own line,
+    and the response line has the same `id`.
+
+    * `{"op": "load", "pslg": {...}}` builds an index and returns its `key`
+    * `{"op": "locate", "key": "...", "points": [{"x": 4, "y": 3}, ...]}` returns `faces`,
+      `pslg` can be given instead of `key`
+    * `{"op": "stats"}` returns counters of the registry and of the batching
+
+    Requests of fewer than `coalesce_points` points for the same index are coalesced: they wait up to
+    `coalesce_delay` seconds for other requests and are located by one batch search.
+    Batch searches run in worker threads, so the event loop keeps reading requests meanwhile; the indexes
+    of the registry are built eagerly and without a query cache, so concurrent searches only read them.
+    Errors are returned as `{"error": "..."}`
+    """
+    registry: IndexRegistry
+    coalesce_points: int
+    coalesce_delay: float
+
+    def __init__(self, registry: IndexRegistry, coalesce_points: int = 1024, coalesce_delay: float = 0.001):
+        """
+        :param coalesce_points: requests with fewer points are coalesced, 0 turns coalescing off
+        """
+        self.registry = registry
+        self.coalesce_points = coalesce_points
+        self.coalesce_delay = coalesce_delay
+        self.counters = {'requests': 0, 'points': 0, 'batches': 0, 'coalesced_requests': 0}
+        self._batches: Dict[str, _Batch] = {}
+        self._flushes: Set[asyncio.Task] = set()
+
+    @staticmethod
+    async def _locate_points(index: SlabIndex, xs: Sequence[int], ys: Sequence[int]) -> List[int]:
+        """
+        Batch search in a worker thread
+        """
+        faces = await asyncio.get_running_loop().run_in_executor(None, index.locate_points, xs, ys)
+        return faces.tolist()
+
+    async def locate(self, key: str, xs: Sequence[int], ys: Sequence[int]) -> List[int]:
+        index = self.registry.get(key)
+        self.counters['points'] += len(xs)
+        if len(xs) >= self.coalesce_points:
+            self.counters['batches'] += 1
+            return await self._locate_points(index, xs, ys)
+        batch = self._batches.get(key)
+        if batch is None:
+            timer = asyncio.get_running_loop().call_later(self.coalesce_delay, self._flush, key)
+            batch = self._batches[key] = _Batch(index, timer)
+        future = asyncio.get_running_loop().create_future()
+        batch.add(xs, ys, future)
+        self.counters['coalesced_requests'] += 1
+        if len(batch.xs) >= self.coalesce_points:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: str):
+        """
+        Closes the batch of the index, so new requests start another one, and locates its points in a task
+        """
+        batch = self._batches.pop(key)
+        batch.timer.cancel()
+        self.counters['batches'] += 1
+        task = asyncio.get_running_loop().create_task(self._locate_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _locate_batch(self, batch: _Batch):
+        try:
+            faces = await self._locate_points(batch.index, batch.xs, batch.ys)
+        except Exception as e:
+            for future, _, _ in batch.requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, start, count in batch.requests:
+            if not future.done():
+                future.set_result(faces[start:start + count])
+
+    def get_stats(self) -> dict:
+        return dict(self.counters, indexes=len(self.registry), memory=self.registry.memory,
+                    memory_budget=self.registry.memory_budget, evictions=self.registry.evictions)
+
+    async def handle_request(self, request: dict) -> dict:
+        operation = request.get('op')
+        if operation == 'load':
+            return {'key': await self.registry.load(request['pslg'])}
+        if operation == 'locate':
+            key = request['key'] if 'key' in request else await self.registry.load(request['pslg'])
+            xs = [point_dict['x'] for point_dict in request['points']]
+            ys = [point_dict['y'] for point_dict in request['points']]
+            return {'faces': await self.locate(key, xs, ys)}
+        if operation == 'stats':
+            return self.get_stats()
+        raise Exception(f"Unknown operation '{operation}'")
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            self.counters['requests'] += 1
+            response = await self.handle_request(request)
+        except (json.decoder.JSONDecodeError, KeyError, TypeError, AttributeError):
+            response = {'error': 'Incorrect request format'}
+        except Exception as e:
+            response = {'error': str(e)}
+        response['id'] = request_id
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Requests of one connection are served concurrently, so a client can pipeline them
+        """
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(self._respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ValueError:
+            writer.write(json.dumps({'error': 'Request is too long', 'id': None}).encode() + b'\n')
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
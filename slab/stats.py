@@ -0,0 +1,76 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+
+class Stats:
+    """
+    Optional instrumentation of the build and the queries, collected only where a Stats object is passed:
+    build phase times, tree nodes allocated per version, a histogram of the tree depth per query,
+    an estimate of the memory used by the index and the counters of the query cache
+    """
+    phases: Dict[str, float]
+    nodes_per_version: List[int]
+    depths: Dict[int, int]
+    memory: Dict[str, int]
+    cache: Dict[str, int]
+
+    def __init__(self):
+        self.phases = {}
+        self.nodes_per_version = []
+        self.depths = {}
+        self.memory = {}
+        self.cache = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Adds the time of the block to the phase, also if the block raises
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    @staticmethod
+    def _add_histogram(histogram: Dict[int, int], values: np.ndarray):
+        for value, count in zip(*np.unique(values, return_counts=True)):
+            histogram[int(value)] = histogram.get(int(value), 0) + int(count)
+
+    def add_queries(self, depths: np.ndarray):
+        """
+        :param depths: number of tree nodes visited per query
+        """
+        self._add_histogram(self.depths, depths)
+
+    def merge(self, other: 'Stats'):
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0) + seconds
+        for value, count in other.depths.items():
+            self.depths[value] = self.depths.get(value, 0) + count
+
+    @staticmethod
+    def _summarize(histogram: Dict[int, int]) -> dict:
+        count = sum(histogram.values())
+        return {
+            'mean': sum(value * value_count for value, value_count in histogram.items()) / count if count else 0,
+            'max': max(histogram, default=0),
+            'histogram': {str(value): histogram[value] for value in sorted(histogram)},
+        }
+
+    def to_dict(self) -> dict:
+        nodes_histogram = {}
+        for nodes in self.nodes_per_version:
+            nodes_histogram[nodes] = nodes_histogram.get(nodes, 0) + 1
+        return {
+            'phases_s': dict(self.phases),
+            'nodes_per_version': dict(versions=len(self.nodes_per_version), total=sum(self.nodes_per_version),
+                                      **self._summarize(nodes_histogram)),
+            'queries': sum(self.depths.values()),
+            'depth': self._summarize(self.depths),
+            'memory_bytes': dict(self.memory),
+            'cache': dict(self.cache),
+        }
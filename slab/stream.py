@@ -0,0 +1,60 @@
+import json
+from itertools import islice
+from typing import BinaryIO, Iterator, TextIO, Tuple
+
+import numpy as np
+
+from dcel.coordinates import get_coordinate_array
+
+# binary points are little-endian int64 (x, y) pairs, binary faces are little-endian int32
+POINT_DTYPE = np.dtype('<i8')
+FACE_DTYPE = np.dtype('<i4')
+
+
+def read_points_ndjson(input_file: TextIO, chunk_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Reads points given one JSON object per line, e.g. `{"x": 4, "y": 3}`, empty lines are skipped.
+    Coordinates may be integers or floats, see `get_coordinate_array`
+
+    :return: iterator over chunks of x and y coordinates
+    """
+    lines = (line for line in input_file if not line.isspace())
+    while True:
+        point_dicts = [json.loads(line) for line in islice(lines, chunk_size)]
+        if not point_dicts:
+            return
+        yield (get_coordinate_array([point_dict['x'] for point_dict in point_dicts]),
+               get_coordinate_array([point_dict['y'] for point_dict in point_dicts]))
+
+
+def read_points_binary(input_file: BinaryIO, chunk_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Reads points given as a stream of (x, y) coordinate pairs
+
+    :return: iterator over chunks of x and y coordinates
+    """
+    chunk_bytes = 2 * POINT_DTYPE.itemsize * chunk_size
+    while True:
+        data = input_file.read(chunk_bytes)
+        if not data:
+            return
+        while len(data) < chunk_bytes:
+            tail = input_file.read(chunk_bytes - len(data))
+            if not tail:
+                break
+            data += tail
+        if len(data) % (2 * POINT_DTYPE.itemsize):
+            raise Exception('Incorrect binary points: truncated coordinate pair')
+        points = np.frombuffer(data, dtype=POINT_DTYPE).reshape(-1, 2)
+        yield points[:, 0].astype(np.int64), points[:, 1].astype(np.int64)
+
+
+def write_faces_ndjson(output_file: TextIO, faces: np.ndarray):
+    if len(faces):
+        output_file.write('\n'.join(map(str, faces.tolist())) + '\n')
+        output_file.flush()
+
+
+def write_faces_binary(output_file: BinaryIO, faces: np.ndarray):
+    output_file.write(faces.astype(FACE_DTYPE).tobytes())
+    output_file.flush()
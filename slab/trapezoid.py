@@ -0,0 +1,299 @@
+import random
+from array import array
+from fractions import Fraction
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from dcel import DCEL, Point
+from dcel.coordinates import Coordinate, get_coordinate_array
+
+LEAF, POINT_NODE, SEGMENT_NODE = 0, 1, 2
+
+
+class Trapezoid:
+    """
+    Region between the `left` and `right` edges (-1 for none) and the walls through the `bottom` and `top` vertexes
+    (-1 for infinity). Walls are horizontal lines sheared by x, so that vertexes with the same y are ordered too.
+    """
+    __slots__ = ('left', 'right', 'bottom', 'top', 'leaf')
+
+    def __init__(self, left: int, right: int, bottom: int, top: int, leaf: int):
+        self.left = left
+        self.right = right
+        self.bottom = bottom
+        self.top = top
+        self.leaf = leaf
+
+
+class TrapezoidMap:
+    """
+    Point location by randomized incremental trapezoidal decomposition with a DAG search structure,
+    expected O(n) space and O(log n) query time. Horizontal edges are skipped like in the slab sweep,
+    so it answers the same as SearchSystem, a point on a line belongs to the slab above it except the top line.
+    Side tests use the exact line coefficients of the edges, so float coordinates are not supported.
+    """
+    dcel: DCEL
+    max_y: int
+    kind: array
+    key: array
+    below_or_left: array
+    above_or_right: array
+    trapezoid_left: array
+    trapezoid_right: array
+
+    def __init__(self, dcel: DCEL, seed: int = None):
+        """
+        :param seed: seed of the random order of edge insertion
+        """
+        if dcel.coordinate_type is float:
+            raise Exception('The trapezoid engine needs integer or fraction coordinates')
+        self.dcel = dcel
+        self._xs = [vertex.x for vertex in dcel.vertexes]
+        self._ys = [vertex.y for vertex in dcel.vertexes]
+        self.max_y = max(self._ys, default=0)
+        self._query_arrays = {}
+        self._init_dag(seed)
+
+    def _init_dag(self, seed: int):
+        self._nodes: List[List[int]] = [[LEAF, 0, -1, -1]]
+        self._trapezoids = [Trapezoid(-1, -1, -1, -1, 0)]
+        edge_indices = [edge_index for edge_index, edge in enumerate(self.dcel.edges)
+                        if self._ys[edge.v1] != self._ys[edge.v2]]
+        random.Random(seed).shuffle(edge_indices)
+        for edge_index in edge_indices:
+            self._insert(edge_index)
+        self._freeze()
+        del self._nodes, self._trapezoids
+
+    def _vertex_key(self, vertex_index: int) -> Tuple[int, int]:
+        return self._ys[vertex_index], self._xs[vertex_index]
+
+    def _edge_area(self, edge_index: int, vertex_index: int) -> int:
+        return self._point_area(edge_index, self._xs[vertex_index], self._ys[vertex_index])
+
+    def _is_left_along(self, edge_index: int, segment_index: int, wall_vertex: int) -> bool:
+        """
+        Whether the segment just above the wall through `wall_vertex` lies left of the edge.
+        The crossing of the segment with the wall is z = (n / d, wall y), so the area is scaled by d > 0.
+        """
+        segment = self.dcel.edges[segment_index]
+        p, q = segment.v1, segment.v2
+        d = self._ys[q] - self._ys[p]
+        zy = self._ys[wall_vertex]
+        n = self._xs[p] * d + (zy - self._ys[p]) * (self._xs[q] - self._xs[p])
+        edge = self.dcel.edges[edge_index]
+        area = edge.a * n + (edge.b * zy + edge.c) * d
+        if area == 0:
+            # the segment and the edge share the crossing vertex, the side is given by the other end of the segment
+            area = self._edge_area(edge_index, p if zy == self._ys[q] else q)
+        return area > 0
+
+    def _locate_along(self, segment_index: int, wall_vertex: int) -> Trapezoid:
+        """
+        Finds the trapezoid that contains the segment just above the wall through `wall_vertex`
+        """
+        wall_key = self._vertex_key(wall_vertex)
+        node = self._nodes[0]
+        while node[0] != LEAF:
+            if node[0] == POINT_NODE:
+                is_above = self._vertex_key(node[1]) <= wall_key
+                node = self._nodes[node[3] if is_above else node[2]]
+            else:
+                is_left = self._is_left_along(node[1], segment_index, wall_vertex)
+                node = self._nodes[node[2] if is_left else node[3]]
+        return self._trapezoids[node[1]]
+
+    def _new_trapezoid(self, left: int, right: int, bottom: int, top: int) -> Trapezoid:
+        trapezoid = Trapezoid(left, right, bottom, top, len(self._nodes))
+        self._nodes.append([LEAF, len(self._trapezoids), -1, -1])
+        self._trapezoids.append(trapezoid)
+        return trapezoid
+
+    def _new_node(self, node: List[int]) -> int:
+        """
+        :param node: kind, key, below or left child, above or right child
+        """
+        self._nodes.append(node)
+        return len(self._nodes) - 1
+
+    def _insert(self, segment_index: int):
+        segment = self.dcel.edges[segment_index]
+        p, q = segment.v1, segment.v2
+        crossed = [self._locate_along(segment_index, p)]
+        while crossed[-1].top != -1 and self._vertex_key(crossed[-1].top) < self._vertex_key(q):
+            crossed.append(self._locate_along(segment_index, crossed[-1].top))
+
+        # walls crossed by the segment are cut, pieces on the side without the wall vertex merge
+        left_pieces, right_pieces = [], []
+        for i, trapezoid in enumerate(crossed):
+            wall = trapezoid.bottom
+            wall_area = self._edge_area(segment_index, wall) if i > 0 else 0
+            if i == 0 or wall_area > 0:
+                if left_pieces:
+                    left_pieces[-1].top = wall
+                left_pieces.append(self._new_trapezoid(trapezoid.left, segment_index, p if i == 0 else wall, q))
+            if i == 0 or wall_area < 0:
+                if right_pieces:
+                    right_pieces[-1].top = wall
+                right_pieces.append(self._new_trapezoid(segment_index, trapezoid.right, p if i == 0 else wall, q))
+            node = [SEGMENT_NODE, segment_index, left_pieces[-1].leaf, right_pieces[-1].leaf]
+            if i == len(crossed) - 1 and trapezoid.top != q:
+                above = self._new_trapezoid(trapezoid.left, trapezoid.right, q, trapezoid.top)
+                node = [POINT_NODE, q, self._new_node(node), above.leaf]
+            if i == 0 and trapezoid.bottom != p:
+                below = self._new_trapezoid(trapezoid.left, trapezoid.right, trapezoid.bottom, p)
+                node = [POINT_NODE, p, below.leaf, self._new_node(node)]
+            # the leaf of the crossed trapezoid becomes the root of its replacement, so parents need no update
+            self._nodes[trapezoid.leaf] = node
+
+    def _freeze(self):
+        """
+        Compiles the DAG into typed arrays, only trapezoids that are still leaves are kept
+        """
+        leaves = [node for node in self._nodes if node[0] == LEAF]
+        trapezoids = [self._trapezoids[node[1]] for node in leaves]
+        for trapezoid_index, node in enumerate(leaves):
+            node[1] = trapezoid_index
+        self.kind = array('b', (node[0] for node in self._nodes))
+        self.key = array('i', (node[1] for node in self._nodes))
+        self.below_or_left = array('i', (node[2] for node in self._nodes))
+        self.above_or_right = array('i', (node[3] for node in self._nodes))
+        self.trapezoid_left = array('i', (trapezoid.left for trapezoid in trapezoids))
+        self.trapezoid_right = array('i', (trapezoid.right for trapezoid in trapezoids))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(memoryview(column).nbytes for column in (self.kind, self.key, self.below_or_left,
+                                                            self.above_or_right, self.trapezoid_left,
+                                                            self.trapezoid_right))
+
+    def _edge_face(self, edge_index: int) -> int:
+        edge = self.dcel.edges[edge_index]
+        return edge.f2 if edge.f2 != -1 else edge.f1
+
+    def _point_area(self, edge_index: int, x: int, y: int) -> int:
+        edge = self.dcel.edges[edge_index]
+        return edge.a * x + edge.b * y + edge.c
+
+    def locate_point(self, point: Point) -> int:
+        x, y = (value if isinstance(value, int) else Fraction(value) for value in point)
+        is_up = y != self.max_y
+        node = 0
+        while self.kind[node] != LEAF:
+            key = self.key[node]
+            if self.kind[node] == POINT_NODE:
+                is_above = y > self._ys[key] or (y == self._ys[key] and is_up)
+                node = self.above_or_right[node] if is_above else self.below_or_left[node]
+            else:
+                area = self._point_area(key, x, y)
+                if area == 0:
+                    edge = self.dcel.edges[key]
+                    if (x, y) != (self._xs[edge.v1], self._ys[edge.v1]) and \
+                            (x, y) != (self._xs[edge.v2], self._ys[edge.v2]):
+                        return self._edge_face(key)
+                # a point on a vertex goes left of every edge through it
+                node = self.below_or_left[node] if area >= 0 else self.above_or_right[node]
+        left, right = self.trapezoid_left[self.key[node]], self.trapezoid_right[self.key[node]]
+        if right != -1:
+            return self._edge_face(right) if self._point_area(right, x, y) == 0 else self.dcel.edges[right].f1
+        if left != -1:
+            return self.dcel.edges[left].f2
+        return -1
+
+    def _get_native_dtype(self) -> type:
+        # get_area sums products of two coordinates, so int64 is exact only for moderate integer coordinates
+        coordinates = self._xs + self._ys
+        if self.dcel.coordinate_type is int and max(map(abs, coordinates), default=0) < 2 ** 30:
+            return np.int64
+        return object
+
+    def _get_query_arrays(self, dtype: type = None) -> Dict[str, np.ndarray]:
+        """
+        :param dtype: np.int64 or object for exact Python numbers, by default the one that fits the coordinates
+        """
+        dtype = dtype or self._get_native_dtype()
+        if dtype in self._query_arrays:
+            return self._query_arrays[dtype]
+        edges = self.dcel.edges
+        xs, ys = np.array(self._xs, dtype=dtype), np.array(self._ys, dtype=dtype)
+        v1 = np.array([edge.v1 for edge in edges], dtype=np.int64)
+        v2 = np.array([edge.v2 for edge in edges], dtype=np.int64)
+        self._query_arrays[dtype] = {
+            'ys': ys,
+            'kind': np.frombuffer(self.kind, dtype=np.int8),
+            'key': np.frombuffer(self.key, dtype=np.int32),
+            'below_or_left': np.frombuffer(self.below_or_left, dtype=np.int32),
+            'above_or_right': np.frombuffer(self.above_or_right, dtype=np.int32),
+            'trapezoid_left': np.frombuffer(self.trapezoid_left, dtype=np.int32),
+            'trapezoid_right': np.frombuffer(self.trapezoid_right, dtype=np.int32),
+            'x1': xs[v1], 'y1': ys[v1], 'x2': xs[v2], 'y2': ys[v2],
+            'f1': np.array([edge.f1 for edge in edges], dtype=np.int64),
+            'f2': np.array([edge.f2 for edge in edges], dtype=np.int64),
+        }
+        return self._query_arrays[dtype]
+
+    def locate_points(self, xs: Sequence[Coordinate], ys: Sequence[Coordinate]) -> np.ndarray:
+        """
+        Locates a batch of points by walking the DAG in lockstep, the result matches `locate_point` for every point.
+        Points that are not moderate integers are walked with exact Python numbers
+
+        :return: array of face indices
+        """
+        xs, ys = get_coordinate_array(xs), get_coordinate_array(ys)
+        dtype = self._get_native_dtype()
+        if len(xs) and (xs.dtype != np.int64 or ys.dtype != np.int64 or
+                        max(-xs.min(), xs.max(), -ys.min(), ys.max()) >= 2 ** 30):
+            dtype = object
+        arrays = self._get_query_arrays(dtype)
+        xs, ys = (np.array([value if isinstance(value, int) else Fraction(value) for value in values.tolist()],
+                           dtype=object) if dtype is object else values for values in (xs, ys))
+        faces = np.full(len(xs), -1, dtype=np.int64)
+        if len(xs) == 0:
+            return faces
+        is_up = ys != self.max_y
+        active = np.arange(len(xs))
+        nodes = np.zeros(len(xs), dtype=np.int64)
+        f1, f2 = arrays['f1'], arrays['f2']
+        while len(active):
+            kinds = arrays['kind'][nodes]
+            keys = arrays['key'][nodes].astype(np.int64)
+            x, y = xs[active], ys[active]
+            next_nodes = nodes.copy()
+            done = np.zeros(len(active), dtype=bool)
+
+            point_nodes = kinds == POINT_NODE
+            wall_ys = arrays['ys'][keys[point_nodes]]
+            is_above = (y[point_nodes] > wall_ys) | ((y[point_nodes] == wall_ys) & is_up[active[point_nodes]])
+            next_nodes[point_nodes] = np.where(is_above, arrays['above_or_right'][nodes[point_nodes]],
+                                               arrays['below_or_left'][nodes[point_nodes]])
+
+            segment_nodes = np.flatnonzero(kinds == SEGMENT_NODE)
+            edge_indices = keys[segment_nodes]
+            x1, y1 = arrays['x1'][edge_indices], arrays['y1'][edge_indices]
+            x2, y2 = arrays['x2'][edge_indices], arrays['y2'][edge_indices]
+            sx, sy = x[segment_nodes], y[segment_nodes]
+            areas = x1 * y2 + y1 * sx + x2 * sy - y2 * sx - y1 * x2 - x1 * sy
+            on_edge = (areas == 0) & ((sx != x1) | (sy != y1)) & ((sx != x2) | (sy != y2))
+            edge_faces = np.where(f2[edge_indices] != -1, f2[edge_indices], f1[edge_indices])
+            faces[active[segment_nodes[on_edge]]] = edge_faces[on_edge]
+            done[segment_nodes[on_edge]] = True
+            next_nodes[segment_nodes] = np.where(areas >= 0, arrays['below_or_left'][nodes[segment_nodes]],
+                                                 arrays['above_or_right'][nodes[segment_nodes]])
+
+            leaves = np.flatnonzero(kinds == LEAF)
+            left = arrays['trapezoid_left'][keys[leaves]].astype(np.int64)
+            right = arrays['trapezoid_right'][keys[leaves]].astype(np.int64)
+            right_edges = np.maximum(right, 0)
+            lx, ly = x[leaves], y[leaves]
+            x1, y1 = arrays['x1'][right_edges], arrays['y1'][right_edges]
+            x2, y2 = arrays['x2'][right_edges], arrays['y2'][right_edges]
+            on_right = (x1 * y2 + y1 * lx + x2 * ly - y2 * lx - y1 * x2 - x1 * ly) == 0
+            right_faces = np.where(on_right, np.where(f2[right_edges] != -1, f2[right_edges], f1[right_edges]),
+                                   f1[right_edges])
+            left_faces = np.where(left != -1, f2[np.maximum(left, 0)], -1)
+            faces[active[leaves]] = np.where(right != -1, right_faces, left_faces)
+            done[leaves] = True
+
+            active, nodes = active[~done], next_nodes[~done]
+        return faces
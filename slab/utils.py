@@ -1,10 +1,81 @@
-from typing import List
+from fractions import Fraction
+
+import numpy as np
 
 from dcel import Edge, Point
+from dcel.coordinates import Coordinate
+
+# relative error bound of the orientation test in double precision [Shewchuk, Adaptive Precision Floating-Point
+# Arithmetic and Fast Robust Geometric Predicates], with a margin for the rounding of the bound itself
+EPSILON = 2.0 ** -53
+ORIENTATION_ERROR = (3 + 16 * EPSILON) * EPSILON * (1 + 4 * EPSILON)
+# absolute error of products that fall into subnormal doubles
+UNDERFLOW_ERROR = 2.0 ** -1000
+
+
+def get_area(edge: Edge, point: Point) -> int:
+    return edge.a * point.x + edge.b * point.y + edge.c
+
+
+def get_exact_orientation(x1: Coordinate, y1: Coordinate, x2: Coordinate, y2: Coordinate,
+                          x: Coordinate, y: Coordinate) -> Coordinate:
+    """
+    Exact `get_orientation`, or a multiple of it by a positive number. Doubles are turned into integers
+    on a common power of two grid, which is much faster than fractions
+    """
+    values = (x1, y1, x2, y2, x, y)
+    if any(type(value) is Fraction for value in values):
+        x1, y1, x2, y2, x, y = map(Fraction, values)
+    else:
+        ratios = [value.as_integer_ratio() for value in values]
+        denominator = max(ratio[1] for ratio in ratios)
+        x1, y1, x2, y2, x, y = (numerator * (denominator // ratio_denominator)
+                                for numerator, ratio_denominator in ratios)
+    return (x2 - x1) * (y - y1) - (y2 - y1) * (x - x1)
+
+
+def get_orientation(x1: Coordinate, y1: Coordinate, x2: Coordinate, y2: Coordinate,
+                    x: Coordinate, y: Coordinate) -> Coordinate:
+    """
+    Number of the same sign as twice the signed area of the triangle ((x1, y1), (x2, y2), (x, y)),
+    i.e. as `get_area` of the edge from (x1, y1) to (x2, y2). The coordinates are either all exact doubles
+    or all integers and fractions: the latter are computed exactly, the former in double precision first
+    and exactly only when the error bound does not exclude a wrong sign
+    """
+    left = (x2 - x1) * (y - y1)
+    right = (y2 - y1) * (x - x1)
+    area = left - right
+    if not isinstance(area, float) or abs(area) > ORIENTATION_ERROR * (abs(left) + abs(right)) + UNDERFLOW_ERROR:
+        return area
+    return get_exact_orientation(x1, y1, x2, y2, x, y)
+
+
+def get_filtered_areas(x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray,
+                       xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of `get_orientation` for float64 arrays, the uncertain areas are replaced by exact signs
+    """
+    with np.errstate(over='ignore', invalid='ignore'):
+        left = (x2 - x1) * (ys - y1)
+        right = (y2 - y1) * (xs - x1)
+        areas = left - right
+        uncertain = np.flatnonzero(~(np.abs(areas) > ORIENTATION_ERROR * (np.abs(left) + np.abs(right)) +
+                                     UNDERFLOW_ERROR))
+    if len(uncertain):
+        areas[uncertain] = get_exact_signs(x1[uncertain], y1[uncertain], x2[uncertain], y2[uncertain],
+                                           xs[uncertain], ys[uncertain])
+    return areas
 
 
-def get_area(edge: Edge, point: Point, vertexes: List[Point]) -> int:
-    vertex1 = vertexes[edge.v1]
-    vertex2 = vertexes[edge.v2]
-    return vertex1.x * vertex2.y + vertex1.y * point.x + vertex2.x * point.y \
-        - vertex2.y * point.x - vertex1.y * vertex2.x - vertex1.x * point.y
+def get_exact_signs(x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray,
+                    xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Exact signs of the orientations for float64 arrays: every double is a 53-bit integer times a power of two,
+    so the six values of an orientation are put on the grid of their smallest power as Python integers
+    """
+    mantissas, exponents = np.frexp(np.stack((x1, y1, x2, y2, xs, ys)))
+    mantissas = (mantissas * 2.0 ** 53).astype(np.int64).astype(object)
+    shifts = (exponents - exponents.min(axis=0)).astype(object)
+    x1, y1, x2, y2, xs, ys = mantissas << shifts
+    areas = (x2 - x1) * (ys - y1) - (y2 - y1) * (xs - x1)
+    return (areas > 0).astype(np.float64) - (areas < 0).astype(np.float64)
@@ -0,0 +1,35 @@
+"""
+Reference point location by crossing parity, independent of the slab structures
+"""
+from typing import Dict, List, Optional
+
+
+def _side(x1: int, y1: int, x2: int, y2: int, x: int, y: int) -> int:
+    return (x2 - x1) * (y - y1) - (y2 - y1) * (x - x1)
+
+
+def locate_brute_force(pslg: Dict[str, List[dict]], x: int, y: int) -> Optional[int]:
+    """
+    Face of a point off the edges: the face whose boundary edges a ray from the point to the right crosses
+    an odd number of times, -1 if there is none
+
+    :return: face index, None for a point on an edge or a vertex
+    """
+    vertexes = pslg['vertexes']
+    crossings = {}
+    for edge in pslg['edges']:
+        if edge['f1'] == edge['f2']:
+            continue
+        a, b = vertexes[edge['v1']], vertexes[edge['v2']]
+        if a['y'] > b['y']:
+            a, b = b, a
+        side = _side(a['x'], a['y'], b['x'], b['y'], x, y)
+        if side == 0 and min(a['x'], b['x']) <= x <= max(a['x'], b['x']) and a['y'] <= y <= b['y']:
+            return None
+        if a['y'] <= y < b['y'] and side > 0:
+            for face in (edge['f1'], edge['f2']):
+                if face != -1:
+                    crossings[face] = crossings.get(face, 0) ^ 1
+    faces = [face for face, parity in crossings.items() if parity]
+    assert len(faces) <= 1, faces
+    return faces[0] if faces else -1
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.generator import generate_pslg
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+EXAMPLE = Path(__file__).resolve().parent / 'data' / 'example.json'
+
+
+def get_upward_edges(pslg: dict):
+    """
+    Non-horizontal edges as (lower vertex, upper vertex, face to the left, face to the right) going up
+    """
+    vertexes = pslg['vertexes']
+    for edge in pslg['edges']:
+        v1, v2, f1, f2 = edge['v1'], edge['v2'], edge['f1'], edge['f2']
+        if vertexes[v1]['y'] > vertexes[v2]['y']:
+            v1, v2, f1, f2 = v2, v1, f2, f1
+        if vertexes[v1]['y'] != vertexes[v2]['y']:
+            yield v1, v2, f1, f2
+
+
+def get_edge_face(f1: int, f2: int) -> int:
+    return f2 if f2 != -1 else f1
+
+
+def get_vertex_face(pslg: dict, vertex_index: int):
+    """
+    Face of a point on the vertex by the documented rule: the leftmost edge going up from the vertex,
+    or coming into it on the top line, decides like a point on that edge. None if no edge goes up from the vertex
+    below the top line, then the point lies inside a face
+    """
+    vertexes = pslg['vertexes']
+    vertex = vertexes[vertex_index]
+    top = vertex['y'] == max(other['y'] for other in vertexes)
+    best = None
+    for v1, v2, f1, f2 in get_upward_edges(pslg):
+        other = v1 if top else v2
+        if (v2 if top else v1) != vertex_index:
+            continue
+        dx, dy = vertexes[other]['x'] - vertex['x'], abs(vertexes[other]['y'] - vertex['y'])
+        # the edge with the least x just above the vertex, or just below it on the top line
+        if best is None or dx * best[1] < best[0] * dy:
+            best = (dx, dy, get_edge_face(f1, f2))
+    return best[2] if best is not None else None
+
+
+def test_example_boundary_points():
+    with open(EXAMPLE) as input_file:
+        pslg = json.load(input_file)['pslg']
+    search_system = SearchSystem(DCEL(**pslg))
+    points = [(0, 0), (5, 5), (10, 0), (12, 8), (2, 2), (7, 3), (11, 4), (5, 0)]
+    expected = [0, 1, 1, 1, 0, 1, 1, 0]
+    assert [search_system.locate_point(Point(x, y)) for x, y in points] == expected
+    assert search_system.locate_points([x for x, _ in points], [y for _, y in points]).tolist() == expected
+
+
+@pytest.mark.parametrize('shape', ['triangulation', 'grid', 'slivers'])
+def test_vertex_and_edge_rule(shape):
+    pslg = generate_pslg(shape, 8, 0)
+    search_system = SearchSystem(DCEL(**pslg))
+    vertexes = pslg['vertexes']
+    points, expected = [], []
+    for vertex_index, vertex in enumerate(vertexes):
+        face = get_vertex_face(pslg, vertex_index)
+        if face is not None:
+            points.append((vertex['x'], vertex['y']))
+            expected.append(face)
+    for v1, v2, f1, f2 in get_upward_edges(pslg):
+        (x1, y1), (x2, y2) = (vertexes[v1]['x'], vertexes[v1]['y']), (vertexes[v2]['x'], vertexes[v2]['y'])
+        if (x1 + x2) % 2 == 0 and (y1 + y2) % 2 == 0 and y2 - y1 > 0:
+            points.append(((x1 + x2) // 2, (y1 + y2) // 2))
+            expected.append(get_edge_face(f1, f2))
+    assert len(points) > len(vertexes) // 2
+    assert [search_system.locate_point(Point(x, y)) for x, y in points] == expected
+    assert search_system.locate_points([x for x, _ in points], [y for _, y in points]).tolist() == expected
@@ -0,0 +1,36 @@
+import bisect
+import random
+
+import pytest
+
+from slab.buckets import BandBuckets
+
+
+def search_band(lines, y):
+    if y < lines[0] or y > lines[-1]:
+        return -1
+    r = bisect.bisect_left(lines, y)
+    if y == lines[r]:
+        return r if r < len(lines) - 1 else len(lines) - 2
+    return r - 1
+
+
+@pytest.mark.parametrize('mode', BandBuckets.modes)
+@pytest.mark.parametrize('seed', range(3))
+def test_clustered_lines(mode, seed):
+    """
+    Clusters of close lines put many lines into one bucket, which the adaptive mode splits
+    """
+    rnd = random.Random(seed)
+    lines = sorted({rnd.randint(center, center + 30) for center in (0, 500, 5000) for _ in range(20)} |
+                   {rnd.randint(-1000, 10000) for _ in range(10)})
+    buckets = BandBuckets(lines, mode)
+    if mode == 'adaptive':
+        assert len(buckets.sub_starts)
+    for y in range(lines[0] - 3, lines[-1] + 4):
+        assert buckets.search_band(y) == search_band(lines, y), y
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        BandBuckets([0, 1], 'exact')
@@ -0,0 +1,86 @@
+import pytest
+
+from benchmarks.generator import generate_points, generate_pslg
+from dcel import DCEL, Point
+from slab import SearchSystem, Stats
+from slab.cache import ClockCache, LRUCache, QueryCache
+
+
+@pytest.fixture
+def grid_case():
+    pslg = generate_pslg('grid', 6, 0)
+    points = generate_points(pslg, 400, 0)
+    return pslg, [point['x'] for point in points], [point['y'] for point in points]
+
+
+def test_lru_eviction():
+    cache = LRUCache(2)
+    cache.put('a', 0)
+    cache.put('b', 1)
+    assert cache.get('a') == 0
+    cache.put('c', 2)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (0, None, 2)
+    cache.put('d', 3)
+    assert (cache.get('a'), cache.get('c'), cache.get('d')) == (None, 2, 3)
+    assert len(cache) == 2
+
+
+def test_clock_eviction():
+    cache = ClockCache(2)
+    cache.put('a', 0)
+    cache.put('b', 1)
+    assert cache.get('a') == 0
+    # the hand clears the bit of a and evicts b, then a, whose bit is clear now
+    cache.put('c', 2)
+    assert (cache.get('b'), cache.get('c')) == (None, 2)
+    cache.put('d', 3)
+    assert (cache.get('a'), cache.get('c'), cache.get('d')) == (None, 2, 3)
+    assert len(cache) == 2
+
+
+def test_counters(grid_case):
+    pslg, xs, ys = grid_case
+    index = SearchSystem(DCEL(**pslg)).index
+    expected = index.locate_points(xs, ys).tolist()
+    distinct = len(set(zip(xs, ys)))
+    index.set_query_cache(2 ** 20, 'lru', 0)
+    assert index.locate_points(xs, ys).tolist() == expected
+    assert index.query_cache.to_dict()['misses'] == distinct
+    assert index.query_cache.hits == len(xs) - distinct
+    assert index.locate_points(xs, ys).tolist() == expected
+    assert (index.query_cache.hits, index.query_cache.misses) == (2 * len(xs) - distinct, distinct)
+    assert index.locate_point(Point(xs[0], ys[0])) == expected[0]
+    assert index.query_cache.hits == 2 * len(xs) - distinct + 1
+
+    index.set_query_cache(2 ** 20, 'lru', 64)
+    cache = index.query_cache
+    assert cache.grid.clean_count > 0
+    assert index.locate_points(xs, ys).tolist() == expected
+    assert cache.cell_hits > 0
+    assert cache.hits + cache.cell_hits + cache.misses == len(xs)
+    assert len(cache.points) == cache.misses
+
+
+def test_memory_cap(grid_case):
+    pslg, xs, ys = grid_case
+    index = SearchSystem(DCEL(**pslg)).index
+    with pytest.raises(ValueError, match='memory cap'):
+        index.set_query_cache(1000, 'lru', 256)
+    with pytest.raises(ValueError, match='Unknown cache policy'):
+        index.set_query_cache(2 ** 20, 'fifo')
+    index.set_query_cache(2 * QueryCache.entry_bytes, 'clock', 0)
+    assert index.query_cache.points.capacity == 2
+    assert index.locate_points(xs, ys).tolist() == SearchSystem(DCEL(**pslg)).locate_points(xs, ys).tolist()
+    assert len(index.query_cache.points) == 2
+
+
+@pytest.mark.parametrize('lazy_chunk', [None, 3])
+def test_grid_is_not_counted_as_queries(grid_case, lazy_chunk):
+    pslg, xs, ys = grid_case
+    stats = Stats()
+    index = SearchSystem(DCEL(**pslg), stats=stats, lazy_chunk=lazy_chunk).index
+    index.set_query_cache(2 ** 20, 'lru', 64)
+    assert (index.query_cache.grid is None) == (lazy_chunk is not None)
+    assert stats.to_dict()['queries'] == 0
+    index.locate_points(xs, ys)
+    assert stats.to_dict()['queries'] == index.query_cache.misses
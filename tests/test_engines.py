@@ -0,0 +1,102 @@
+import pytest
+
+from benchmarks.coherent import generate_trajectory
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from dcel import DCEL, Point
+from slab import SearchSystem, SlabIndex, TrapezoidMap
+from slab.parallel import ParallelLocator
+
+
+@pytest.fixture(params=sorted(SHAPES))
+def case(request):
+    """
+    PSLG, query points with a tenth of them on vertexes and edges, and the faces of the reference path:
+    single queries on the eagerly built path copying index
+    """
+    pslg = generate_pslg(request.param, 6, 0)
+    points = generate_points(pslg, 400, 0)
+    xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+    index = SearchSystem(DCEL(**pslg)).index
+    return pslg, xs, ys, [index.locate_point(Point(x, y)) for x, y in zip(xs, ys)]
+
+
+def assert_locates(index, xs, ys, expected):
+    assert [index.locate_point(Point(x, y)) for x, y in zip(xs, ys)] == expected
+    assert index.locate_points(xs, ys).tolist() == expected
+
+
+def test_saved_index(case, tmp_path):
+    pslg, xs, ys, expected = case
+    path = str(tmp_path / 'index.bin')
+    SearchSystem(DCEL(**pslg)).index.save(path)
+    assert_locates(SlabIndex.load(path), xs, ys, expected)
+
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_parallel_locate(case, start_method, monkeypatch):
+    """
+    Without fork the workers map a saved copy of the index
+    """
+    pslg, xs, ys, expected = case
+    monkeypatch.setattr('slab.parallel.multiprocessing.get_all_start_methods', lambda: [start_method])
+    with ParallelLocator(SearchSystem(DCEL(**pslg)).index, 2) as locator:
+        locator.min_chunk_size = 64
+        assert locator.locate_points(xs, ys).tolist() == expected
+
+
+def test_node_copying(case):
+    pslg, xs, ys, expected = case
+    assert_locates(SearchSystem(DCEL(**pslg), 'node_copying').index, xs, ys, expected)
+
+
+def test_trapezoid(case):
+    pslg, xs, ys, expected = case
+    for seed in range(3):
+        assert_locates(TrapezoidMap(DCEL(**pslg), seed), xs, ys, expected)
+
+
+def test_trapezoid_parallel_locate(case):
+    pslg, xs, ys, expected = case
+    with ParallelLocator(TrapezoidMap(DCEL(**pslg), 0), 2) as locator:
+        locator.min_chunk_size = 64
+        assert locator.locate_points(xs, ys).tolist() == expected
+
+
+def test_coherent(case):
+    pslg, xs, ys, expected = case
+    index = SearchSystem(DCEL(**pslg)).index
+    assert index.locate_points(xs, ys, True).tolist() == expected
+    trajectory_xs, trajectory_ys = generate_trajectory(pslg, 2000)
+    assert index.locate_points(trajectory_xs, trajectory_ys, True).tolist() == \
+        index.locate_points(trajectory_xs, trajectory_ys).tolist()
+
+
+def test_parallel_build(case):
+    pslg, xs, ys, expected = case
+    assert_locates(SearchSystem(DCEL(**pslg), workers=2).index, xs, ys, expected)
+
+
+@pytest.mark.parametrize('mode', ['uniform', 'adaptive'])
+def test_band_buckets(case, mode):
+    pslg, xs, ys, expected = case
+    index = SearchSystem(DCEL(**pslg)).index
+    index.set_band_buckets(mode)
+    assert_locates(index, xs, ys, expected)
+
+
+def test_lazy_slabs(case):
+    pslg, xs, ys, expected = case
+    assert_locates(SearchSystem(DCEL(**pslg), lazy_chunk=3).index, xs, ys, expected)
+    # a fresh index, so that the batch builds the bands itself
+    index = SearchSystem(DCEL(**pslg), lazy_chunk=3).index
+    assert index.locate_points(xs, ys).tolist() == expected
+
+
+@pytest.mark.parametrize('policy', ['lru', 'clock'])
+@pytest.mark.parametrize('grid_size', [0, 16])
+def test_query_cache(case, policy, grid_size):
+    pslg, xs, ys, expected = case
+    index = SearchSystem(DCEL(**pslg)).index
+    index.set_query_cache(4096, policy, grid_size)
+    for _ in range(2):
+        assert_locates(index, xs, ys, expected)
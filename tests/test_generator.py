@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from brute_force import locate_brute_force
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+
+@pytest.mark.parametrize('shape', sorted(SHAPES))
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_locate_point_matches_brute_force(shape, seed):
+    pslg = generate_pslg(shape, 6, seed)
+    search_system = SearchSystem(DCEL(**pslg))
+    for point in generate_points(pslg, 300, seed):
+        expected = locate_brute_force(pslg, point['x'], point['y'])
+        if expected is not None:
+            assert search_system.locate_point(Point(point['x'], point['y'])) == expected, point
@@ -0,0 +1,78 @@
+import json
+from fractions import Fraction
+from pathlib import Path
+
+import pytest
+
+from dcel import DCEL, Point
+from slab import SearchSystem, SlabIndex
+
+EXAMPLE = Path(__file__).resolve().parent / 'data' / 'example.json'
+
+
+@pytest.fixture
+def example():
+    with open(EXAMPLE) as input_file:
+        return json.load(input_file)
+
+
+def scale(example: dict, factor: int) -> dict:
+    pslg = dict(example['pslg'], vertexes=[{'x': vertex['x'] * factor, 'y': vertex['y'] * factor}
+                                           for vertex in example['pslg']['vertexes']])
+    points = [{'x': point['x'] * factor, 'y': point['y'] * factor} for point in example['points']]
+    return {'pslg': pslg, 'points': points}
+
+
+def test_save_and_load(example, tmp_path):
+    search_system = SearchSystem(DCEL(**example['pslg']))
+    path = tmp_path / 'index.bin'
+    search_system.index.save(str(path))
+    index = SlabIndex.load(str(path))
+    xs = [point['x'] for point in example['points']]
+    ys = [point['y'] for point in example['points']]
+    expected = [search_system.locate_point(Point(x, y)) for x, y in zip(xs, ys)]
+    assert [index.locate_point(Point(x, y)) for x, y in zip(xs, ys)] == expected
+    assert index.locate_points(xs, ys).tolist() == expected
+
+
+def test_coordinates_beyond_int64(example, tmp_path):
+    expected = SearchSystem(DCEL(**example['pslg'])).locate_points(
+        [point['x'] for point in example['points']], [point['y'] for point in example['points']]).tolist()
+    scaled = scale(example, 10 ** 20)
+    search_system = SearchSystem(DCEL(**scaled['pslg']))
+    xs = [point['x'] for point in scaled['points']]
+    ys = [point['y'] for point in scaled['points']]
+    assert [search_system.locate_point(Point(x, y)) for x, y in zip(xs, ys)] == expected
+    assert search_system.locate_points(xs, ys).tolist() == expected
+    with pytest.raises(Exception, match='int64'):
+        search_system.index.save(str(tmp_path / 'index.bin'))
+
+
+def test_update_with_vertex_beyond_int64(example):
+    search_system = SearchSystem(DCEL(**example['pslg']), updatable=True)
+    xs = [point['x'] for point in example['points']]
+    ys = [point['y'] for point in example['points']]
+    expected = search_system.locate_points(xs, ys).tolist()
+    # a dangling edge from the vertex (12, 8) far up to the right, in the outer face
+    search_system.update([{'x': 2 ** 70, 'y': 2 ** 70}],
+                         {4: dict(example['pslg']['edges'][4], p1=5),
+                          5: {'v1': 3, 'v2': 4, 'f1': -1, 'f2': -1, 'p1': 1, 'p2': 5}})
+    assert not search_system.index.is_savable
+    assert search_system.locate_points(xs + [2 ** 69], ys + [2 ** 69 + 1]).tolist() == expected + [-1]
+    assert search_system.locate_point(Point(2 ** 69, 2 ** 69 + 1)) == -1
+
+
+@pytest.mark.parametrize('factor', [1, 2.0 ** 58])
+def test_mixed_batches(example, factor):
+    """
+    Integer, float and fraction columns in one batch, with integers just off the vertexes and beyond the exact doubles
+    """
+    search_system = SearchSystem(DCEL(**scale(example, factor)['pslg']))
+    scaled = [(int(point['x'] * factor), point['y'] * factor) for point in example['points']]
+    batches = [([x + offset for x, _ in scaled], [float(y) for _, y in scaled]) for offset in (-1, 0, 1)]
+    batches += [([Fraction(x) + Fraction(1, 3) for x, _ in scaled], [y for _, y in scaled]),
+                ([float(x) for x, _ in scaled], [int(y) - 1 for _, y in scaled]),
+                ([2 ** 60 - 1, 2 ** 60 + 1], [2.0 ** 60, 2.0 ** 60])]
+    for xs, ys in batches:
+        expected = [search_system.locate_point(Point(x, y)) for x, y in zip(xs, ys)]
+        assert search_system.locate_points(xs, ys).tolist() == expected, (xs, ys)
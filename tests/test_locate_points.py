@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+EXAMPLE = Path(__file__).resolve().parent / 'data' / 'example.json'
+
+
+@pytest.fixture
+def example():
+    with open(EXAMPLE) as input_file:
+        return json.load(input_file)
+
+
+def test_batch_matches_single_points(example):
+    search_system = SearchSystem(DCEL(**example['pslg']))
+    xs = [point['x'] for point in example['points']]
+    ys = [point['y'] for point in example['points']]
+    expected = [search_system.locate_point(Point(x, y)) for x, y in zip(xs, ys)]
+    assert search_system.locate_points(xs, ys).tolist() == expected
+
+
+def test_batch_with_large_query_coordinates(example):
+    search_system = SearchSystem(DCEL(**example['pslg']))
+    points = [(2 ** 62, 4), (-2 ** 62, 4), (2 ** 40, 4), (2 ** 31, 3), (5, 2), (11, 5), (2 ** 70, 4), (-2 ** 70, 3)]
+    expected = [search_system.locate_point(Point(x, y)) for x, y in points]
+    assert search_system.locate_points([x for x, _ in points], [y for _, y in points]).tolist() == expected
+    # the int64 arrays of later batches are kept
+    assert search_system.locate_points([4], [3]).tolist() == [search_system.locate_point(Point(4, 3))]
@@ -0,0 +1,178 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dcel import DCEL
+from slab import SearchSystem
+from slab.columnar import ColumnarInput, write_input
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / 'tests' / 'data'
+EXAMPLE = DATA / 'example.json'
+
+
+def run_script(script: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, str(ROOT / script), *map(str, args)], capture_output=True, text=True)
+
+
+def run_main(*args: str) -> subprocess.CompletedProcess:
+    return run_script('main.py', *args)
+
+
+@pytest.fixture
+def example():
+    with open(EXAMPLE) as input_file:
+        example = json.load(input_file)
+    xs = [point['x'] for point in example['points']]
+    ys = [point['y'] for point in example['points']]
+    return example, xs, ys, SearchSystem(DCEL(**example['pslg'])).locate_points(xs, ys).tolist()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 100])
+def test_stream_ndjson(example, tmp_path, chunk_size):
+    example, xs, ys, expected = example
+    points_path, output_path = tmp_path / 'points.ndjson', tmp_path / 'faces.ndjson'
+    points_path.write_text(''.join(json.dumps({'x': x, 'y': y}) + '\n' for x, y in zip(xs, ys)))
+    result = run_main('-i', EXAMPLE, '--points', points_path, '--chunk-size', chunk_size, '-o', output_path)
+    assert result.returncode == 0, result.stderr
+    assert [int(line) for line in output_path.read_text().splitlines()] == expected
+
+
+def test_stream_binary(example, tmp_path):
+    example, xs, ys, expected = example
+    points_path, output_path = tmp_path / 'points.bin', tmp_path / 'faces.bin'
+    points_path.write_bytes(np.array(list(zip(xs, ys)), dtype='<i8').tobytes())
+    result = run_main('-i', EXAMPLE, '--points', points_path, '--points-format', 'binary', '--chunk-size', 4,
+                      '-o', output_path)
+    assert result.returncode == 0, result.stderr
+    assert np.frombuffer(output_path.read_bytes(), dtype='<i4').tolist() == expected
+
+
+def test_stream_ndjson_error(example, tmp_path):
+    example, xs, ys, expected = example
+    points_path, output_path = tmp_path / 'points.ndjson', tmp_path / 'faces.ndjson'
+    points_path.write_text(json.dumps({'x': xs[0], 'y': ys[0]}) + '\n{"x": 1}\n')
+    result = run_main('-i', EXAMPLE, '--points', points_path, '--chunk-size', 1, '-o', output_path)
+    assert result.returncode == 0, result.stderr
+    lines = output_path.read_text().splitlines()
+    assert int(lines[0]) == expected[0]
+    assert json.loads(lines[-1]) == {'error': 'Incorrect file format'}
+
+
+@pytest.fixture(params=['example', 'triangulation', 'same_y', 'halves'])
+def json_input(request, tmp_path):
+    """
+    JSON input files, halves is the example with float coordinates
+    """
+    if request.param != 'halves':
+        return DATA / f'{request.param}.json'
+    example = json.loads(EXAMPLE.read_text())
+    for item in example['pslg']['vertexes'] + example['points']:
+        item['x'], item['y'] = item['x'] / 2, item['y'] / 2
+    path = tmp_path / 'halves.json'
+    path.write_text(json.dumps(example))
+    return path
+
+
+def test_convert_round_trip(json_input, tmp_path):
+    binary_path, output_path = tmp_path / 'input.bin', tmp_path / 'faces.json'
+    result = run_script('convert.py', '-i', json_input, '-o', binary_path)
+    assert result.returncode == 0, result.stderr
+    input_data = json.loads(json_input.read_text())
+    columnar_input = ColumnarInput(str(binary_path))
+    assert [list(column) for column in columnar_input.get_points()] == \
+        [[point[name] for point in input_data['points']] for name in ('x', 'y')]
+    dcel, columnar_dcel = DCEL(**input_data['pslg']), columnar_input.get_dcel()
+    assert list(map(tuple, columnar_dcel.vertexes)) == list(map(tuple, dcel.vertexes))
+    assert [(edge.v1, edge.v2, edge.f1, edge.f2, edge.p1, edge.p2) for edge in columnar_dcel.edges] == \
+        [(edge.v1, edge.v2, edge.f1, edge.f2, edge.p1, edge.p2) for edge in dcel.edges]
+    for input_format, path in (('json', json_input), ('binary', binary_path)):
+        result = run_main('-i', path, '--input-format', input_format, '-o', output_path)
+        assert result.returncode == 0, result.stderr
+        faces = json.loads(output_path.read_text())['faces']
+        assert faces == SearchSystem(dcel).locate_points(*columnar_input.get_points()).tolist()
+
+
+def test_corrupt_binary_input(tmp_path):
+    example = json.loads(EXAMPLE.read_text())
+    path, output_path = tmp_path / 'input.bin', tmp_path / 'faces.json'
+    write_input(str(path), example['pslg'], example['points'])
+    content = path.read_bytes()
+    corrupt = [content[:length] for length in (0, 8, 16, 100, len(content) - 1)]
+    corrupt.append(b'SLABIDX1' + content[8:])
+    for data in corrupt:
+        path.write_bytes(data)
+        result = run_main('-i', path, '--input-format', 'binary', '-o', output_path)
+        assert result.returncode == 0, result.stderr
+        assert json.loads(output_path.read_text()) == {'error': f"Incorrect input file '{path}'"}
+    result = run_main('-i', path, '--input-format', 'binary', '--output-format', 'binary', '-o', output_path)
+    assert result.returncode == 1
+    assert json.loads(result.stderr) == {'error': f"Incorrect input file '{path}'"}
+
+    example['pslg']['edges'][0]['v1'] = 99
+    write_input(str(path), example['pslg'], example['points'])
+    result = run_main('-i', path, '--input-format', 'binary', '-o', output_path)
+    assert json.loads(output_path.read_text()) == {'error': 'Incorrect graph: v1 of edge 0 is out of range: 99'}
+
+
+@pytest.mark.parametrize('lazy', [[], ['--lazy', 2]])
+def test_cache_stats(example, tmp_path, lazy):
+    example, xs, ys, expected = example
+    output_path, stats_path = tmp_path / 'faces.json', tmp_path / 'stats.json'
+    result = run_main('-i', EXAMPLE, '-o', output_path, '--stats', stats_path, '--cache', 1, *lazy)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(output_path.read_text()) == {'faces': expected}
+    stats = json.loads(stats_path.read_text())
+    assert stats['queries'] == stats['cache']['misses'] == len(xs)
+    assert (stats['cache']['clean_cells'] > 0) == (not lazy)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_manifest(tmp_path, workers):
+    (tmp_path / 'broken.json').write_text('{"pslg": ')
+    (tmp_path / 'no_points.json').write_text('{}')
+    jobs = [{'pslg': str(EXAMPLE), 'output': 'example.json'},
+            {'pslg': str(DATA / 'triangulation.json'), 'points': str(DATA / 'same_y.json'), 'output': 'same_y.json'},
+            {'pslg': str(EXAMPLE), 'points': str(DATA / 'triangulation.json'), 'output': 'triangulation.bin',
+             'output_format': 'binary'},
+            {'pslg': 'missing.json', 'output': 'missing.json'},
+            {'pslg': 'broken.json', 'output': 'broken.json'},
+            {'pslg': str(EXAMPLE), 'points': 'no_points.json', 'output': 'no_points.json'}]
+    manifest_path, report_path = tmp_path / 'manifest.json', tmp_path / 'report.json'
+    manifest_path.write_text(json.dumps({'jobs': jobs}))
+    result = run_main('--manifest', manifest_path, '-o', report_path, '-w', workers)
+    assert result.returncode == 0, result.stderr
+
+    def locate(pslg_path: Path, points_path: Path) -> list:
+        points = json.loads(points_path.read_text())['points']
+        return SearchSystem(DCEL(**json.loads(pslg_path.read_text())['pslg'])).locate_points(
+            [point['x'] for point in points], [point['y'] for point in points]).tolist()
+
+    faces = [locate(EXAMPLE, EXAMPLE), locate(DATA / 'triangulation.json', DATA / 'same_y.json'),
+             locate(EXAMPLE, DATA / 'triangulation.json')]
+    assert json.loads((tmp_path / 'example.json').read_text()) == {'faces': faces[0]}
+    assert json.loads((tmp_path / 'same_y.json').read_text()) == {'faces': faces[1]}
+    assert np.frombuffer((tmp_path / 'triangulation.bin').read_bytes(), dtype='<i4').tolist() == faces[2]
+    errors = [f"No such file '{tmp_path / 'missing.json'}'", 'Incorrect file format', 'Incorrect file format']
+    for name, error in zip(('missing.json', 'broken.json', 'no_points.json'), errors):
+        assert json.loads((tmp_path / name).read_text()) == {'error': error}
+
+    report = json.loads(report_path.read_text())
+    assert report['maps'] == 4
+    assert [job['output'] for job in report['jobs']] == [str(tmp_path / job['output']) for job in jobs]
+    assert [job.get('points') for job in report['jobs']] == [len(job_faces) for job_faces in faces] + [None] * 3
+    assert [job.get('error') for job in report['jobs']] == [None] * 3 + errors
+
+
+def test_manifest_error(tmp_path):
+    manifest_path, report_path = tmp_path / 'manifest.json', tmp_path / 'report.json'
+    result = run_main('--manifest', manifest_path, '-o', report_path)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(report_path.read_text()) == {'error': f"No such file '{manifest_path}'"}
+    manifest_path.write_text(json.dumps({'jobs': [{'pslg': str(EXAMPLE)}]}))
+    run_main('--manifest', manifest_path, '-o', report_path)
+    assert json.loads(report_path.read_text()) == {'error': 'Incorrect manifest: every job needs pslg and output'}
@@ -0,0 +1,107 @@
+import random
+from fractions import Fraction
+from typing import Dict, List
+
+import pytest
+
+from benchmarks.generator import SHAPES, generate_pslg
+from brute_force import locate_brute_force
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+
+def get_segments(pslg: Dict[str, List[dict]], seed: int) -> List[Dict[str, Point]]:
+    """
+    Random segments, with horizontal, vertical and empty ones, and segments through vertexes and along edges
+    """
+    rnd = random.Random(seed)
+    vertexes = [Point(vertex['x'], vertex['y']) for vertex in pslg['vertexes']]
+    min_x, max_x = min(vertex.x for vertex in vertexes) - 2, max(vertex.x for vertex in vertexes) + 2
+    min_y, max_y = min(vertex.y for vertex in vertexes) - 2, max(vertex.y for vertex in vertexes) + 2
+    segments = []
+    for _ in range(30):
+        start = Point(rnd.randint(min_x, max_x), rnd.randint(min_y, max_y))
+        end = Point(rnd.randint(min_x, max_x), rnd.randint(min_y, max_y))
+        segments += [(start, end), (start, Point(end.x, start.y)), (start, Point(start.x, end.y)), (start, start)]
+    for edge in rnd.sample(pslg['edges'], min(len(pslg['edges']), 20)):
+        a, b = vertexes[edge['v1']], vertexes[edge['v2']]
+        segments += [(a, b), (Point(2 * a.x - b.x, 2 * a.y - b.y), Point(2 * b.x - a.x, 2 * b.y - a.y)),
+                     (rnd.choice(vertexes), rnd.choice(vertexes))]
+    return segments
+
+
+def get_segment_faces_brute_force(search_system: SearchSystem, pslg: Dict[str, List[dict]],
+                                  start: Point, end: Point) -> List[int]:
+    """
+    The segment is cut at every point where it meets an edge, the middle of every piece lies in one face
+    or on an edge for its whole length
+    """
+    vertexes = [Point(vertex['x'], vertex['y']) for vertex in pslg['vertexes']]
+    dx, dy = end.x - start.x, end.y - start.y
+    cuts = {Fraction(0), Fraction(1)}
+    for edge in pslg['edges']:
+        a, b = vertexes[edge['v1']], vertexes[edge['v2']]
+        ex, ey = b.x - a.x, b.y - a.y
+        denominator = dx * ey - dy * ex
+        if denominator != 0:
+            t = Fraction((a.x - start.x) * ey - (a.y - start.y) * ex, denominator)
+            u = Fraction((a.x - start.x) * dy - (a.y - start.y) * dx, denominator)
+            if 0 <= t <= 1 and 0 <= u <= 1:
+                cuts.add(t)
+        elif (dx, dy) != (0, 0) and (a.x - start.x) * dy - (a.y - start.y) * dx == 0:
+            length = dx * dx + dy * dy
+            cuts.update(t for t in (Fraction((v.x - start.x) * dx + (v.y - start.y) * dy, length) for v in (a, b))
+                        if 0 <= t <= 1)
+    cuts = sorted(cuts)
+    faces = [search_system.locate_point(start)]
+    for t in ((t1 + t2) / 2 for t1, t2 in zip(cuts, cuts[1:])):
+        x, y = start.x + t * dx, start.y + t * dy
+        face = locate_brute_force(pslg, x, y)
+        faces.append(search_system.locate_point(Point(x, y)) if face is None else face)
+    faces.append(search_system.locate_point(end))
+    return list(dict.fromkeys(faces))
+
+
+def get_box_faces_brute_force(pslg: Dict[str, List[dict]], corner1: Point, corner2: Point) -> List[int]:
+    """
+    A face meets the box if one of its edges passes through the inside of the box, or if no edge does
+    and the face holds the center of the box
+    """
+    vertexes = [Point(vertex['x'], vertex['y']) for vertex in pslg['vertexes']]
+    x_min, x_max = min(corner1.x, corner2.x), max(corner1.x, corner2.x)
+    y_min, y_max = min(corner1.y, corner2.y), max(corner1.y, corner2.y)
+    faces = set()
+    for edge in pslg['edges']:
+        a, b = vertexes[edge['v1']], vertexes[edge['v2']]
+        low, high = Fraction(0), Fraction(1)
+        for start, delta, bound_min, bound_max in ((a.x, b.x - a.x, x_min, x_max), (a.y, b.y - a.y, y_min, y_max)):
+            if delta == 0:
+                if not bound_min < start < bound_max:
+                    high = low
+                continue
+            t1, t2 = sorted((Fraction(bound_min - start, delta), Fraction(bound_max - start, delta)))
+            low, high = max(low, t1), min(high, t2)
+        if low < high:
+            faces.update((edge['f1'], edge['f2']))
+    if not faces:
+        faces.add(locate_brute_force(pslg, Fraction(x_min + x_max, 2), Fraction(y_min + y_max, 2)))
+    return sorted(faces)
+
+
+@pytest.mark.parametrize('shape', sorted(SHAPES))
+def test_segment_faces(shape):
+    pslg = generate_pslg(shape, 5, 0)
+    search_system = SearchSystem(DCEL(**pslg))
+    for start, end in get_segments(pslg, 0):
+        assert search_system.get_segment_faces(start, end) == \
+            get_segment_faces_brute_force(search_system, pslg, start, end), (start, end)
+
+
+@pytest.mark.parametrize('shape', sorted(SHAPES))
+def test_box_faces(shape):
+    pslg = generate_pslg(shape, 5, 0)
+    search_system = SearchSystem(DCEL(**pslg))
+    for corner1, corner2 in get_segments(pslg, 1):
+        if corner1.x != corner2.x and corner1.y != corner2.y:
+            assert search_system.get_box_faces(corner1, corner2) == \
+                get_box_faces_brute_force(pslg, corner1, corner2), (corner1, corner2)
@@ -0,0 +1,29 @@
+import asyncio
+import json
+from pathlib import Path
+
+from dcel import DCEL
+from slab import SearchSystem
+from slab.service import IndexRegistry, LocateService
+
+EXAMPLE = Path(__file__).resolve().parent / 'data' / 'example.json'
+
+
+def test_coalesced_requests_match_batch_search():
+    with open(EXAMPLE) as input_file:
+        example = json.load(input_file)
+    xs = [point['x'] for point in example['points']]
+    ys = [point['y'] for point in example['points']]
+    expected = SearchSystem(DCEL(**example['pslg'])).locate_points(xs, ys).tolist()
+
+    async def run():
+        service = LocateService(IndexRegistry(2 ** 30), coalesce_points=4, coalesce_delay=0.01)
+        key = await service.registry.load(example['pslg'])
+        single = [service.locate(key, [x], [y]) for x, y in zip(xs, ys)]
+        results = await asyncio.gather(*single, service.locate(key, xs, ys))
+        return results, service.counters
+
+    results, counters = asyncio.run(run())
+    assert [faces[0] for faces in results[:-1]] == expected
+    assert results[-1] == expected
+    assert counters['batches'] == 3 and counters['coalesced_requests'] == len(xs)
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dcel import DCEL, Point
+from slab import SearchSystem, Stats
+
+EXAMPLE = Path(__file__).resolve().parent / 'data' / 'example.json'
+
+
+@pytest.fixture
+def example():
+    with open(EXAMPLE) as input_file:
+        return json.load(input_file)
+
+
+def test_phase_is_timed_when_it_raises():
+    stats = Stats()
+    with pytest.raises(ValueError):
+        with stats.phase('failing'):
+            raise ValueError
+    assert stats.phases['failing'] >= 0
+    with stats.phase('failing'):
+        pass
+    assert set(stats.phases) == {'failing'}
+
+
+def test_histograms_and_merge():
+    stats, other = Stats(), Stats()
+    stats.add_queries(np.array([1, 2, 2]))
+    other.add_queries(np.array([2, 5]))
+    other.phases['sweep'] = 1.5
+    stats.merge(other)
+    summary = stats.to_dict()
+    assert summary['queries'] == 5
+    assert summary['depth'] == {'mean': 12 / 5, 'max': 5, 'histogram': {'1': 1, '2': 3, '5': 1}}
+    assert summary['phases_s'] == {'sweep': 1.5}
+
+
+def test_build_and_query_stats(example):
+    stats = Stats()
+    search_system = SearchSystem(DCEL(**example['pslg'], stats=stats), stats=stats)
+    assert {'dcel_parsing', 'sorting', 'sweep', 'freeze', 'index'} <= set(stats.phases)
+    assert stats.nodes_per_version and len(stats.nodes_per_version) == len(search_system.frozen.roots)
+    assert stats.memory['index'] == search_system.index.nbytes
+
+    xs = [point['x'] for point in example['points']]
+    ys = [point['y'] for point in example['points']]
+    search_system.locate_points(xs, ys)
+    search_system.locate_points(xs, ys, True)
+    for x, y in zip(xs, ys):
+        search_system.locate_point(Point(x, y))
+    summary = stats.to_dict()
+    assert summary['queries'] == 3 * len(xs)
+    assert 0 < summary['depth']['max'] <= len(example['pslg']['edges'])
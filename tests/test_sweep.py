@@ -0,0 +1,25 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from brute_force import locate_brute_force
+from dcel import DCEL, Point
+from slab import SearchSystem
+
+DATA = Path(__file__).resolve().parent / 'data'
+
+
+# generated inputs on which a delete of the sweep missed its edge and left it in the later slabs
+@pytest.mark.parametrize('name', ['triangulation', 'same_y'])
+def test_locate_point_matches_brute_force(name):
+    with open(DATA / f'{name}.json') as input_file:
+        input_data = json.load(input_file)
+    search_system = SearchSystem(DCEL(**input_data['pslg']))
+    checked = 0
+    for point in input_data['points']:
+        expected = locate_brute_force(input_data['pslg'], point['x'], point['y'])
+        if expected is not None:
+            assert search_system.locate_point(Point(point['x'], point['y'])) == expected, point
+            checked += 1
+    assert checked > len(input_data['points']) // 2
@@ -0,0 +1,79 @@
+from typing import Dict, Optional
+
+import pytest
+
+from benchmarks.generator import generate_points, generate_pslg
+from benchmarks.updates import compact, delete_edge_diff, edge_dict
+from dcel import DCEL
+from slab import SearchSystem
+
+
+def assert_matches_rebuild(search_system: SearchSystem, seed: int):
+    pslg = compact(search_system.dcel)
+    rebuilt = SearchSystem(DCEL(**pslg))
+    points = generate_points(pslg, 400, seed)
+    xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+    assert search_system.locate_points(xs, ys).tolist() == rebuilt.locate_points(xs, ys).tolist()
+
+
+def get_inner_edges(dcel: DCEL):
+    """
+    Edges between two inner faces whose endpoints keep other edges when they are deleted
+    """
+    return [edge_index for edge_index, edge in enumerate(dcel.edges)
+            if edge is not None and -1 not in (edge.f1, edge.f2) and edge.f1 != edge.f2
+            and all(len(list(dcel.get_incident_edges_for_vertex(v))) > 2 for v in (edge.v1, edge.v2))]
+
+
+def split_edge_diff(dcel: DCEL, edge_index: int) -> Dict[int, Optional[dict]]:
+    """
+    Diff that splits an edge at its midpoint, the new vertex gets the index `len(dcel.vertexes)`
+    """
+    edge = dcel.edges[edge_index]
+    vertex_index, new_edge_index = len(dcel.vertexes), len(dcel.edges)
+    previous_edge_index = edge_index
+    while True:
+        previous_edge = dcel.edges[previous_edge_index]
+        next_edge_index = previous_edge.p1 if previous_edge.v1 == edge.v2 else previous_edge.p2
+        if next_edge_index == edge_index:
+            break
+        previous_edge_index = next_edge_index
+    diff = {edge_index: dict(edge_dict(edge), v2=vertex_index, p2=new_edge_index),
+            new_edge_index: dict(edge_dict(edge), v1=vertex_index, p1=edge_index)}
+    previous = diff.setdefault(previous_edge_index, edge_dict(dcel.edges[previous_edge_index]))
+    previous['p1' if previous['v1'] == edge.v2 else 'p2'] = new_edge_index
+    return diff
+
+
+@pytest.mark.parametrize('shape', ['triangulation', 'grid', 'slivers'])
+def test_delete_and_insert_edges(shape):
+    search_system = SearchSystem(DCEL(**generate_pslg(shape, 6, 0)), updatable=True)
+    dcel = search_system.dcel
+    for seed, edge_index in enumerate(get_inner_edges(dcel)[:4]):
+        diff = delete_edge_diff(dcel, edge_index)
+        restore = {index: edge_dict(dcel.edges[index]) for index in diff}
+        search_system.update(edges=diff)
+        assert_matches_rebuild(search_system, seed)
+        search_system.update(edges=restore)
+        assert_matches_rebuild(search_system, seed)
+
+
+@pytest.mark.parametrize('shape', ['triangulation', 'grid', 'slivers'])
+def test_new_vertex(shape):
+    pslg = generate_pslg(shape, 6, 0)
+    for vertex in pslg['vertexes']:
+        vertex['x'], vertex['y'] = vertex['x'] * 2, vertex['y'] * 2
+    search_system = SearchSystem(DCEL(**pslg), updatable=True)
+    dcel = search_system.dcel
+    for seed, edge_index in enumerate(get_inner_edges(dcel)[:3]):
+        edge = dcel.edges[edge_index]
+        v1, v2 = dcel.vertexes[edge.v1], dcel.vertexes[edge.v2]
+        search_system.update([{'x': (v1.x + v2.x) // 2, 'y': (v1.y + v2.y) // 2}], split_edge_diff(dcel, edge_index))
+        assert_matches_rebuild(search_system, seed)
+
+
+def test_nodes_are_released_without_updatable():
+    search_system = SearchSystem(DCEL(**generate_pslg('grid', 4, 0)))
+    assert search_system.tree is None
+    with pytest.raises(Exception, match='updatable'):
+        search_system.update(edges={})
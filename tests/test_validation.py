@@ -0,0 +1,101 @@
+import copy
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from benchmarks.generator import SHAPES, generate_points, generate_pslg
+from dcel import DCEL
+from slab import SearchSystem
+
+EXAMPLE = Path(__file__).resolve().parent / 'data' / 'example.json'
+
+
+@pytest.fixture
+def example():
+    with open(EXAMPLE) as input_file:
+        return json.load(input_file)
+
+
+def reverse_pointers(pslg: Dict[str, List[dict]], vertexes=None) -> Dict[str, List[dict]]:
+    """
+    PSLG whose pointers name the previous edge around the given vertexes, around all of them by default
+    """
+    edges = pslg['edges']
+    previous = {}
+    for edge_index, edge in enumerate(edges):
+        for vertex, pointer in ((edge['v1'], edge['p1']), (edge['v2'], edge['p2'])):
+            previous[vertex, pointer] = edge_index
+    reversed_edges = copy.deepcopy(edges)
+    for edge_index, edge in enumerate(reversed_edges):
+        for vertex, field in ((edge['v1'], 'p1'), (edge['v2'], 'p2')):
+            if vertexes is None or vertex in vertexes:
+                edge[field] = previous[vertex, edge_index]
+    return dict(pslg, edges=reversed_edges)
+
+
+def test_clockwise_pointers(example):
+    xs = [point['x'] for point in example['points']]
+    ys = [point['y'] for point in example['points']]
+    assert SearchSystem(DCEL(**reverse_pointers(example['pslg']))).locate_points(xs, ys).tolist() == \
+        [0, 1, 1, 1, 1, -1]
+
+
+@pytest.mark.parametrize('shape', sorted(SHAPES))
+def test_clockwise_generated(shape):
+    pslg = generate_pslg(shape, 5, 0)
+    points = generate_points(pslg, 200, 0)
+    xs, ys = [point['x'] for point in points], [point['y'] for point in points]
+    assert SearchSystem(DCEL(**reverse_pointers(pslg))).locate_points(xs, ys).tolist() == \
+        SearchSystem(DCEL(**pslg)).locate_points(xs, ys).tolist()
+
+
+def test_mixed_rotation(example):
+    with pytest.raises(Exception, match='do not match'):
+        DCEL(**reverse_pointers(example['pslg'], {1}))
+
+
+@pytest.mark.parametrize('field, value', [('v1', 4), ('v2', -1), ('p1', 5), ('p2', -1), ('f1', -2), ('f2', -2)])
+def test_out_of_range(example, field, value):
+    example['pslg']['edges'][0][field] = value
+    with pytest.raises(Exception, match=f'^Incorrect graph: {field} of edge 0 is out of range: {value}$'):
+        DCEL(**example['pslg'])
+
+
+@pytest.mark.parametrize('changes, message', [
+    ({'v2': 0}, 'edge 0 starts and ends at vertex 0'),
+    ({'p1': 0}, 'pointer p1 of edge 0 points on the same edge'),
+    ({'p1': 1}, 'pointer p1 of edge 0 points on edge 1, which does not meet vertex 0'),
+    ({'f1': 1}, 'faces of edge 0 and of the next edge 3 around vertex 0 do not match'),
+])
+def test_bad_edge(example, changes, message):
+    example['pslg']['edges'][0].update(changes)
+    with pytest.raises(Exception, match=f'^Incorrect graph: {message}$'):
+        DCEL(**example['pslg'])
+
+
+def test_several_pointers_on_one_edge(example):
+    example['pslg']['edges'][1]['p2'] = 2
+    with pytest.raises(Exception, match='^Incorrect graph: several pointers around vertex 1 point on edge 2$'):
+        DCEL(**example['pslg'])
+
+
+def test_several_cycles():
+    """
+    Two triangles that share the vertex 0, with the pointers around it in a cycle for every triangle
+    """
+    vertexes = [{'x': 0, 'y': 0}, {'x': 2, 'y': 1}, {'x': 2, 'y': -1}, {'x': -2, 'y': 1}, {'x': -2, 'y': -1}]
+    edges = [{'v1': 0, 'v2': 1, 'p1': 2, 'p2': 1}, {'v1': 1, 'v2': 2, 'p1': 0, 'p2': 2},
+             {'v1': 2, 'v2': 0, 'p1': 1, 'p2': 0}, {'v1': 0, 'v2': 3, 'p1': 5, 'p2': 4},
+             {'v1': 3, 'v2': 4, 'p1': 3, 'p2': 5}, {'v1': 4, 'v2': 0, 'p1': 4, 'p2': 3}]
+    for edge in edges:
+        edge.update(f1=-1, f2=-1)
+    with pytest.raises(Exception, match='^Incorrect graph: edges around vertex 0 form 2 cycles instead of one$'):
+        DCEL(vertexes, edges)
+
+
+def test_vertex_without_edges(example):
+    example['pslg']['vertexes'].append({'x': 20, 'y': 20})
+    with pytest.raises(Exception, match='^Incorrect graph: vertex 4 without incident edges$'):
+        DCEL(**example['pslg'])